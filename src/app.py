@@ -1,6 +1,11 @@
 import streamlit as st
 import subprocess
 import sys
+import json
+import urllib.error
+import urllib.request
+
+from config import Config
 
 # Configure the web page layout, title, and favicon (the little icon in the browser tab)
 st.set_page_config(page_title="Solar Flare Predictor", page_icon="☀️", layout="centered")
@@ -37,6 +42,38 @@ def run_script(script_name):
         # Handle the case where the file doesn't exist in the src folder
         return False, f"Cannot find the file src/{script_name}."
 
+def run_inference_service():
+    """
+    Ask the long-lived inference service (inference_service_main.py) for a prediction.
+    Returns None when the service is not running, so the caller can fall back
+    to spawning inference_main.py.
+    """
+    url = f"{Config().inference_url}/predict"
+    try:
+        with urllib.request.urlopen(url, timeout=60) as response:
+            result = json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        # Service is up but the prediction failed
+        return False, e.read().decode()
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return None
+
+    # Same layout as Inference_Manager.printResults so the result can be extracted
+    output = (
+        f"X ray predicted Flux =  {result['flux']} Solar Class: {result['flare_class']}\n"
+        f"{result['description']}\n"
+        f"Prediction for date:  {result['valid_for']}\n"
+        f"(served by inference service at {url})"
+    )
+    return True, output
+
+def run_inference():
+    """Run inference through the warm service when available, otherwise as a subprocess."""
+    service_result = run_inference_service()
+    if service_result is not None:
+        return service_result
+    return run_script('inference_main.py')
+
 def extract_solar_class(text):
     """
     Scans the verbose logs (like TensorFlow loading bars) to find and extract
@@ -95,7 +132,7 @@ def main():
     with col3:
         if st.button("🔮 Inference Only", use_container_width=True):
             with st.spinner("Running predictions..."):
-                success, output = run_script('inference_main.py')
+                success, output = run_inference()
                 
             if success:
                 st.success("Inference completed! ✅")
@@ -139,7 +176,7 @@ def main():
                 
             # Step 3: Inference
             st.toast("Starting Inference...")
-            success3, out3 = run_script('inference_main.py')
+            success3, out3 = run_inference()
             if not success3:
                 st.error("❌ Pipeline stopped at Inference:")
                 st.code(out3, language="text")
@@ -0,0 +1,5 @@
+"""Standalone benchmarks. Run from the src folder: python -m benchmarks.<name>"""
+import os
+
+# Importing the pipeline packages pulls in TensorFlow; keep its logs quiet
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
@@ -0,0 +1,99 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from config import Config
+from scaling_kernel import ScalingKernel
+from training_pipeline.train_set_creator import TrainSetCreator
+from training_pipeline.window_engine import WindowEngine
+from benchmarks.measure import print_table
+
+
+def latest_windows(conf, model, n_windows):
+    """Scaled inputs and raw (n, n_horizons) targets of the newest n_windows windows of the dataset."""
+    tr_dataset_cr = TrainSetCreator(conf.dataset_path, cache_dir=conf.window_cache_dir, store_dir=conf.store_dir)
+    X, y = tr_dataset_cr.load_base_arrays()
+
+    horizons = [TrainSetCreator.HORIZON]
+    if os.path.exists(conf.horizons_path):
+        with open(conf.horizons_path, "r") as f:
+            horizons = json.load(f)["horizons"]
+    engine = WindowEngine(model.input_shape[1], horizons=horizons)
+
+    n_rows = min(len(X), n_windows + engine.window + engine.horizon)
+    x_view, y_view = engine.build(X[-n_rows:], y[-n_rows:])
+
+    kernel = ScalingKernel.load(conf.model_dir)
+    return kernel, kernel.transform_features(x_view), np.asarray(y_view)
+
+
+def single_latency_ms(model, x, repeat):
+    """p50 / p95 latency of one-window calls, as served by the inference engine."""
+    model(x[:1], training=False)  # warm-up (graph tracing)
+    timings = []
+    for i in range(repeat):
+        window = x[i % len(x)][np.newaxis, ...]
+        start = time.perf_counter()
+        model(window, training=False).numpy()
+        timings.append((time.perf_counter() - start) * 1e3)
+    return np.percentile(timings, 50), np.percentile(timings, 95)
+
+
+def throughput(model, x, batch_size):
+    """Windows/sec of batched prediction."""
+    model.predict(x[:batch_size], batch_size=batch_size, verbose=0)
+    start = time.perf_counter()
+    pred = model.predict(x, batch_size=batch_size, verbose=0)
+    return len(x) / (time.perf_counter() - start), pred
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency, throughput and error of the distilled student versus the LSTM teacher.")
+    parser.add_argument("--windows", type=int, default=2048, help="Newest windows used for throughput and error")
+    parser.add_argument("--repeat", type=int, default=200, help="Single-window calls timed per model")
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    conf = Config()
+    if not os.path.exists(conf.student_model_path):
+        raise FileNotFoundError(f"No student at {conf.student_model_path}; run training_main.py --distill conv first")
+
+    models = {
+        "lstm": tf.keras.models.load_model(conf.model_path),
+        "student": tf.keras.models.load_model(conf.student_model_path),
+    }
+    kernel, x, y_true = latest_windows(conf, models["lstm"], args.windows)
+
+    rows, preds = [], {}
+    for name, model in models.items():
+        p50, p95 = single_latency_ms(model, x, args.repeat)
+        rate, pred = throughput(model, x, args.batch_size)
+        preds[name] = kernel.decode_targets(pred)
+        rows.append({
+            "model": name,
+            "params": model.count_params(),
+            "p50_ms": f"{p50:.2f}",
+            "p95_ms": f"{p95:.2f}",
+            "windows_per_s": f"{rate:,.0f}",
+        })
+
+    # Errors in log10 flux (the scale flare classes are defined on), over all horizons
+    log_teacher = np.log10(np.maximum(preds["lstm"], kernel.eps))
+    log_truth = np.log10(np.maximum(y_true, kernel.eps))
+    for row in rows:
+        log_pred = np.log10(np.maximum(preds[row["model"]], kernel.eps))
+        row["mae_log10_vs_teacher"] = f"{np.mean(np.abs(log_pred - log_teacher)):.4f}"
+        row["mae_log10_vs_truth"] = f"{np.mean(np.abs(log_pred - log_truth)):.4f}"
+
+    print_table(rows, ["model", "params", "p50_ms", "p95_ms", "windows_per_s",
+                       "mae_log10_vs_teacher", "mae_log10_vs_truth"])
+    speedup = float(rows[0]["p50_ms"]) / max(float(rows[1]["p50_ms"]), 1e-9)
+    print(f"\nStudent single-window speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import requests
+
+from config import Config
+from features_pipeline.dataset_downloader import DatasetDownloader
+from features_pipeline.noaa_standin_server import NoaaStandInServer
+from benchmarks.noaa_payloads import write_payloads
+from benchmarks.measure import print_table
+
+
+def legacy_download(conf):
+    """The sequential bare requests.get + indent=4 rewrite used before."""
+    for url in conf.dataset_urls:
+        data = requests.get(url).json()
+        with open(os.path.join(conf.data_dir, url.split("/")[-1]), "w") as f:
+            json.dump(data, f, indent=4)
+
+
+def make_conf(base_url, data_dir):
+    conf = Config()
+    conf.data_dir = data_dir
+    conf.dataset_urls = [f"{base_url}/xrays-7-day.json", f"{base_url}/euvs-7-day.json"]
+    return conf
+
+
+def free_port():
+    probe = NoaaStandInServer(".")
+    port = probe.server.server_address[1]
+    probe.server.server_close()
+    return port
+
+
+def run_case(name, payload_dir, data_dir, action, **server_kwargs):
+    # Same port every case so validators keyed by URL stay valid
+    server = NoaaStandInServer(payload_dir, **server_kwargs).start()
+    conf = make_conf(server.base_url, data_dir)
+    try:
+        start = time.perf_counter()
+        try:
+            outcome = action(conf)
+        except Exception as e:
+            outcome = f"{type(e).__name__}"
+        elapsed = time.perf_counter() - start
+    finally:
+        server.stop()
+
+    stored = sum(os.path.getsize(os.path.join(data_dir, f)) for f in os.listdir(data_dir) if f.endswith(".json"))
+    return {
+        "case": name,
+        "seconds": f"{elapsed:.2f}",
+        "outcome": outcome if isinstance(outcome, str) else ",".join(sorted(set(outcome.values()))),
+        "stored_mb": f"{stored / 1e6:.1f}",
+        "server_status": " ".join(f"{k}x{v}" for k, v in sorted(server.status_counts.items())),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Downloader throughput and failure behaviour against a local NOAA stand-in.")
+    parser.add_argument("--days", type=int, default=7, help="Days of synthetic payload per feed")
+    parser.add_argument("--latency", type=float, default=0.3, help="Stand-in latency per request (s)")
+    args = parser.parse_args()
+
+    def new(conf):
+        return DatasetDownloader(conf, backoff=0.05).datasetDownload()
+
+    def legacy(conf):
+        legacy_download(conf)
+        return "ok"
+
+    port = free_port()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        payload_dir = write_payloads(os.path.join(tmp, "payloads"), n_days=args.days)
+        legacy_dir, new_dir = os.path.join(tmp, "legacy"), os.path.join(tmp, "new")
+        os.makedirs(legacy_dir)
+        os.makedirs(new_dir)
+
+        rows.append(run_case("legacy sequential", payload_dir, legacy_dir, legacy, latency=args.latency, port=port))
+        rows.append(run_case("concurrent cold", payload_dir, new_dir, new, latency=args.latency, port=port))
+        rows.append(run_case("concurrent unchanged (304)", payload_dir, new_dir, new, latency=args.latency, port=port))
+
+        # Force a full download again, then inject failures
+        os.remove(os.path.join(new_dir, DatasetDownloader.STATE_FILE))
+        rows.append(run_case("2 x 503 then ok", payload_dir, new_dir, new, latency=args.latency, port=port, fail_first=2))
+        rows.append(run_case("50% random 503", payload_dir, new_dir, new, latency=args.latency, port=port, fail_rate=0.5, seed=3))
+        rows.append(run_case("feed down (keeps old copy)", payload_dir, new_dir, new, latency=args.latency, port=port, fail_rate=1.0))
+
+    print_table(rows, ["case", "seconds", "outcome", "stored_mb", "server_status"])
+
+
+if __name__ == "__main__":
+    main()
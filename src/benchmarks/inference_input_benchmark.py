@@ -0,0 +1,72 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataset_store import DatasetStore, read_csv_tail
+from benchmarks.measure import print_table
+
+WINDOW = 180
+COLUMNS = [
+    "xray_0.05-0.4nm", "xray_0.1-0.8nm", "xray_is_missing", "x_ray_bg",
+    "euv_1175", "euv_1216", "euv_1335", "euv_1405", "euv_256", "euv_284",
+    "euv_304", "euv_mgii_index", "euv_is_missing",
+]
+
+
+def make_dataset(n_days):
+    """Synthetic 1-minute dataset with the production column layout."""
+    n_rows = n_days * 1440
+    rng = np.random.default_rng(0)
+    index = pd.date_range("2021-01-01", periods=n_rows, freq="1min", tz="UTC", name="time_tag")
+    return pd.DataFrame(rng.random((n_rows, len(COLUMNS))) * 1e-6, index=index, columns=COLUMNS)
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inference-input latency versus dataset history length.")
+    parser.add_argument("--days", type=int, nargs="+", default=[7, 90, 365, 1825],
+                        help="History lengths to test, in days (default: 1 week to 5 years)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-full-above", type=int, default=400,
+                        help="Skip the full read_csv baseline above this many days")
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_days in args.days:
+            df = make_dataset(n_days)
+            csv_path = os.path.join(tmp, f"ds_{n_days}.csv")
+            df.to_csv(csv_path)
+            store = DatasetStore(os.path.join(tmp, f"store_{n_days}"))
+            store.upsert(df)
+            del df
+
+            row = {"days": n_days, "rows": n_days * 1440}
+            if n_days <= args.skip_full_above:
+                row["full_csv_ms"] = f"{best_of(lambda: pd.read_csv(csv_path).iloc[-WINDOW:], args.repeat):.1f}"
+            else:
+                row["full_csv_ms"] = "-"
+            row["csv_tail_ms"] = f"{best_of(lambda: read_csv_tail(csv_path, WINDOW), args.repeat):.1f}"
+            row["store_tail_ms"] = f"{best_of(lambda: store._tail_from_partitions(WINDOW), args.repeat):.1f}"
+            row["sidecar_ms"] = f"{best_of(lambda: store.tail(WINDOW), args.repeat):.1f}"
+            rows.append(row)
+
+            os.remove(csv_path)
+
+    print_table(rows, ["days", "rows", "full_csv_ms", "csv_tail_ms", "store_tail_ms", "sidecar_ms"])
+
+
+if __name__ == "__main__":
+    main()
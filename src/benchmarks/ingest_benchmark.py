@@ -0,0 +1,131 @@
+import argparse
+import functools
+import json
+import os
+import tempfile
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from dataset_store import compact_dtypes
+from features_pipeline import noaa_json
+from features_pipeline.uv_preprocessor import UvPreprocessor
+from features_pipeline.xray_preprocessor import Xray_preprocessor
+from benchmarks.noaa_payloads import write_payloads
+from benchmarks.measure import run_isolated, print_table
+
+
+def legacy_xray(conf):
+    """Xray_preprocessor.preprocess_xray before the columnar ingest."""
+    with open(os.path.join(conf.data_dir, "xrays-7-day.json"), "r") as f:
+        raw_data = json.load(f)
+
+    df = pd.DataFrame(raw_data)
+    df = df.dropna(how="any", subset=["time_tag", "energy"])
+    df["time_tag"] = pd.to_datetime(df["time_tag"], utc=True)
+    df["energy"] = df["energy"].astype(str).str.strip()
+    df["energy"] = df["energy"].str.replace("–", "-", regex=False)
+    df["energy"] = df["energy"].str.replace(" ", "", regex=False)
+    df = df.pivot_table(index="time_tag", columns="energy", values="observed_flux")
+    df = df.replace(0, pd.NA)
+    df = df.resample("1min").asfreq()
+    df["is_missing"] = df.isna().any(axis=1).astype(int)
+    pd.set_option('future.no_silent_downcasting', False)
+    df = df.ffill().bfill().infer_objects(copy=False)
+    df.columns = [f"xray_{col}" for col in df.columns]
+    return df
+
+
+def legacy_uv(conf):
+    """UvPreprocessor.preprocess_uv before the columnar ingest."""
+    with open(os.path.join(conf.data_dir, "euvs-7-day.json"), "r") as f:
+        raw_data = json.load(f)
+
+    df = pd.DataFrame(raw_data)
+    df["time_tag"] = pd.to_datetime(df["time_tag"], utc=True)
+    flags_df = df["flags"].apply(pd.Series)
+    df = pd.concat([df.drop(columns=["flags"]), flags_df], axis=1)
+    mask = (df["eclipse"] | df["lunar_transit"] | df["geocorona"])
+    df.loc[mask, "value"] = np.nan
+    df = df.pivot_table(index="time_tag", columns="line", values="value")
+    df.columns = [f"euv_{col}" for col in df.columns]
+    df["euv_is_missing"] = df.isna().all(axis=1).astype(int)
+    pd.set_option('future.no_silent_downcasting', False)
+    df = df.ffill().bfill().infer_objects(copy=False)
+    df.index = pd.to_datetime(df.index, utc=True)
+    return df
+
+
+def columnar_xray(conf):
+    return Xray_preprocessor(conf).preprocess_xray()
+
+
+def columnar_uv(conf):
+    return UvPreprocessor(conf).preprocess_uv()
+
+
+def stdlib_xray(conf):
+    noaa_json.orjson = None
+    return columnar_xray(conf)
+
+
+def stdlib_uv(conf):
+    noaa_json.orjson = None
+    return columnar_uv(conf)
+
+
+METHODS = {
+    "xray": [("legacy", legacy_xray), ("columnar", columnar_xray), ("columnar_stdlib_json", stdlib_xray)],
+    "euv": [("legacy", legacy_uv), ("columnar", columnar_uv), ("columnar_stdlib_json", stdlib_uv)],
+}
+
+
+def make_conf(data_dir):
+    return (SimpleNamespace(data_dir=data_dir),)
+
+
+def run_work(work, conf):
+    # The frame is sent back so the parent can compare methods
+    return work(conf)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the legacy and columnar NOAA JSON ingest.")
+    parser.add_argument("--days", type=int, nargs="+", default=[7, 90],
+                        help="Payload lengths in days (default: 7 and 90)")
+    args = parser.parse_args()
+
+    rows = []
+    for n_days in args.days:
+        with tempfile.TemporaryDirectory() as payload_dir:
+            write_payloads(payload_dir, n_days)
+            size_mb = sum(os.path.getsize(os.path.join(payload_dir, f)) for f in os.listdir(payload_dir)) / 2**20
+
+            setup = functools.partial(make_conf, payload_dir)
+            for feed, methods in METHODS.items():
+                frames = {}
+                for name, work in methods:
+                    stats = run_isolated(setup, functools.partial(run_work, work))
+                    row = {"days": n_days, "payload_mb": f"{size_mb:.1f}", "feed": feed, "method": name}
+                    if "error" in stats:
+                        row.update(seconds=f"failed ({stats['error']})", delta_rss_mb="-")
+                    else:
+                        frames[name] = stats["result"]
+                        row.update(
+                            seconds=f"{stats['seconds']:.3f}",
+                            delta_rss_mb=f"{stats['peak_rss_delta_mb']:.1f}",
+                        )
+                    rows.append(row)
+
+                # The columnar path must produce exactly the same frames (in the stored float32/int8 dtypes)
+                if "legacy" in frames:
+                    expected = compact_dtypes(frames["legacy"])
+                    for name, df in frames.items():
+                        pd.testing.assert_frame_equal(compact_dtypes(df), expected)
+
+    print_table(rows, ["days", "payload_mb", "feed", "method", "seconds", "delta_rss_mb"])
+
+
+if __name__ == "__main__":
+    main()
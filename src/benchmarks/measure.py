@@ -0,0 +1,57 @@
+import multiprocessing as mp
+import queue as queue_mod
+import resource
+import time
+
+
+def _peak_rss_mb():
+    # ru_maxrss is reported in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _child(setup, work, queue):
+    args = setup()
+    rss_before = _peak_rss_mb()
+
+    start = time.perf_counter()
+    result = work(*args)
+    elapsed = time.perf_counter() - start
+
+    queue.put({
+        "seconds": elapsed,
+        "peak_rss_mb": _peak_rss_mb(),
+        "peak_rss_delta_mb": _peak_rss_mb() - rss_before,
+        "result": result,
+    })
+
+
+def run_isolated(setup, work):
+    """
+    Run work(*setup()) in a fresh process and return its wall time and peak RSS.
+    setup and work must be module-level functions so they can be pickled.
+    If the process dies (e.g. killed for running out of memory) the returned
+    dict only holds an "error" entry.
+    """
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(setup, work, queue))
+    proc.start()
+
+    while True:
+        try:
+            stats = queue.get(timeout=1)
+            break
+        except queue_mod.Empty:
+            if not proc.is_alive():
+                return {"error": f"exit code {proc.exitcode}"}
+
+    proc.join()
+    return stats
+
+
+def print_table(rows, columns):
+    """Print a list of dicts as an aligned text table."""
+    widths = [max(len(c), *(len(f"{r[c]}") for r in rows)) for c in columns]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for r in rows:
+        print("  ".join(f"{r[c]}".ljust(w) for c, w in zip(columns, widths)))
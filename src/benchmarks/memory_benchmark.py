@@ -0,0 +1,110 @@
+import argparse
+import functools
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+
+from dataset_store import DatasetStore, compact_dtypes
+from scaling_kernel import ScalingKernel
+from training_pipeline.train_set_creator import TrainSetCreator
+from training_pipeline.training_scaler import TrainingScaler
+from benchmarks.inference_input_benchmark import COLUMNS
+from benchmarks.measure import run_isolated, print_table
+
+
+def make_dataset(n_days):
+    """Synthetic 1-minute dataset with the production column layout, in float64 / int64."""
+    n_rows = n_days * 1440
+    rng = np.random.default_rng(0)
+    index = pd.date_range("2025-01-01", periods=n_rows, freq="1min", tz="UTC", name="time_tag")
+    df = pd.DataFrame(rng.random((n_rows, len(COLUMNS))) * 1e-6, index=index, columns=COLUMNS)
+    for flag in ("xray_is_missing", "euv_is_missing"):
+        df[flag] = (rng.random(n_rows) < 0.01).astype(np.int64)
+    return df
+
+
+def write_store(store_dir, df):
+    """Write day partitions as given, without the store's dtype compaction."""
+    store = DatasetStore(store_dir)
+    os.makedirs(store_dir, exist_ok=True)
+    for day, part in df.groupby(df.index.strftime("%Y-%m-%d")):
+        store._write_partition(store.partition_path(day), part)
+
+
+def dir_mb(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 2**20
+
+
+def legacy_input(store_dir):
+    """Training input before the float32 diet: float64 frame, float64 sanitize copies."""
+    df = DatasetStore(store_dir).read()
+    feature_cols = [c for c in df.columns if c not in TrainSetCreator.DROP_COLS]
+    X = df[feature_cols].values.astype(np.float32)
+    y = df[TrainSetCreator.TARGET_COL].values.astype(np.float32)
+    del df
+
+    x_scaler = MinMaxScaler()
+    x_scaler.fit(np.nan_to_num(np.asarray(X, dtype=np.float64), nan=0.0, posinf=1e10, neginf=-1e10))
+    y_proc = np.nan_to_num(np.asarray(y, dtype=np.float64), nan=0.0, posinf=1e10, neginf=-1e10)
+    y_proc = np.log10(np.where(y_proc <= 0, 1e-10, y_proc)).reshape(-1, 1)
+    y_scaler = MinMaxScaler().fit(y_proc)
+
+    kernel = ScalingKernel.from_sklearn(x_scaler, y_scaler)
+    X_scaled = kernel.transform_features(X)
+    y_scaled = kernel.encode_targets(y)
+    return float(X_scaled[-1].sum() + y_scaled[-1].sum())
+
+
+def compact_input(store_dir):
+    """Current training input: float32 store, direct float32 extraction, buffered sanitize."""
+    tr_dataset_cr = TrainSetCreator(store_dir=store_dir)
+    X, y = tr_dataset_cr.load_base_arrays()
+
+    training_scaler = TrainingScaler()
+    training_scaler.fit_rows(X, y)
+    X_scaled, y_scaled = training_scaler.scale_rows(X, y)
+    return float(X_scaled[-1].sum() + y_scaled[-1].sum())
+
+
+def make_args(store_dir):
+    return (store_dir,)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak RSS of the training input path, float64 vs float32.")
+    parser.add_argument("--days", type=int, default=365, help="Days of 1-minute history (default: 1 year)")
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = {
+            "float64": (os.path.join(tmp, "float64"), legacy_input),
+            "float32": (os.path.join(tmp, "float32"), compact_input),
+        }
+        df = make_dataset(args.days)
+        write_store(stores["float64"][0], df)
+        write_store(stores["float32"][0], compact_dtypes(df))
+        del df
+
+        for name, (store_dir, work) in stores.items():
+            stats = run_isolated(functools.partial(make_args, store_dir), work)
+            rows.append({
+                "days": args.days,
+                "rows": args.days * 1440,
+                "dtype": name,
+                "store_mb": f"{dir_mb(store_dir):.1f}",
+                "seconds": f"{stats['seconds']:.3f}",
+                "peak_rss_mb": f"{stats['peak_rss_mb']:.1f}",
+                "delta_rss_mb": f"{stats['peak_rss_delta_mb']:.1f}",
+            })
+
+    reduction = 1 - float(rows[1]["delta_rss_mb"]) / max(float(rows[0]["delta_rss_mb"]), 1e-9)
+    print_table(rows, ["days", "rows", "dtype", "store_mb", "seconds", "peak_rss_mb", "delta_rss_mb"])
+    print(f"\nPeak-RSS growth reduction: {reduction:.0%}")
+
+
+if __name__ == "__main__":
+    main()
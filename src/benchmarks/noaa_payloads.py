@@ -0,0 +1,72 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+XRAY_ENERGIES = ["0.05-0.4nm", "0.1-0.8nm"]
+EUV_LINES = ["1175", "1216", "1335", "1405", "256", "284", "304", "mgii_index"]
+
+
+def _minutes(n_days, end="2026-03-09 00:00"):
+    return pd.date_range(end=pd.Timestamp(end, tz="UTC"), periods=n_days * 1440, freq="1min")
+
+
+def _tags(index):
+    return index.strftime("%Y-%m-%dT%H:%M:%SZ").tolist()
+
+
+def make_xray_payload(n_days, seed=0):
+    """Synthetic xrays-N-day.json records in the NOAA schema."""
+    rng = np.random.default_rng(seed)
+    index = _minutes(n_days)
+
+    # ~0.5% missing minutes and a few zero readings, like the live feed
+    keep = rng.random(len(index)) > 0.005
+    tags = _tags(index[keep])
+
+    records = []
+    for energy, base in zip(XRAY_ENERGIES, [3e-8, 7e-7]):
+        flux = base * np.exp(rng.normal(0, 0.3, len(tags)))
+        flux[rng.random(len(tags)) < 0.001] = 0.0
+        for tag, value in zip(tags, flux.tolist()):
+            records.append({
+                "time_tag": tag,
+                "satellite": 19,
+                "flux": value,
+                "observed_flux": value,
+                "electron_correction": 0.0,
+                "electron_contaminaton": False,
+                "energy": energy,
+            })
+    return records
+
+
+def make_euv_payload(n_days, seed=1):
+    """Synthetic euvs-N-day.json records in the NOAA schema."""
+    rng = np.random.default_rng(seed)
+    tags = _tags(_minutes(n_days))
+
+    records = []
+    for line in EUV_LINES:
+        values = (1e-4 if line != "mgii_index" else 0.27) * np.exp(rng.normal(0, 0.05, len(tags)))
+        eclipse = rng.random(len(tags)) < 0.002
+        for tag, value, ecl in zip(tags, values.tolist(), eclipse.tolist()):
+            records.append({
+                "time_tag": tag,
+                "satellite": 19,
+                "line": line,
+                "value": value,
+                "flags": {"eclipse": ecl, "lunar_transit": False, "geocorona": False},
+            })
+    return records
+
+
+def write_payloads(payload_dir, n_days=7):
+    """Write xrays-7-day.json and euvs-7-day.json (names match the live feeds)."""
+    os.makedirs(payload_dir, exist_ok=True)
+    for name, records in [("xrays-7-day.json", make_xray_payload(n_days)),
+                          ("euvs-7-day.json", make_euv_payload(n_days))]:
+        with open(os.path.join(payload_dir, name), "w") as f:
+            json.dump(records, f, separators=(",", ":"))
+    return payload_dir
@@ -0,0 +1,72 @@
+import argparse
+import functools
+
+import numpy as np
+
+from training_pipeline.window_engine import WindowEngine
+from benchmarks.measure import run_isolated, print_table
+
+WINDOW = 180
+HORIZON = 90
+N_FEATURES = 12
+
+
+def make_base(n_rows):
+    """Synthetic (rows, n_features) matrix and target column."""
+    rng = np.random.default_rng(0)
+    X = rng.random((n_rows, N_FEATURES), dtype=np.float32)
+    return X, X[:, 0].copy()
+
+
+def legacy_loop(X, y):
+    """The list-append loop TrainSetCreator used before the window engine."""
+    xs, ys = [], []
+    for i in range(len(X) - WINDOW - HORIZON):
+        xs.append(X[i : i + WINDOW])
+        ys.append(np.array(y[i + WINDOW + HORIZON]))
+    x_arr, y_arr = np.array(xs), np.array(ys)
+    return float(x_arr[-1].sum() + y_arr.sum())
+
+
+def strided_views(X, y):
+    x_view, y_view = WindowEngine(WINDOW, HORIZON).build(X, y)
+    return float(x_view[-1].sum() + y_view.sum())
+
+
+def chunked(X, y, batch_size=4096):
+    total = 0.0
+    for x_b, y_b in WindowEngine(WINDOW, HORIZON).iter_batches(X, y, batch_size):
+        total += float(y_b.sum())
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare window building strategies.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_080, 40_320],
+                        help="Number of 1-minute rows (default: 1 and 4 weeks)")
+    parser.add_argument("--skip-legacy-above", type=int, default=100_000,
+                        help="Do not run the legacy loop above this many rows")
+    args = parser.parse_args()
+
+    rows = []
+    for n_rows in args.rows:
+        setup = functools.partial(make_base, n_rows)
+        methods = [("strided", strided_views), ("chunked", chunked)]
+        if n_rows <= args.skip_legacy_above:
+            methods.insert(0, ("legacy_loop", legacy_loop))
+
+        for name, work in methods:
+            stats = run_isolated(setup, work)
+            rows.append({
+                "rows": n_rows,
+                "method": name,
+                "seconds": f"{stats['seconds']:.3f}",
+                "peak_rss_mb": f"{stats['peak_rss_mb']:.1f}",
+                "delta_rss_mb": f"{stats['peak_rss_delta_mb']:.1f}",
+            })
+
+    print_table(rows, ["rows", "method", "seconds", "peak_rss_mb", "delta_rss_mb"])
+
+
+if __name__ == "__main__":
+    main()
@@ -20,13 +20,66 @@ class Config:
         # Full model path
         self.model_path = os.path.join(self.model_dir, "sfp_lstm.keras")
 
+        # Distilled lightweight student model and its validation metrics
+        self.student_model_path = os.path.join(self.model_dir, "sfp_student.keras")
+        self.student_metrics_path = os.path.join(self.model_dir, "sfp_student_metrics.json")
+
+        # Forecast horizon (minutes) of each model output
+        self.horizons_path = os.path.join(self.model_dir, "sfp_horizons.json")
+
         self.train_png = os.path.join(self.model_dir, "train.png")
 
-        # Full dataset path
+        # Periodic checkpoints of an interrupted training run
+        self.resume_dir = os.path.join(self.model_dir, "resume")
+
+        # Training throughput/resource report (JSON lines) and its plot
+        self.train_report = os.path.join(self.model_dir, "train_report.jsonl")
+        self.train_report_png = os.path.join(self.model_dir, "train_report.png")
+
+        # Base rows the saved model was trained on (incremental fine-tuning watermark)
+        self.training_state_path = os.path.join(self.model_dir, "training_state.json")
+
+        # Memory-mapped cache of the base feature matrix used for windowing
+        self.window_cache_dir = os.path.join(self.model_dir, "window_cache")
+
+        # Walk-forward cross-validation results and fold models
+        self.cv_dir = os.path.join(self.model_dir, "walk_forward")
+
+        # Hyperparameter / window-horizon sweep trials and the best trial's artifacts
+        self.sweep_dir = os.path.join(self.model_dir, "sweep")
+
+        # Full dataset path (legacy CSV)
         self.dataset_path = os.path.join(self.data_dir, self.dataset_name)
 
-        # NOAA dataset URLs
+        # Day-partitioned Parquet dataset store
+        self.store_dir = os.path.join(self.data_dir, "sfp_store")
+
+        # Data-quality report and its per-partition scan state
+        self.quality_report_path = os.path.join(self.data_dir, "quality_report.json")
+        self.quality_state_path = os.path.join(self.data_dir, "quality_state.json")
+
+        # Content-addressed cache of preprocessor outputs (LRU-bounded)
+        self.stage_cache_dir = os.path.join(self.data_dir, "stage_cache")
+        self.stage_cache_max_mb = 256
+
+        # Model served by inference: "lstm" (the trained model) or "student" (the distilled one)
+        self.inference_model = os.environ.get("SFP_INFERENCE_MODEL", "lstm")
+
+        # Local inference service
+        self.inference_host = os.environ.get("SFP_INFERENCE_HOST", "127.0.0.1")
+        self.inference_port = int(os.environ.get("SFP_INFERENCE_PORT", "8765"))
+        self.inference_url = f"http://{self.inference_host}:{self.inference_port}"
+
+        # NOAA dataset URLs (SFP_NOAA_BASE_URL points them at a local stand-in server)
+        noaa_base_url = os.environ.get("SFP_NOAA_BASE_URL", "https://services.swpc.noaa.gov/json/goes/primary")
         self.dataset_urls = [
-            "https://services.swpc.noaa.gov/json/goes/primary/xrays-7-day.json",
-            "https://services.swpc.noaa.gov/json/goes/primary/euvs-7-day.json",
+            f"{noaa_base_url}/xrays-7-day.json",
+            f"{noaa_base_url}/euvs-7-day.json",
         ]
+
+    def inference_model_path(self, model=None):
+        """Path of the model to serve: "lstm" or "student" (default: inference_model)."""
+        model = model or self.inference_model
+        if model not in ("lstm", "student"):
+            raise ValueError(f"Unknown inference model '{model}', expected 'lstm' or 'student'")
+        return self.student_model_path if model == "student" else self.model_path
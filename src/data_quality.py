@@ -0,0 +1,272 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+
+from dataset_store import DatasetStore, read_dataset
+
+
+MINUTE_NS = 60 * 10**9
+MISSING_FLAGS = ("xray_is_missing", "euv_is_missing")
+
+
+def value_range(column):
+    """Return the plausible (low, high) range of a dataset column; None means unbounded."""
+    if column.endswith("_is_missing"):
+        return 0, 1
+    if column.startswith("xray_") or column == "x_ray_bg":
+        # Solar X-ray flux in W/m^2: always positive, X100 would be 1e-2
+        return 1e-12, 1e-2
+    if column.startswith("euv_"):
+        return 0, None
+    return None, None
+
+
+def _intervals(mask):
+    """(start, end) row positions (inclusive) of the runs of True in a boolean array."""
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+    return starts, ends
+
+
+def scan_frame(df):
+    """
+    Quality statistics of a frame with a 'time_tag' column, in one vectorized pass.
+    Times are kept as epoch minutes so statistics of consecutive frames
+    (e.g. day partitions) can be merged without rescanning.
+    """
+    times = pd.to_datetime(df[DatasetStore.INDEX_COL], utc=True)
+    epoch_minutes = ((times - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(minutes=1)).to_numpy(dtype=np.int64)
+    order = np.argsort(epoch_minutes, kind="stable")
+    minutes = epoch_minutes[order]
+
+    if len(minutes) == 0:
+        return None
+
+    # Missing-minute intervals between consecutive distinct minutes
+    unique = np.unique(minutes)
+    steps = np.diff(unique)
+    holes = np.flatnonzero(steps > 1)
+    gaps = np.stack([unique[holes] + 1, unique[holes + 1] - 1], axis=1).tolist()
+
+    # Rows and distinct minutes per UTC day
+    day_codes = unique // 1440
+    day_ids, day_minutes = np.unique(day_codes, return_counts=True)
+    day_rows = np.bincount(np.searchsorted(day_ids, minutes // 1440), minlength=len(day_ids))
+    days = {
+        pd.Timestamp(int(d) * 1440 * MINUTE_NS, tz="UTC").strftime("%Y-%m-%d"): [int(r), int(m)]
+        for d, r, m in zip(day_ids, day_rows, day_minutes)
+    }
+
+    # Filled stretches: runs of consecutive rows flagged as missing
+    fill_runs = {}
+    for flag in MISSING_FLAGS:
+        if flag in df.columns:
+            mask = df[flag].to_numpy()[order] == 1
+            starts, ends = _intervals(mask)
+            fill_runs[flag] = np.stack([minutes[starts], minutes[ends], ends - starts + 1], axis=1).tolist()
+
+    columns = {}
+    for col in df.columns:
+        if col == DatasetStore.INDEX_COL:
+            continue
+        values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        low, high = value_range(col)
+        bad = np.zeros(len(values), dtype=bool)
+        if low is not None:
+            bad |= values < low
+        if high is not None:
+            bad |= values > high
+        columns[col] = {
+            "nan": int(np.isnan(values).sum()),
+            "zero": int((values == 0).sum()),
+            "out_of_range": int(bad.sum()),
+        }
+
+    return {
+        "rows": int(len(minutes)),
+        "first": int(minutes[0]),
+        "last": int(minutes[-1]),
+        "duplicates": int(len(minutes) - len(unique)),
+        "days": days,
+        "gaps": gaps,
+        "fill_runs": fill_runs,
+        "columns": columns,
+    }
+
+
+def merge_stats(parts):
+    """Combine scan_frame statistics of frames that follow each other in time."""
+    parts = sorted((p for p in parts if p is not None), key=lambda p: p["first"])
+    if not parts:
+        return None
+
+    merged = {
+        "rows": 0, "first": parts[0]["first"], "last": parts[0]["last"], "duplicates": 0,
+        "days": {}, "gaps": [], "fill_runs": {}, "columns": {},
+    }
+    prev = None
+    for part in parts:
+        merged["rows"] += part["rows"]
+        merged["duplicates"] += part["duplicates"]
+        merged["last"] = max(merged["last"], part["last"])
+
+        for day, (rows, minutes) in part["days"].items():
+            old = merged["days"].get(day, [0, 0])
+            merged["days"][day] = [old[0] + rows, old[1] + minutes]
+
+        # Missing minutes between the previous frame and this one
+        if prev is not None and part["first"] > prev["last"] + 1:
+            merged["gaps"].append([prev["last"] + 1, part["first"] - 1])
+        merged["gaps"].extend(part["gaps"])
+
+        for flag, runs in part["fill_runs"].items():
+            target = merged["fill_runs"].setdefault(flag, [])
+            runs = [list(r) for r in runs]
+            # A run reaching the end of the previous frame continues into one
+            # starting at the first row of this frame
+            if target and runs and prev is not None \
+                    and target[-1][1] == prev["last"] and runs[0][0] == part["first"]:
+                target[-1][1] = runs[0][1]
+                target[-1][2] += runs[0][2]
+                runs = runs[1:]
+            target.extend(runs)
+
+        for col, counts in part["columns"].items():
+            total = merged["columns"].setdefault(col, {"nan": 0, "zero": 0, "out_of_range": 0})
+            for key, value in counts.items():
+                total[key] += value
+
+        prev = part
+
+    return merged
+
+
+def _iso(minute):
+    return pd.Timestamp(int(minute) * MINUTE_NS, tz="UTC").isoformat()
+
+
+def build_report(stats, source):
+    """Turn merged statistics into the JSON-serializable quality report."""
+    if stats is None:
+        return {"source": source, "rows": 0}
+
+    first, last = stats["first"], stats["last"]
+    expected = last - first + 1
+    distinct = sum(m for _, m in stats["days"].values())
+
+    gaps = stats["gaps"]
+    gap_minutes = [e - s + 1 for s, e in gaps]
+
+    days = []
+    for day, (rows, minutes) in sorted(stats["days"].items()):
+        day_start = int(pd.Timestamp(day, tz="UTC").value // MINUTE_NS)
+        day_expected = min(day_start + 1439, last) - max(day_start, first) + 1
+        days.append({"day": day, "rows": rows, "completeness": round(minutes / day_expected, 6)})
+
+    fill_runs = {}
+    for flag, runs in stats["fill_runs"].items():
+        lengths = [r[2] for r in runs]
+        fill_runs[flag] = {
+            "count": len(runs),
+            "filled_rows": int(sum(lengths)),
+            "longest_rows": int(max(lengths, default=0)),
+            "runs": [{"start": _iso(s), "end": _iso(e), "rows": n} for s, e, n in runs],
+        }
+
+    return {
+        "source": source,
+        "generated_at": pd.Timestamp.now(tz="UTC").isoformat(),
+        "rows": stats["rows"],
+        "start": _iso(first),
+        "end": _iso(last),
+        "expected_minutes": int(expected),
+        "completeness": round(distinct / expected, 6),
+        "duplicate_timestamps": stats["duplicates"],
+        "gaps": {
+            "count": len(gaps),
+            "missing_minutes": int(sum(gap_minutes)),
+            "longest_minutes": int(max(gap_minutes, default=0)),
+            "intervals": [{"start": _iso(s), "end": _iso(e), "minutes": n} for (s, e), n in zip(gaps, gap_minutes)],
+        },
+        "fill_runs": fill_runs,
+        "days": days,
+        "columns": stats["columns"],
+    }
+
+
+class DataQualityEngine:
+    """
+    Data-quality report of the unified dataset: missing-minute gaps, ffill/bfill
+    runs from the missingness flags, per-day completeness, duplicate
+    timestamps and value-range violations.
+
+    With a DatasetStore, statistics are computed per day partition and kept
+    in a JSON state file keyed by each partition's size and mtime, so later
+    runs only scan partitions that are new or were rewritten. The legacy CSV
+    is scanned in a single pass.
+    """
+
+    STATE_VERSION = 1
+
+    def __init__(self, store_dir, csv_path, state_path):
+        """Initialize dataset locations and the per-partition state file."""
+        self.store_dir = store_dir
+        self.csv_path = csv_path
+        self.state_path = state_path
+
+    def run(self, start=None, end=None, full=False):
+        """Return the quality report; a start/end range is always scanned directly."""
+        store = DatasetStore(self.store_dir) if self.store_dir is not None else None
+
+        if start is not None or end is not None or store is None or not store.exists():
+            df = read_dataset(self.store_dir, self.csv_path, start=start, end=end)
+            return build_report(scan_frame(df), "range" if start or end else "csv")
+
+        return build_report(self._scan_store(store, full), "store")
+
+    def _scan_store(self, store, full):
+        state = {} if full else self._load_state()
+        partitions = {}
+        scanned = 0
+
+        for day in store.partitions():
+            stat = os.stat(store.partition_path(day))
+            cached = state.get(day)
+            if cached is not None and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+                partitions[day] = cached
+                continue
+
+            df = pd.read_parquet(store.partition_path(day))
+            partitions[day] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "stats": scan_frame(df)}
+            scanned += 1
+
+        print(f"Data quality: scanned {scanned} of {len(partitions)} partition(s)")
+        self._save_state(partitions)
+
+        return merge_stats(p["stats"] for p in partitions.values())
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, "r") as f:
+            state = json.load(f)
+        if state.get("version") != self.STATE_VERSION:
+            return {}
+        return state["partitions"]
+
+    def _save_state(self, partitions):
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": self.STATE_VERSION, "partitions": partitions}, f)
+        os.replace(tmp_path, self.state_path)
+
+
+def write_report(report, path):
+    """Write the report as indented JSON, atomically."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, path)
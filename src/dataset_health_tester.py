@@ -1,25 +1,40 @@
-from config import Config
+import argparse
 import os
-import pandas as pd
+from config import Config
+from data_quality import DataQualityEngine, write_report
 
 conf = Config()
 
-dataset_path = os.path.join(conf.data_dir, conf.dataset_name)
+parser = argparse.ArgumentParser(description="Report data-quality statistics of the dataset.")
+parser.add_argument("--start", default=None, help="First time_tag to include (e.g. 2026-03-01)")
+parser.add_argument("--end", default=None, help="Last time_tag to include")
+parser.add_argument("--output", default=conf.quality_report_path, help="Path of the JSON report")
+parser.add_argument("--full", action="store_true", help="Rescan every partition instead of only new ones")
+args = parser.parse_args()
+
+engine = DataQualityEngine(conf.store_dir, conf.dataset_path, conf.quality_state_path)
+report = engine.run(start=args.start, end=args.end, full=args.full)
 
-df = pd.read_csv(dataset_path, parse_dates=["time_tag"])
+os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+write_report(report, args.output)
 
-# Drop missingness flags
-df = df.drop(columns=["xray_is_missing", "euv_is_missing"])
+if report["rows"] == 0:
+    print("Dataset is empty")
+else:
+    # Summary; the full breakdown is in the JSON report
+    print(f"Rows: {report['rows']} ({report['start']} .. {report['end']})")
+    print(f"Completeness: {report['completeness']:.2%} of {report['expected_minutes']} minutes")
+    print(f"Duplicate time_tag entries: {report['duplicate_timestamps']}")
+    print(f"Missing-minute gaps: {report['gaps']['count']} "
+          f"({report['gaps']['missing_minutes']} minutes, longest {report['gaps']['longest_minutes']})")
+    for flag, runs in report["fill_runs"].items():
+        print(f"{flag}: {runs['count']} filled runs, {runs['filled_rows']} rows, longest {runs['longest_rows']}")
 
-# Basic info
-print(df.shape)
-print(df.isna().sum())
+    incomplete = [d for d in report["days"] if d["completeness"] < 1]
+    print(f"Incomplete days: {len(incomplete)} of {len(report['days'])}")
 
-# Count zero values per column
-zero_counts = (df == 0).sum()
-print("\nZero-value counts per column:")
-print(zero_counts)
+    print("\nPer-column NaN / zero / out-of-range counts:")
+    for col, counts in report["columns"].items():
+        print(f"  {col:<24} {counts['nan']:>8} {counts['zero']:>8} {counts['out_of_range']:>8}")
 
-# Duplicate timestamps
-duplicate_dates = df[df["time_tag"].duplicated(keep=False)]
-print(f"\nNumber of duplicated time_tag entries: {duplicate_dates.shape[0]}")
+print(f"\nReport written to {args.output}")
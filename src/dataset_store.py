@@ -0,0 +1,252 @@
+import glob
+import io
+import os
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+
+def _utc(ts):
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize("UTC") if ts.tz is None else ts.tz_convert("UTC")
+
+
+def compact_dtypes(df):
+    """Downcast dataset columns in place of a copy: floats to float32, missingness flags to int8."""
+    casts = {}
+    for col, dtype in df.dtypes.items():
+        if str(col).endswith("_is_missing"):
+            if dtype != np.int8:
+                casts[col] = np.int8
+        elif pd.api.types.is_float_dtype(dtype) and dtype != np.float32:
+            casts[col] = np.float32
+    return df.astype(casts, copy=False) if casts else df
+
+
+class DatasetStore:
+    """
+    Day-partitioned Parquet store of the unified 1-minute dataset.
+
+    Each UTC day lives in its own '<YYYY-MM-DD>.parquet' file holding a
+    sorted 'time_tag' column plus the feature columns, stored as float32
+    (missingness flags as int8). Upserts only rewrite
+    the days they touch, through a temporary file and an atomic rename, so
+    a crash never leaves a half-written partition behind.
+
+    A small '_latest_window.parquet' sidecar with the newest LATEST_ROWS rows
+    is rewritten after every upsert, so tail reads do not depend on how many
+    days the store holds.
+    """
+
+    INDEX_COL = "time_tag"
+    SUFFIX = ".parquet"
+    PARTITION_GLOB = "????-??-??.parquet"
+    LATEST_NAME = "_latest_window.parquet"
+    LATEST_ROWS = 1440
+
+    def __init__(self, root_dir):
+        """Initialize store location."""
+        self.root_dir = root_dir
+
+    def exists(self):
+        """Return True if the store holds at least one partition."""
+        return len(self.partitions()) > 0
+
+    # ---------------------------------------------------------
+    # Partitions
+    # ---------------------------------------------------------
+    def partitions(self):
+        """Return partition day strings ('YYYY-MM-DD'), sorted."""
+        files = glob.glob(os.path.join(self.root_dir, self.PARTITION_GLOB))
+        return sorted(os.path.basename(f)[: -len(self.SUFFIX)] for f in files)
+
+    def partition_path(self, day):
+        """Return the file path of a partition day string."""
+        return os.path.join(self.root_dir, f"{day}{self.SUFFIX}")
+
+    def _days_in_range(self, start=None, end=None):
+        days = self.partitions()
+        if start is not None:
+            first = pd.Timestamp(start).strftime("%Y-%m-%d")
+            days = [d for d in days if d >= first]
+        if end is not None:
+            last = pd.Timestamp(end).strftime("%Y-%m-%d")
+            days = [d for d in days if d <= last]
+        return days
+
+    # ---------------------------------------------------------
+    # Write path
+    # ---------------------------------------------------------
+    def upsert(self, new_data):
+        """
+        Insert or replace rows of a time_tag-indexed frame.
+        Only the day partitions covered by new_data are rewritten.
+        """
+        os.makedirs(self.root_dir, exist_ok=True)
+
+        new_data = new_data.copy()
+        new_data.index = pd.to_datetime(new_data.index, utc=True)
+        new_data.index.name = self.INDEX_COL
+
+        # Drop the sidecar first so a crash mid-upsert cannot leave it stale
+        latest_path = os.path.join(self.root_dir, self.LATEST_NAME)
+        if os.path.exists(latest_path):
+            os.remove(latest_path)
+
+        touched = []
+        for day, part in new_data.groupby(new_data.index.strftime("%Y-%m-%d")):
+            path = self.partition_path(day)
+
+            # The last of duplicate timestamps wins, within new_data as against the stored rows
+            part = part[~part.index.duplicated(keep="last")]
+            if os.path.isfile(path):
+                old = pd.read_parquet(path).set_index(self.INDEX_COL)
+                part = pd.concat([old[~old.index.isin(part.index)], part])
+
+            part = compact_dtypes(part.sort_index())
+            self._write_partition(path, part)
+            touched.append(day)
+
+        self._write_partition(latest_path, self._tail_from_partitions(self.LATEST_ROWS).set_index(self.INDEX_COL))
+
+        print(f"Dataset store updated: {len(touched)} partition(s) rewritten")
+        return touched
+
+    def _write_partition(self, path, df):
+        # Write next to the target, then atomically swap it in
+        tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+        df.reset_index().to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def import_csv(self, csv_path):
+        """Populate the store from a legacy CSV dataset."""
+        print(f"Importing {csv_path} into dataset store")
+        df = pd.read_csv(csv_path, index_col=self.INDEX_COL, parse_dates=[self.INDEX_COL])
+        return self.upsert(df)
+
+    # ---------------------------------------------------------
+    # Read path
+    # ---------------------------------------------------------
+    def read(self, start=None, end=None, columns=None, days=None):
+        """
+        Read rows with start <= time_tag <= end.
+        Partitions outside the range are never opened and the time filter is
+        pushed down to the Parquet row-group statistics.
+        """
+        start = _utc(start) if start is not None else None
+        end = _utc(end) if end is not None else None
+
+        if days is None:
+            days = self._days_in_range(start, end)
+        if not days:
+            return pd.DataFrame(columns=[self.INDEX_COL] + list(columns or []))
+
+        dataset = ds.dataset([self.partition_path(d) for d in days], format="parquet")
+
+        expr = None
+        if start is not None:
+            expr = ds.field(self.INDEX_COL) >= start
+        if end is not None:
+            end_expr = ds.field(self.INDEX_COL) <= end
+            expr = end_expr if expr is None else expr & end_expr
+
+        if columns is not None:
+            columns = [self.INDEX_COL] + [c for c in columns if c != self.INDEX_COL]
+
+        table = dataset.to_table(columns=columns, filter=expr)
+        return table.to_pandas()
+
+    def tail(self, n_rows, columns=None):
+        """Read the last n_rows rows from the sidecar, or from the newest partitions."""
+        latest_path = os.path.join(self.root_dir, self.LATEST_NAME)
+        if n_rows <= self.LATEST_ROWS and os.path.isfile(latest_path):
+            if columns is not None:
+                columns = [self.INDEX_COL] + [c for c in columns if c != self.INDEX_COL]
+            df = pd.read_parquet(latest_path, columns=columns)
+            return df.iloc[-n_rows:].reset_index(drop=True)
+
+        return self._tail_from_partitions(n_rows, columns)
+
+    def _tail_from_partitions(self, n_rows, columns=None):
+        days = self.partitions()
+        picked, count = [], 0
+
+        # Walk back from the newest day until enough rows are covered
+        for day in reversed(days):
+            picked.insert(0, day)
+            count += pq.ParquetFile(self.partition_path(day)).metadata.num_rows
+            if count >= n_rows:
+                break
+
+        df = self.read(columns=columns, days=picked)
+        return df.iloc[-n_rows:].reset_index(drop=True)
+
+    def columns(self):
+        """Return the column names stored in the newest partition."""
+        days = self.partitions()
+        if not days:
+            return []
+        return pq.read_schema(self.partition_path(days[-1])).names
+
+
+def read_dataset(store_dir, csv_path, start=None, end=None, columns=None):
+    """
+    Read the unified dataset from the store, falling back to the legacy CSV.
+    Returns a frame with a 'time_tag' column followed by the data columns.
+    """
+    if store_dir is not None and DatasetStore(store_dir).exists():
+        return DatasetStore(store_dir).read(start=start, end=end, columns=columns)
+
+    if not os.path.isfile(csv_path):
+        raise FileNotFoundError(f"CSV not found: {csv_path}")
+
+    df = pd.read_csv(csv_path)
+    df[DatasetStore.INDEX_COL] = pd.to_datetime(df[DatasetStore.INDEX_COL], utc=True)
+    if start is not None:
+        df = df[df[DatasetStore.INDEX_COL] >= _utc(start)]
+    if end is not None:
+        df = df[df[DatasetStore.INDEX_COL] <= _utc(end)]
+    if columns is not None:
+        df = df[[DatasetStore.INDEX_COL] + [c for c in columns if c != DatasetStore.INDEX_COL]]
+    return df.reset_index(drop=True)
+
+
+def read_csv_tail(csv_path, n_rows, block_size=1 << 16):
+    """
+    Parse only the last n_rows rows of a CSV by seeking backwards from its end.
+    Cost depends on n_rows, not on the file size.
+    """
+    with open(csv_path, "rb") as f:
+        header = f.readline()
+        data_start = f.tell()
+
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        buf = b""
+
+        # Read blocks backwards until n_rows + 1 line breaks are buffered
+        while pos > data_start and buf.count(b"\n") <= n_rows:
+            step = min(block_size, pos - data_start)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+
+    lines = buf.splitlines()
+    if pos > data_start:
+        # First buffered line may be partial
+        lines = lines[1:]
+    lines = [line for line in lines if line.strip()][-n_rows:]
+
+    return pd.read_csv(io.BytesIO(header + b"\n".join(lines) + b"\n"))
+
+
+def read_dataset_tail(store_dir, csv_path, n_rows):
+    """Read the newest n_rows rows from the store, falling back to a CSV tail seek."""
+    if store_dir is not None and DatasetStore(store_dir).exists():
+        return DatasetStore(store_dir).tail(n_rows)
+
+    if not os.path.isfile(csv_path):
+        raise FileNotFoundError(f"CSV not found: {csv_path}")
+
+    return read_csv_tail(csv_path, n_rows)
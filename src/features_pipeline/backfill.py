@@ -0,0 +1,264 @@
+import glob
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from dataset_store import compact_dtypes
+
+from .background_flux import BackgroundFluxOperator
+from .frame_exchange import write_frame, read_frame
+from .noaa_json import (read_xray_wide, read_euv_wide, xray_wide, euv_wide, csv_flags, is_csv,
+                        iter_csv_columns, XRAY_KEYS, EUV_KEYS, EUV_FLAGS)
+from .xraybg_preprocessor import Xraybg_preprocessor
+
+
+READERS = {"xray": read_xray_wide, "euv": read_euv_wide}
+
+# Rows of a CSV archive file parsed at a time
+CSV_CHUNK_ROWS = 500_000
+
+
+def feed_of(filepath):
+    """Return 'xray' / 'euv' from an archive file name (xrays-*.json, euvs-*.csv, ...), else None."""
+    name = os.path.basename(filepath).lower()
+    for feed in READERS:
+        if name.startswith(feed):
+            return feed
+    return None
+
+
+def wide_pieces(feed, filepath, chunk_rows=CSV_CHUNK_ROWS):
+    """
+    Yield the wide frames of one archive file. CSV exports are parsed
+    chunk_rows rows at a time; a JSON feed is a single array and is parsed whole.
+    """
+    if not is_csv(filepath):
+        yield READERS[feed](filepath)
+        return
+
+    if feed == "xray":
+        for columns in iter_csv_columns(filepath, list(XRAY_KEYS), chunk_rows):
+            yield xray_wide(columns)
+    else:
+        for columns in iter_csv_columns(filepath, [*EUV_KEYS, *EUV_FLAGS], chunk_rows):
+            yield euv_wide(columns, csv_flags(columns))
+
+
+def _spool_file(feed, filepath, spool_dir, file_no):
+    """Parse one archive file into wide frames and spool each as Arrow (worker process)."""
+    pieces = []
+    for k, df in enumerate(wide_pieces(feed, filepath)):
+        if df.empty:
+            continue
+        path = os.path.join(spool_dir, f"{file_no:06d}_{k:04d}_{feed}.arrow")
+        write_frame(df, path)
+        pieces.append({
+            "feed": feed,
+            "source": filepath,
+            "path": path,
+            "first": df.index[0],
+            "last": df.index[-1],
+            "columns": df.columns.tolist(),
+        })
+    return pieces
+
+
+def _read_pieces(pieces, start, end, columns):
+    """
+    Rows of the overlapping pieces with start <= time_tag < end. A timestamp
+    split across pieces is merged column-wise; later pieces win on overlap.
+    """
+    frames = [read_frame(p["path"], start, end) for p in pieces if p["first"] < end and p["last"] >= start]
+    frames = [df for df in frames if len(df)]
+    if not frames:
+        return None
+
+    df = pd.concat(frames)
+    if df.index.has_duplicates:
+        df = df.groupby(level=0, sort=False).last()
+    return df.sort_index().reindex(columns=columns)
+
+
+def _prepare_chunk(feed, pieces, columns, start, end, out_path):
+    """
+    Per-chunk preprocessing that needs no state from earlier chunks (worker
+    process): X-ray rows on their 1-minute grid with zeros as gaps, EUV rows,
+    both with their missing flags. Spooled as Arrow; returns the path or None.
+    """
+    df = _read_pieces(pieces, start, end, columns)
+    if df is None:
+        return None
+
+    if feed == "xray":
+        df = df.replace(0, np.nan)
+
+        grid = pd.date_range(start, end - pd.Timedelta(minutes=1), freq="1min", name=df.index.name)
+        df = df.reindex(grid)
+
+        df["is_missing"] = df.isna().any(axis=1).astype(np.int8)
+        df.columns = [f"xray_{col}" for col in df.columns]
+    else:
+        df.columns = [f"euv_{col}" for col in df.columns]
+        df["euv_is_missing"] = df.isna().all(axis=1).astype(np.int8)
+
+    return write_frame(df, out_path)
+
+
+class BackfillIngest:
+    """
+    Ingest a directory of archived GOES X-ray / EUV files into the dataset store.
+
+    Archive files use the schema of the live feeds (JSON records, or CSV with
+    the same fields and the EUV flags as columns) and are recognized by their
+    'xrays' / 'euvs' name prefix. A process pool parses every file into wide
+    frames and spools them to disk as Arrow; CSV exports are parsed in
+    pieces of CSV_CHUNK_ROWS rows, while a JSON feed (one JSON array) can
+    only be parsed whole, so it bounds the parse memory by its own size.
+
+    The spooled pieces are then walked in time-ordered chunks of chunk_days
+    UTC days. The stateless per-chunk steps (slicing the pieces, the 1-minute
+    grid, missing flags) run in the pool, up to one chunk per worker ahead.
+    Forward fill and the background flux operator carry their state from one
+    chunk into the next, and chunks are upserted into the store in order, so
+    those steps run sequentially here. Peak memory depends on chunk_days,
+    the number of workers and the largest JSON file, not on the size of the
+    archive.
+    """
+
+    PATTERNS = ("*.json", "*.csv")
+
+    def __init__(self, conf, archive_dir, store, workers=1, chunk_days=7):
+        """Initialize archive location, target store and chunking."""
+        if chunk_days * 1440 > BackgroundFluxOperator.HISTORY_MINUTES:
+            raise ValueError(
+                f"chunk_days must be at most {BackgroundFluxOperator.HISTORY_MINUTES // 1440}"
+            )
+
+        self.conf = conf
+        self.archive_dir = archive_dir
+        self.store = store
+        self.workers = max(1, workers)
+        self.chunk_days = chunk_days
+
+        self.carry = {}
+
+    # ---------------------------------------------------------
+    # Discovery and parsing
+    # ---------------------------------------------------------
+    def archive_files(self):
+        """Return sorted (feed, path) pairs of the archive files."""
+        files = []
+        for pattern in self.PATTERNS:
+            files += glob.glob(os.path.join(self.archive_dir, "**", pattern), recursive=True)
+        return sorted((feed_of(f), f) for f in files if feed_of(f) is not None)
+
+    def spool(self, pool, files, spool_dir):
+        """Parse archive files in the process pool; returns the spooled pieces' metadata."""
+        futures = [pool.submit(_spool_file, feed, path, spool_dir, i) for i, (feed, path) in enumerate(files)]
+        per_file = [future.result() for future in futures]
+
+        pieces = [p for file_pieces in per_file for p in file_pieces]
+        print(f"Backfill: parsed {sum(1 for p in per_file if p)} of {len(files)} archive file(s) "
+              f"into {len(pieces)} piece(s)")
+        return pieces
+
+    # ---------------------------------------------------------
+    # Ingest
+    # ---------------------------------------------------------
+    def run(self):
+        """Ingest the whole archive; returns the number of rows written."""
+        files = self.archive_files()
+        if not files:
+            print(f"Backfill: no archive files found in {self.archive_dir}")
+            return 0
+
+        with tempfile.TemporaryDirectory(prefix=".backfill_", dir=self.conf.data_dir,
+                                         ignore_cleanup_errors=True) as spool_dir:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                pieces = self.spool(pool, files, spool_dir)
+                return self.ingest(pool, pieces, spool_dir)
+
+    def ingest(self, pool, pieces, spool_dir):
+        """Walk the spooled pieces chunk by chunk and upsert each merged chunk."""
+        xray_pieces = sorted((p for p in pieces if p["feed"] == "xray"), key=lambda p: p["first"])
+        euv_pieces = sorted((p for p in pieces if p["feed"] == "euv"), key=lambda p: p["first"])
+        if not xray_pieces or not euv_pieces:
+            print("Backfill: both X-ray and EUV archive files are needed")
+            return 0
+
+        # Columns are fixed up front so every chunk has the same layout
+        energies = sorted(set().union(*(p["columns"] for p in xray_pieces)))
+        lines = sorted(set().union(*(p["columns"] for p in euv_pieces)))
+
+        first = min(p["first"] for p in xray_pieces).floor("min")
+        last = max(p["last"] for p in xray_pieces)
+
+        # In-memory background state; the live pipeline's state file is left alone
+        background = BackgroundFluxOperator()
+        self.carry = {}
+
+        bounds = []
+        start = first.floor("D")
+        while start <= last:
+            bounds.append((start, start + pd.Timedelta(days=self.chunk_days)))
+            start = bounds[-1][1]
+
+        def submit(k):
+            start, end = bounds[k]
+            xray_end = min(end, last + pd.Timedelta(minutes=1))
+            return (
+                pool.submit(_prepare_chunk, "xray", xray_pieces, energies, max(start, first), xray_end,
+                            os.path.join(spool_dir, f"chunk_{k:06d}_xray.arrow")),
+                pool.submit(_prepare_chunk, "euv", euv_pieces, lines, start, end,
+                            os.path.join(spool_dir, f"chunk_{k:06d}_euv.arrow")),
+            )
+
+        # Chunks are prepared up to one per worker ahead and consumed in time order
+        written = 0
+        in_flight = deque()
+        for k in range(len(bounds)):
+            while len(in_flight) < self.workers and k + len(in_flight) < len(bounds):
+                in_flight.append(submit(k + len(in_flight)))
+            xray_future, euv_future = in_flight.popleft()
+            start, end = bounds[k]
+
+            xray_df = self._load_chunk("xray", xray_future.result())
+            uv_df = self._load_chunk("euv", euv_future.result())
+            if xray_df is not None:
+                xraybg_df = background.update(xray_df[Xraybg_preprocessor.LONG_CHANNEL_COL])
+                xraybg_df = xraybg_df.astype(np.float32).rename("x_ray_bg")
+
+                if uv_df is not None:
+                    unified_df = xray_df.join(xraybg_df, how="inner").join(uv_df, how="inner")
+                    if len(unified_df):
+                        self.store.upsert(unified_df)
+                        written += len(unified_df)
+
+            print(f"Backfill: {start:%Y-%m-%d} .. {end:%Y-%m-%d} done, {written} rows written")
+
+        return written
+
+    def _load_chunk(self, feed, path):
+        """Read a prepared chunk and continue the forward fill from the previous one."""
+        if path is None:
+            return None
+        df = self._fill(feed, read_frame(path))
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # Still mapped (Windows); removed with the spool folder
+        return df
+
+    def _fill(self, feed, df):
+        """ffill continued from the previous chunk's last row, then bfill (first chunk only in practice)."""
+        carry = self.carry.get(feed)
+        if carry is not None:
+            df = pd.concat([carry, df]).ffill().iloc[1:]
+
+        df = compact_dtypes(df.ffill().bfill())
+        self.carry[feed] = df.iloc[[-1]]
+        return df
@@ -0,0 +1,334 @@
+import heapq
+import math
+import os
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+class _SlidingMedian:
+    """Median of the last `window` samples (NaN skipped) with a lazy-deletion heap pair."""
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.low = []       # max-heap (negated) of the smaller half
+        self.high = []      # min-heap of the larger half
+        self.n_low = 0
+        self.n_high = 0
+        self.delayed = {}   # value -> pending removals
+
+    def push(self, x):
+        self.values.append(x)
+        if not math.isnan(x):
+            self._insert(x)
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            if not math.isnan(old):
+                self._erase(old)
+        return self.median()
+
+    def median(self):
+        if self.n_low + self.n_high == 0:
+            return math.nan
+        if self.n_low > self.n_high:
+            return -self.low[0]
+        return (-self.low[0] + self.high[0]) / 2
+
+    def _insert(self, x):
+        if not self.low or x <= -self.low[0]:
+            heapq.heappush(self.low, -x)
+            self.n_low += 1
+        else:
+            heapq.heappush(self.high, x)
+            self.n_high += 1
+        self._rebalance()
+
+    def _erase(self, x):
+        self.delayed[x] = self.delayed.get(x, 0) + 1
+        if x <= -self.low[0]:
+            self.n_low -= 1
+            if x == -self.low[0]:
+                self._prune(self.low, -1)
+        else:
+            self.n_high -= 1
+            if x == self.high[0]:
+                self._prune(self.high, 1)
+        self._rebalance()
+
+    def _prune(self, heap, sign):
+        # Drop removed values sitting at the top of a heap
+        while heap:
+            top = sign * heap[0]
+            if self.delayed.get(top, 0) == 0:
+                break
+            self.delayed[top] -= 1
+            if self.delayed[top] == 0:
+                del self.delayed[top]
+            heapq.heappop(heap)
+
+    def _rebalance(self):
+        # Keep n_low == n_high or n_low == n_high + 1
+        if self.n_low > self.n_high + 1:
+            heapq.heappush(self.high, -heapq.heappop(self.low))
+            self.n_low -= 1
+            self.n_high += 1
+            self._prune(self.low, -1)
+        elif self.n_low < self.n_high:
+            heapq.heappush(self.low, -heapq.heappop(self.high))
+            self.n_low += 1
+            self.n_high -= 1
+            self._prune(self.high, 1)
+
+
+class _SlidingMin:
+    """Minimum of the last `window` samples (NaN skipped) with a monotonic deque."""
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.candidates = deque()  # (sequence number, value), increasing values
+        self.seq = 0
+
+    def push(self, x):
+        self.values.append(x)
+        if len(self.values) > self.window:
+            self.values.popleft()
+
+        if not math.isnan(x):
+            while self.candidates and self.candidates[-1][1] >= x:
+                self.candidates.pop()
+            self.candidates.append((self.seq, x))
+
+        # Expire candidates that left the window
+        while self.candidates and self.candidates[0][0] <= self.seq - self.window:
+            self.candidates.popleft()
+
+        self.seq += 1
+        return self.candidates[0][1] if self.candidates else math.nan
+
+
+class _SlidingMean:
+    """Mean of the last `window` samples (NaN skipped) with a compensated running sum."""
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+        self.comp = 0.0
+        self.count = 0
+
+    def push(self, x):
+        self.values.append(x)
+        if not math.isnan(x):
+            self._add(x)
+            self.count += 1
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            if not math.isnan(old):
+                self._add(-old)
+                self.count -= 1
+
+        if self.count == 0:
+            # Restart the sum so no rounding residue survives an empty window
+            self.total, self.comp = 0.0, 0.0
+            return math.nan
+        return self.total / self.count
+
+    def _add(self, x):
+        # Kahan summation, as in pandas' rolling mean
+        y = x - self.comp
+        t = self.total + y
+        self.comp = (t - self.total) - y
+        self.total = t
+
+
+class BackgroundFluxOperator:
+    """
+    Streaming NOAA-style background flux:
+    60-minute rolling median -> 1440-minute rolling minimum -> 180-minute rolling mean.
+
+    Each new 1-minute sample costs O(log MEDIAN_WINDOW) for the median heap
+    pair and amortized O(1) for the minimum and mean, so a run only pays for
+    the minutes that are new since the previous one. The three windows, the
+    last processed minute, the recent outputs and the recent raw samples are
+    persisted in a small .npz state file, so results equal a full rolling
+    recomputation over the continuous history instead of warming up again
+    at the start of every 7-day download.
+
+    Minutes the feed had forward-filled (or that were missing) are remembered.
+    When a later download revises one of them, the windows are rebuilt from
+    the raw samples just before the earliest revised minute and everything
+    from there on is recomputed.
+    """
+
+    MEDIAN_WINDOW = 60
+    MIN_WINDOW = 1440
+    MEAN_WINDOW = 180
+    SPAN = MEDIAN_WINDOW + MIN_WINDOW + MEAN_WINDOW
+    HISTORY_MINUTES = 8 * 1440
+    SAMPLE_MINUTES = HISTORY_MINUTES + SPAN
+    STATE_VERSION = 2
+
+    def __init__(self, state_path=None):
+        """Initialize empty state, loading state_path if it exists."""
+        self.state_path = state_path
+        self.reset()
+        if state_path is not None and os.path.exists(state_path):
+            self.load()
+
+    def reset(self):
+        """Forget all rolling state."""
+        self._reset_windows()
+        self._reset_samples()
+        self.last_time = None
+        self.history = pd.Series(dtype=np.float64, index=pd.DatetimeIndex([], tz="UTC"))
+
+    def _reset_windows(self):
+        self.median = _SlidingMedian(self.MEDIAN_WINDOW)
+        self.minimum = _SlidingMin(self.MIN_WINDOW)
+        self.mean = _SlidingMean(self.MEAN_WINDOW)
+
+    def _reset_samples(self):
+        # Raw input minutes on a contiguous grid ending at last_time, with their fill flags
+        self.samples = pd.Series(dtype=np.float64, index=pd.DatetimeIndex([], tz="UTC"))
+        self.filled = pd.Series(dtype=bool, index=pd.DatetimeIndex([], tz="UTC"))
+
+    # ---------------------------------------------------------
+    # Streaming
+    # ---------------------------------------------------------
+    def push(self, x):
+        """Feed one 1-minute sample (NaN for a missing minute); returns its background value."""
+        return self.mean.push(self.minimum.push(self.median.push(x)))
+
+    def update(self, flux, filled=None):
+        """
+        Process the minutes of a time-indexed flux series that are newer than
+        the last processed minute, or that revise a minute previously filled
+        in, and return background values for every row of flux still covered
+        by the retained history. filled (aligned with flux) flags the minutes
+        the feed forward-filled.
+        """
+        flux = flux.copy()
+        flux.index = pd.to_datetime(flux.index, utc=True)
+        if filled is None:
+            filled = pd.Series(False, index=flux.index)
+        else:
+            filled = pd.Series(np.asarray(filled, dtype=bool), index=flux.index)
+
+        if self.last_time is not None:
+            revised = self._first_revision(flux, filled)
+            if revised is not None:
+                self._rewind(revised)
+
+        new = flux[flux.index > self.last_time] if self.last_time is not None else flux
+
+        if len(new):
+            # Missing minutes advance the windows as NaN samples, except after
+            # a gap longer than every window, which leaves nothing behind
+            start = new.index[0]
+            if self.last_time is not None:
+                if start - self.last_time > pd.Timedelta(minutes=self.SPAN):
+                    self._reset_windows()
+                    self._reset_samples()
+                else:
+                    start = self.last_time + pd.Timedelta(minutes=1)
+            grid = pd.date_range(start, new.index[-1], freq="1min")
+
+            samples = new.reindex(grid).to_numpy(dtype=np.float64)
+            background = np.fromiter((self.push(x) for x in samples.tolist()), dtype=np.float64, count=len(samples))
+
+            computed = pd.Series(background, index=grid).loc[new.index]
+            self.history = pd.concat([self.history, computed]).iloc[-self.HISTORY_MINUTES:]
+            self.samples = pd.concat([self.samples, pd.Series(samples, index=grid)]).iloc[-self.SAMPLE_MINUTES:]
+            self.filled = pd.concat([self.filled, filled.reindex(grid, fill_value=False)]).iloc[-self.SAMPLE_MINUTES:]
+            self.last_time = grid[-1]
+
+        return self.history.reindex(flux.index)
+
+    def _first_revision(self, flux, filled):
+        """Earliest processed minute that was filled in or missing and now has a different sample."""
+        seen = flux.index[flux.index <= self.last_time].intersection(self.history.index).intersection(self.samples.index)
+        if not len(seen):
+            return None
+
+        before = self.samples.reindex(seen).to_numpy(dtype=np.float64)
+        after = flux.reindex(seen).to_numpy(dtype=np.float64)
+        was_filled = self.filled.reindex(seen, fill_value=False).to_numpy(dtype=bool) | np.isnan(before)
+        same = (after == before) | (np.isnan(after) & np.isnan(before))
+
+        # Minutes now observed with the value they had been filled with only lose their flag
+        self.filled.loc[seen] = self.filled.loc[seen].to_numpy() & filled.loc[seen].to_numpy()
+
+        changed = was_filled & ~same
+        return seen[changed][0] if changed.any() else None
+
+    def _rewind(self, t0):
+        """Drop everything from minute t0 on and rebuild the windows from the raw samples before it."""
+        kept = self.samples.index < t0
+        self.samples, self.filled = self.samples[kept], self.filled[kept]
+        self.history = self.history[self.history.index < t0]
+
+        # SPAN samples are all the outputs from t0 on depend on
+        self._reset_windows()
+        for x in self.samples.iloc[-self.SPAN:].tolist():
+            self.push(x)
+        self.last_time = t0 - pd.Timedelta(minutes=1)
+
+    # ---------------------------------------------------------
+    # Save / load
+    # ---------------------------------------------------------
+    def save(self, path=None):
+        """Write the rolling state atomically to path (state_path by default)."""
+        path = path or self.state_path
+        if path is None or self.last_time is None:
+            return
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                header=np.array([
+                    self.STATE_VERSION, self.MEDIAN_WINDOW, self.MIN_WINDOW, self.MEAN_WINDOW,
+                    self.last_time.value,
+                ], dtype=np.int64),
+                median_values=np.array(self.median.values, dtype=np.float64),
+                min_values=np.array(self.minimum.values, dtype=np.float64),
+                mean_values=np.array(self.mean.values, dtype=np.float64),
+                history_times=self.history.index.as_unit("ns").asi8,
+                history_values=self.history.to_numpy(dtype=np.float64),
+                sample_values=self.samples.to_numpy(dtype=np.float64),
+                sample_filled=self.filled.to_numpy(dtype=bool),
+            )
+        os.replace(tmp_path, path)
+
+    def load(self):
+        """Rebuild the rolling windows from state_path; stale or mismatched state is ignored."""
+        with np.load(self.state_path) as data:
+            version, median_w, min_w, mean_w, last_ns = data["header"].tolist()
+            if [version, median_w, min_w, mean_w] != [
+                self.STATE_VERSION, self.MEDIAN_WINDOW, self.MIN_WINDOW, self.MEAN_WINDOW
+            ]:
+                print("Background flux state does not match the current windows; starting fresh")
+                return
+
+            # Replaying each window rebuilds heaps, deque and sum exactly
+            for x in data["median_values"].tolist():
+                self.median.push(x)
+            for x in data["min_values"].tolist():
+                self.minimum.push(x)
+            for x in data["mean_values"].tolist():
+                self.mean.push(x)
+
+            self.last_time = pd.Timestamp(last_ns, tz="UTC")
+            self.history = pd.Series(
+                data["history_values"],
+                index=pd.DatetimeIndex(pd.to_datetime(data["history_times"], utc=True)),
+            )
+
+            # The samples end at last_time on a 1-minute grid
+            grid = pd.date_range(end=self.last_time, periods=len(data["sample_values"]), freq="1min")
+            self.samples = pd.Series(data["sample_values"], index=grid)
+            self.filled = pd.Series(data["sample_filled"], index=grid)
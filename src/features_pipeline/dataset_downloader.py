@@ -1,32 +1,149 @@
+import json
 import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
-import json
+from requests.adapters import HTTPAdapter
+
 from config import Config
 
+
 class DatasetDownloader:
-    """Download JSON datasets defined in the configuration."""
+    """
+    Download JSON datasets defined in the configuration.
+
+    Feeds are fetched concurrently over pooled per-thread sessions with
+    timeouts and exponential backoff. ETag / Last-Modified validators are
+    kept in a small state file so unchanged feeds are skipped with a
+    conditional GET (HTTP 304). Payloads are stored compact, as served.
+    """
 
-    def __init__(self):
+    STATE_FILE = "download_state.json"
+    RETRY_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(self, conf=None, max_workers=4, timeout=30, retries=4, backoff=0.5):
         """Initialize downloader and ensure data directory exists."""
-        self.conf = Config()
+        self.conf = conf if conf is not None else Config()
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
         # Ensure data directory exists
         os.makedirs(self.conf.data_dir, exist_ok=True)
 
+        self.state_path = os.path.join(self.conf.data_dir, self.STATE_FILE)
+        self._local = threading.local()
+
+    # ---------------------------------------------------------
+    # Sessions and validator state
+    # ---------------------------------------------------------
+    def _session(self):
+        # One pooled session per worker thread (Session is not thread-safe)
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["Accept-Encoding"] = "gzip, deflate"
+            self._local.session = session
+        return session
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, "r") as f:
+            return json.load(f)
+
+    def _save_state(self, state):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    # ---------------------------------------------------------
+    # Download
+    # ---------------------------------------------------------
     def datasetDownload(self):
-        """Download all datasets listed in configuration."""
-        # Loop through all dataset URLs
-        for url in self.conf.dataset_urls:
-            filename = url.split("/")[-1]
+        """Download all datasets listed in configuration; returns {url: status}."""
+        state = self._load_state()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {url: pool.submit(self._fetch, url, state.get(url, {})) for url in self.conf.dataset_urls}
+            results = {url: future.result() for url, future in futures.items()}
+
+        # Persist validators of the feeds that were actually downloaded
+        for url, (status, validators) in results.items():
+            if status == "downloaded":
+                state[url] = validators
+        self._save_state(state)
+
+        failed = [url for url, (status, _) in results.items() if status == "failed"]
+        if failed:
+            missing = [url for url in failed if not os.path.isfile(self._filepath(url))]
+            if missing:
+                raise RuntimeError(f"Download failed and no previous copy exists: {missing}")
+            print(f"Warning: keeping previous copies of {len(failed)} feed(s) that failed to download")
+
+        return {url: status for url, (status, _) in results.items()}
+
+    def _filepath(self, url):
+        return os.path.join(self.conf.data_dir, url.split("/")[-1])
+
+    def _fetch(self, url, validators):
+        """Fetch one feed with retries; returns (status, validators)."""
+        filename = url.split("/")[-1]
+        filepath = self._filepath(url)
+
+        # Conditional GET only makes sense when the previous copy is still on disk
+        headers = {}
+        if os.path.isfile(filepath):
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+
+        for attempt in range(self.retries + 1):
+            try:
+                response = self._session().get(url, headers=headers, timeout=self.timeout)
+
+                if response.status_code == 304:
+                    print(f"Dataset unchanged, skipped: {filename}")
+                    return "unchanged", validators
+
+                if response.status_code in self.RETRY_STATUS:
+                    raise requests.HTTPError(f"HTTP {response.status_code}", response=response)
+                response.raise_for_status()
+
+                # Validate before replacing the previous copy
+                json.loads(response.content)
+                self._write_atomic(filepath, response.content)
 
-            # Download JSON data
-            response = requests.get(url)
-            data = response.json()
+                print(f"Saved dataset file: {filename} at {filepath}")
+                return "downloaded", {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                }
 
-            # Build full save path
-            filepath = os.path.join(self.conf.data_dir, filename)
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError, ValueError) as e:
+                retryable = not isinstance(e, requests.HTTPError) or (
+                    e.response is not None and e.response.status_code in self.RETRY_STATUS
+                )
+                if attempt == self.retries or not retryable:
+                    print(f"Failed to download {filename}: {e}")
+                    return "failed", validators
 
-            # Save JSON file
-            with open(filepath, "w") as f:
-                json.dump(data, f, indent=4)
+                # Exponential backoff with jitter
+                delay = self.backoff * (2 ** attempt) * (0.5 + random.random())
+                print(f"Retrying {filename} in {delay:.2f}s ({e})")
+                time.sleep(delay)
 
-            print(f"Saved dataset file: {filename} at {filepath}")
\ No newline at end of file
+    def _write_atomic(self, filepath, content):
+        tmp_path = filepath + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, filepath)
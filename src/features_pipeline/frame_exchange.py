@@ -0,0 +1,43 @@
+import os
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+
+
+def write_frame(df, path):
+    """Write a frame (index included) to an Arrow IPC file, atomically."""
+    table = pa.Table.from_pandas(df, preserve_index=True)
+
+    tmp_path = path + ".tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_frame(path, start=None, end=None):
+    """
+    Memory-map an Arrow IPC file written by write_frame and return it as a frame.
+    Numeric columns without nulls are handed to pandas without copying; the
+    mapping stays alive as long as the returned frame references it.
+
+    start <= index < end filters rows on the mapped table, so only the
+    selected rows are ever materialized.
+    """
+    with pa.memory_map(path, "r") as source:
+        table = ipc.open_file(source).read_all()
+
+    if start is not None or end is not None:
+        index_col = table.schema.pandas_metadata["index_columns"][0]
+        index_type = table.schema.field(index_col).type
+        mask = None
+        if start is not None:
+            mask = pc.greater_equal(table[index_col], pa.scalar(start, type=index_type))
+        if end is not None:
+            end_mask = pc.less(table[index_col], pa.scalar(end, type=index_type))
+            mask = end_mask if mask is None else pc.and_(mask, end_mask)
+        table = table.filter(mask)
+
+    return table.to_pandas(split_blocks=True)
@@ -0,0 +1,167 @@
+import json
+from operator import itemgetter
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # optional, only speeds up parsing
+    orjson = None
+
+
+def load_records(filepath):
+    """Parse a NOAA JSON feed (a list of records), using orjson when available."""
+    with open(filepath, "rb") as f:
+        raw = f.read()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def is_csv(filepath):
+    """True for CSV exports of a feed (same fields as the JSON records, flags flattened)."""
+    return filepath.lower().endswith(".csv")
+
+
+def load_csv_columns(filepath, keys):
+    """Read the given fields of a CSV export into lists, like column() does for records."""
+    df = pd.read_csv(filepath, usecols=keys)
+    return {key: df[key].tolist() for key in keys}
+
+
+def iter_csv_columns(filepath, keys, chunk_rows):
+    """Read the given fields of a CSV export in pieces of chunk_rows rows, as load_csv_columns does."""
+    for df in pd.read_csv(filepath, usecols=keys, chunksize=chunk_rows):
+        yield {key: df[key].tolist() for key in keys}
+
+
+def column(records, key):
+    """Pull one field of every record into a list."""
+    return list(map(itemgetter(key), records))
+
+
+def to_float(values):
+    """Convert a list of numbers/None to float64, with None as NaN."""
+    return np.array(values, dtype=np.float64)
+
+
+def wide_frame(time_tags, keys, values, index_name="time_tag", columns_name=None, normalize_key=None):
+    """
+    Vectorized equivalent of DataFrame.pivot_table(index, columns, values)
+    with mean aggregation.
+
+    Time tags and keys are factorized once, so timestamps and key labels
+    are only parsed/normalized per unique value. Values are scattered into
+    a dense (times, keys) grid with bincount sums and counts; like
+    pivot_table, missing keys and NaN values are ignored and all-NaN
+    rows/columns dropped.
+    """
+    t_codes, t_uniques = pd.factorize(np.asarray(time_tags, dtype=object))
+    k_codes, k_uniques = pd.factorize(np.asarray(keys, dtype=object))
+
+    # Records with a missing time tag or key are dropped (factorize codes them -1)
+    present = (t_codes >= 0) & (k_codes >= 0)
+    if not present.all():
+        t_codes, k_codes, values = t_codes[present], k_codes[present], values[present]
+
+    # Normalize labels on the uniques only; labels may merge after normalization
+    if normalize_key is not None:
+        k_labels = [normalize_key(k) for k in k_uniques]
+        remap, k_uniques = pd.factorize(np.asarray(k_labels, dtype=object))
+        k_codes = remap[k_codes]
+
+    # Sorted index and columns, as pivot_table returns them
+    times = pd.to_datetime(pd.Index(t_uniques), utc=True)
+    t_order = np.argsort(times.asi8, kind="stable")
+    t_rank = np.empty_like(t_order)
+    t_rank[t_order] = np.arange(len(t_order))
+
+    k_order = np.argsort(np.asarray(k_uniques, dtype=object), kind="stable")
+    k_rank = np.empty_like(k_order)
+    k_rank[k_order] = np.arange(len(k_order))
+
+    n_t, n_k = len(t_uniques), len(k_uniques)
+    flat = t_rank[t_codes] * n_k + k_rank[k_codes]
+
+    valid = ~np.isnan(values)
+    sums = np.bincount(flat[valid], weights=values[valid], minlength=n_t * n_k)
+    counts = np.bincount(flat[valid], minlength=n_t * n_k)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        grid = (sums / counts).reshape(n_t, n_k)
+
+    # pivot_table drops rows and columns with no valid value
+    has_value = (counts > 0).reshape(n_t, n_k)
+    keep_rows = has_value.any(axis=1)
+    keep_cols = has_value.any(axis=0)
+
+    index = times[t_order][keep_rows]
+    index.name = index_name
+    columns = pd.Index(np.asarray(k_uniques, dtype=object)[k_order][keep_cols].tolist(), name=columns_name)
+
+    return pd.DataFrame(grid[np.ix_(keep_rows, keep_cols)], index=index, columns=columns)
+
+
+def normalize_energy(label):
+    """Normalize an X-ray energy label, e.g. '0.1 – 0.8 nm' -> '0.1-0.8nm'."""
+    return str(label).strip().replace("–", "-").replace(" ", "")
+
+
+XRAY_KEYS = ("time_tag", "energy", "observed_flux")
+
+
+def read_xray_wide(filepath):
+    """Parse xrays-7-day.json (or a CSV export) into a (time_tag x energy) observed_flux frame."""
+    if is_csv(filepath):
+        columns = load_csv_columns(filepath, list(XRAY_KEYS))
+    else:
+        records = load_records(filepath)
+        columns = {key: column(records, key) for key in XRAY_KEYS}
+
+    return xray_wide(columns)
+
+
+def xray_wide(columns):
+    """(time_tag x energy) observed_flux frame from time_tag / energy / observed_flux lists."""
+    return wide_frame(
+        columns["time_tag"],
+        columns["energy"],
+        to_float(columns["observed_flux"]),
+        columns_name="energy",
+        normalize_key=normalize_energy,
+    )
+
+
+EUV_FLAGS = ("eclipse", "lunar_transit", "geocorona")
+EUV_KEYS = ("time_tag", "line", "value")
+
+
+def read_euv_wide(filepath):
+    """Parse euvs-7-day.json (or a CSV export) into a (time_tag x line) value frame, flagged samples masked."""
+    if is_csv(filepath):
+        columns = load_csv_columns(filepath, [*EUV_KEYS, *EUV_FLAGS])
+        return euv_wide(columns, csv_flags(columns))
+
+    records = load_records(filepath)
+    columns = {key: column(records, key) for key in EUV_KEYS}
+    # A record without a flag (or without flags at all) counts as unflagged
+    nested = [r.get("flags") or {} for r in records]
+    flags = {flag: np.array([f.get(flag, False) for f in nested], dtype=bool) for flag in EUV_FLAGS}
+    return euv_wide(columns, flags)
+
+
+def csv_flags(columns):
+    """EUV flag columns of a CSV export as bool arrays, missing values as False."""
+    return {flag: pd.Series(columns[flag]).fillna(False).astype(bool).to_numpy() for flag in EUV_FLAGS}
+
+
+def euv_wide(columns, flags):
+    """(time_tag x line) value frame from time_tag / line / value lists, flagged samples masked."""
+    values = to_float(columns["value"])
+
+    # Eclipse / lunar transit / geocorona samples become NaN
+    masked = np.zeros(len(values), dtype=bool)
+    for flag in EUV_FLAGS:
+        masked |= flags[flag]
+    values[masked] = np.nan
+
+    return wide_frame(columns["time_tag"], columns["line"], values, columns_name="line")
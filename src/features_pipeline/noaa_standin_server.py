@@ -0,0 +1,164 @@
+import argparse
+import gzip
+import hashlib
+import os
+import random
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+
+class NoaaStandInServer:
+    """
+    Local stand-in for the NOAA SWPC JSON feeds.
+
+    Serves recorded payloads from a directory (one '<feed>.json' per feed)
+    with ETag / Last-Modified validators, 304 responses and gzip encoding,
+    so the downloader can be exercised offline. Failure behaviour can be
+    injected: a latency per request, a random 503 rate, and a number of
+    initial 503 responses per path.
+    """
+
+    def __init__(self, payload_dir, host="127.0.0.1", port=0,
+                 latency=0.0, fail_rate=0.0, fail_first=0, seed=0):
+        """Bind the server; port=0 picks a free port."""
+        self.payload_dir = payload_dir
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.fail_first = fail_first
+        self.rng = random.Random(seed)
+
+        self.lock = threading.Lock()
+        self.request_counts = {}
+        self.status_counts = {}
+
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve in a background thread."""
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _count(self, path, status):
+        with self.lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+            self.request_counts[path] = self.request_counts.get(path, 0) + 1
+            return self.request_counts[path]
+
+    def _should_fail(self, n_request):
+        with self.lock:
+            return n_request <= self.fail_first or self.rng.random() < self.fail_rate
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+
+                name = os.path.basename(self.path.split("?")[0])
+                path = os.path.join(server.payload_dir, name)
+                if not os.path.isfile(path):
+                    self._send(404, b"Not found")
+                    return
+
+                with server.lock:
+                    n_request = server.request_counts.get(name, 0) + 1
+                if server._should_fail(n_request):
+                    server._count(name, 503)
+                    self._send(503, b"Service unavailable")
+                    return
+
+                with open(path, "rb") as f:
+                    body = f.read()
+                mtime = os.path.getmtime(path)
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                last_modified = formatdate(mtime, usegmt=True)
+
+                # Conditional GET
+                if self.headers.get("If-None-Match") == etag or self._not_modified_since(mtime):
+                    server._count(name, 304)
+                    self._send(304, b"", {"ETag": etag, "Last-Modified": last_modified})
+                    return
+
+                headers = {"ETag": etag, "Last-Modified": last_modified, "Content-Type": "application/json"}
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body, compresslevel=5)
+                    headers["Content-Encoding"] = "gzip"
+
+                server._count(name, 200)
+                self._send(200, body, headers)
+
+            def _not_modified_since(self, mtime):
+                since = self.headers.get("If-Modified-Since")
+                if not since or self.headers.get("If-None-Match"):
+                    return False
+                try:
+                    return int(mtime) <= parsedate_to_datetime(since).timestamp()
+                except (TypeError, ValueError):
+                    return False
+
+            def _send(self, status, body, headers=None):
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+
+            def log_message(self, fmt, *args):
+                pass
+
+        return Handler
+
+
+def record_payloads(urls, payload_dir):
+    """Save the live NOAA payloads for later offline serving."""
+    os.makedirs(payload_dir, exist_ok=True)
+    for url in urls:
+        response = requests.get(url, timeout=60)
+        response.raise_for_status()
+        path = os.path.join(payload_dir, url.split("/")[-1])
+        with open(path, "wb") as f:
+            f.write(response.content)
+        print(f"Recorded {url} -> {path}")
+
+
+if __name__ == "__main__":
+    from config import Config
+
+    parser = argparse.ArgumentParser(description="Serve recorded NOAA payloads locally.")
+    parser.add_argument("payload_dir", help="Folder with recorded '<feed>.json' payloads")
+    parser.add_argument("--record", action="store_true", help="Record the live feeds into payload_dir first")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of delay per request")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--fail-first", type=int, default=0, help="Answer the first N requests per feed with 503")
+    args = parser.parse_args()
+
+    if args.record:
+        record_payloads(Config().dataset_urls, args.payload_dir)
+
+    stand_in = NoaaStandInServer(args.payload_dir, port=args.port, latency=args.latency,
+                                 fail_rate=args.fail_rate, fail_first=args.fail_first)
+    print(f"Serving {args.payload_dir} at {stand_in.base_url}")
+    print(f"Point the pipeline at it with: SFP_NOAA_BASE_URL={stand_in.base_url}")
+    stand_in.server.serve_forever()
@@ -2,69 +2,215 @@ from .xray_preprocessor import Xray_preprocessor
 from .uv_preprocessor import UvPreprocessor
 from .xraybg_preprocessor import Xraybg_preprocessor
 from .dataset_downloader import DatasetDownloader
+from .frame_exchange import write_frame, read_frame
+from .stage_cache import StageCache
+from .backfill import BackfillIngest
+from . import noaa_json, uv_preprocessor, xray_preprocessor
 
 from config import Config
+from dataset_store import DatasetStore
 
 import os
-import pandas as pd
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 
-class PreprocesserManager:
-    def __init__(self):
-        self.conf = Config()
+# Stage -> (input file, modules whose source versions the cached output).
+# xraybg is not cached: its output depends on the rolling state persisted in
+# datas/xraybg_state.npz, which every stored run must also advance.
+STAGE_INPUTS = {
+    "xray": (Xray_preprocessor.INPUT_FILE, [xray_preprocessor, noaa_json]),
+    "euv": (UvPreprocessor.INPUT_FILE, [uv_preprocessor, noaa_json]),
+}
 
-        self.update_files()
 
-        merged_df = self.merge_preprocessed()
+def _run_stage(cache, conf, stage, compute, *args):
+    """
+    Run one preprocessing stage through the stage cache.
+    Returns the frame and its cache entry path (None when caching is off
+    or the stage is not cacheable).
+    """
+    if cache is None or stage not in STAGE_INPUTS:
+        return compute(*args), None
 
-        self.save_and_update_dataset(merged_df)
+    input_file, modules = STAGE_INPUTS[stage]
+    key = cache.key(stage, os.path.join(conf.data_dir, input_file), modules)
 
-    def update_files(self):
-        downloader = DatasetDownloader()
-        downloader.datasetDownload()
+    path = cache.get(key)
+    if path is not None:
+        print(f"Stage cache hit: {stage}")
+        return read_frame(path), path
 
-    def merge_preprocessed(self):
-        xray_proc = Xray_preprocessor(self.conf)
-        uv_proc = UvPreprocessor(self.conf)
-        xraybg_proc = Xraybg_preprocessor(self.conf)
+    df = compute(*args)
+    return df, cache.put(key, df)
 
-        xray_df = xray_proc.preprocess_xray()
-        uv_df = uv_proc.preprocess_uv()
-        xraybg_df = xraybg_proc.preprocess_xraybg(xray_df)
 
-        # Ensure DatetimeIndex everywhere
-        xray_df.index = pd.to_datetime(xray_df.index, utc=True)
-        uv_df.index = pd.to_datetime(uv_df.index, utc=True)
-        xraybg_df.index = pd.to_datetime(xraybg_df.index, utc=True)
+def _xray(conf):
+    return Xray_preprocessor(conf).preprocess_xray()
 
-        # Merge using index
-        unified_df = xray_df.join([xraybg_df, uv_df], how="inner")
 
-        return unified_df
+def _xraybg(conf, xray_df):
+    return Xraybg_preprocessor(conf).preprocess_xraybg(xray_df).to_frame()
 
-    def save_and_update_dataset(self, new_data):
-        dataset_path = os.path.join(self.conf.data_dir, self.conf.dataset_name)
 
-        if os.path.isfile(dataset_path):
-            print("Dataset found; updating records")
+def _uv(conf):
+    return UvPreprocessor(conf).preprocess_uv()
+
+
+def _export(df, entry_path, out_dir, name):
+    # Cache entries are already Arrow files; anything else is written out
+    return entry_path if entry_path is not None else write_frame(df, os.path.join(out_dir, f"{name}.arrow"))
+
+
+def _run_xray_branch(conf, cache, out_dir):
+    """X-ray preprocessing with the background flux chained after it (worker process)."""
+    timings = {}
+
+    start = time.perf_counter()
+    xray_df, xray_path = _run_stage(cache, conf, "xray", _xray, conf)
+    timings["xray"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    xraybg_df, xraybg_path = _run_stage(cache, conf, "xraybg", _xraybg, conf, xray_df)
+    timings["xraybg"] = time.perf_counter() - start
+
+    paths = {
+        "xray": _export(xray_df, xray_path, out_dir, "xray"),
+        "xraybg": _export(xraybg_df, xraybg_path, out_dir, "xraybg"),
+    }
+    return paths, timings
+
+
+def _run_uv_branch(conf, cache, out_dir):
+    """EUV preprocessing (worker process)."""
+    start = time.perf_counter()
+    uv_df, uv_path = _run_stage(cache, conf, "euv", _uv, conf)
+    timings = {"euv": time.perf_counter() - start}
+
+    paths = {"euv": _export(uv_df, uv_path, out_dir, "euv")}
+    return paths, timings
+
 
-            old_df = pd.read_csv(
-                dataset_path,
-                index_col="time_tag",
-                parse_dates=["time_tag"]
-            )
+class PreprocesserManager:
+    def __init__(self, workers=1, use_cache=True, backfill_dir=None, chunk_days=7):
+        self.conf = Config()
+        self.workers = workers
+        self.timings = {}
+
+        # Unchanged feeds are served from the stage cache instead of reprocessed
+        self.cache = StageCache(self.conf.stage_cache_dir, self.conf.stage_cache_max_mb * 2**20) if use_cache else None
+
+        start = time.perf_counter()
+
+        if backfill_dir is not None:
+            # Archived history instead of the rolling 7-day feeds
+            self._timed("backfill", self.backfill, backfill_dir, chunk_days)
+        else:
+            self._timed("download", self.update_files)
+
+            merged_df = self.merge_preprocessed()
+
+            self._timed("save", self.save_and_update_dataset, merged_df)
 
-            combined = pd.concat([old_df, new_data])
+            if self.cache is not None:
+                self.cache.evict()
 
-            combined = combined[~combined.index.duplicated(keep="last")]
+        self.timings["total"] = time.perf_counter() - start
+        self.print_timings()
 
-            combined.sort_index(inplace=True)
+    def _timed(self, stage, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        self.timings[stage] = time.perf_counter() - start
+        return result
 
-            combined.to_csv(dataset_path, index=True)
+    def update_files(self):
+        downloader = DatasetDownloader(self.conf)
+        downloader.datasetDownload()
 
+    def merge_preprocessed(self):
+        if self.workers > 1:
+            xray_df, xraybg_df, uv_df = self.preprocess_parallel()
         else:
-            print("Dataset not found; creating new file")
-            new_data.to_csv(dataset_path, index=True)
-            print("Dataset creation complete")
+            xray_df, xraybg_df, uv_df = self.preprocess_sequential()
+
+        return self._timed("merge", self.merge_frames, xray_df, xraybg_df, uv_df)
+
+    def preprocess_sequential(self):
+        xray_df, _ = self._timed("xray", _run_stage, self.cache, self.conf, "xray", _xray, self.conf)
+        uv_df, _ = self._timed("euv", _run_stage, self.cache, self.conf, "euv", _uv, self.conf)
+        xraybg_df, _ = self._timed("xraybg", _run_stage, self.cache, self.conf, "xraybg", _xraybg, self.conf, xray_df)
+
+        return xray_df, xraybg_df["x_ray_bg"], uv_df
+
+    def preprocess_parallel(self):
+        """
+        Run the X-ray (+ background) and EUV branches in separate processes.
+        Workers hand their frames back as Arrow IPC files that are memory-mapped
+        here instead of being pickled through the pool.
+        """
+        with tempfile.TemporaryDirectory(prefix="sfp_preprocess_", ignore_cleanup_errors=True) as out_dir:
+            with ProcessPoolExecutor(max_workers=min(self.workers, 2)) as pool:
+                futures = [
+                    pool.submit(_run_xray_branch, self.conf, self.cache, out_dir),
+                    pool.submit(_run_uv_branch, self.conf, self.cache, out_dir),
+                ]
+                results = [future.result() for future in futures]
+
+            start = time.perf_counter()
+            frames = {}
+            for paths, timings in results:
+                self.timings.update(timings)
+                frames.update({name: read_frame(path) for name, path in paths.items()})
+            self.timings["transfer"] = time.perf_counter() - start
+
+        return frames["xray"], frames["xraybg"]["x_ray_bg"], frames["euv"]
+
+    def merge_frames(self, xray_df, xraybg_df, uv_df):
+        """
+        Inner-join the preprocessed frames on their UTC DatetimeIndex.
+        Every preprocessor already returns parsed timestamps, so the indexes are
+        only sorted when needed and joined with a sorted-index merge.
+        """
+        frames = [df if df.index.is_monotonic_increasing else df.sort_index()
+                  for df in (xray_df, xraybg_df, uv_df)]
+
+        unified_df = frames[0].join(frames[1], how="inner").join(frames[2], how="inner")
+
+        return unified_df
 
-    
\ No newline at end of file
+    def print_timings(self):
+        print(f"Features pipeline timings (workers={self.workers}):")
+        for stage, seconds in self.timings.items():
+            print(f"  {stage:<10} {seconds:8.3f} s")
+
+    def open_store(self):
+        store = DatasetStore(self.conf.store_dir)
+        dataset_path = os.path.join(self.conf.data_dir, self.conf.dataset_name)
+
+        # One-time migration of the legacy CSV dataset
+        if not store.exists() and os.path.isfile(dataset_path):
+            print("Legacy CSV dataset found; importing into dataset store")
+            store.import_csv(dataset_path)
+
+        return store
+
+    def save_and_update_dataset(self, new_data):
+        store = self.open_store()
+
+        # Only the day partitions covered by the new download are rewritten
+        print("Updating dataset store records")
+        store.upsert(new_data)
+
+        # The background flux state only advances once its rows are stored
+        Xraybg_preprocessor(self.conf).commit_state()
+        print("Dataset update complete")
+
+    def backfill(self, archive_dir, chunk_days=7):
+        """Ingest a directory of archived X-ray/EUV files chunk by chunk into the dataset store."""
+        ingest = BackfillIngest(self.conf, archive_dir, self.open_store(),
+                                workers=self.workers, chunk_days=chunk_days)
+        n_rows = ingest.run()
+        print(f"Backfill complete: {n_rows} rows written")
+        return n_rows
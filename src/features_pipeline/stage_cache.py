@@ -0,0 +1,110 @@
+import hashlib
+import inspect
+import os
+
+from .frame_exchange import write_frame
+
+
+class StageCache:
+    """
+    Content-addressed cache of preprocessor outputs.
+
+    An entry is keyed by the stage name, the SHA-256 of the stage's input
+    file and a code version hashed from the source of the modules the stage
+    depends on, so editing a preprocessor invalidates its entries. Entries
+    are Arrow IPC files ('<key>.arrow') that can be memory-mapped straight
+    back into frames. Hits refresh the file mtime and evict() drops the
+    least recently used entries until the cache fits in max_bytes.
+    """
+
+    SUFFIX = ".arrow"
+    READ_CHUNK = 1 << 22
+
+    def __init__(self, cache_dir, max_bytes=256 * 2**20):
+        """Initialize cache location and size bound."""
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._digests = {}
+
+    # ---------------------------------------------------------
+    # Keys
+    # ---------------------------------------------------------
+    def file_digest(self, path):
+        """SHA-256 of a file's content, memoized per (path, size, mtime)."""
+        stat = os.stat(path)
+        memo_key = (path, stat.st_size, stat.st_mtime_ns)
+        if memo_key not in self._digests:
+            hasher = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(self.READ_CHUNK), b""):
+                    hasher.update(chunk)
+            self._digests[memo_key] = hasher.hexdigest()
+        return self._digests[memo_key]
+
+    @staticmethod
+    def code_version(*modules):
+        """Hash the source of the given modules."""
+        hasher = hashlib.sha256()
+        for module in modules:
+            hasher.update(inspect.getsource(module).encode())
+        return hasher.hexdigest()
+
+    def key(self, stage, input_path, modules):
+        """Cache key of a stage run on input_path with the current code."""
+        payload = ":".join([stage, self.file_digest(input_path), self.code_version(*modules)])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{key}{self.SUFFIX}")
+
+    # ---------------------------------------------------------
+    # Entries
+    # ---------------------------------------------------------
+    def get(self, key):
+        """Return the entry path of key (marking it recently used), or None on a miss."""
+        path = self.path(key)
+        if not os.path.isfile(path):
+            return None
+        os.utime(path)
+        return path
+
+    def put(self, key, df):
+        """Store a frame under key and return the entry path."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        return write_frame(df, self.path(key))
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        if not os.path.isdir(self.cache_dir):
+            return []
+
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(self.SUFFIX):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime_ns, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        removed = []
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                # Still memory-mapped by this run on platforms that lock mapped files
+                continue
+            total -= size
+            removed.append(name)
+
+        if removed:
+            print(f"Stage cache: evicted {len(removed)} entr{'y' if len(removed) == 1 else 'ies'}")
+        return removed
+
+    def clear(self):
+        """Remove all cache entries."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(self.SUFFIX):
+                os.remove(os.path.join(self.cache_dir, name))
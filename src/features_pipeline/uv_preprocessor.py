@@ -1,44 +1,32 @@
-import pandas as pd 
-import json 
-import os
 import numpy as np
+import pandas as pd
+import os
+
+from dataset_store import compact_dtypes
+
+from .noaa_json import read_euv_wide
 
 class UvPreprocessor:
     """Preprocess the NOAA EUV dataset."""
 
+    INPUT_FILE = "euvs-7-day.json"
+
     def __init__(self, conf):
         self.conf = conf
 
     def preprocess_uv(self):
-        filepath = os.path.join(self.conf.data_dir, "euvs-7-day.json")
-
-        with open(filepath, 'r') as f:
-            raw_data = json.load(f)
+        filepath = os.path.join(self.conf.data_dir, self.INPUT_FILE)
 
-        df = pd.DataFrame(raw_data)
-
-        # Parse timestamps
-        df["time_tag"] = pd.to_datetime(df["time_tag"], utc=True)
-
-        # Expand flag columns
-        flags_df = df["flags"].apply(pd.Series)
-        df = pd.concat([df.drop(columns=["flags"]), flags_df], axis=1)
-
-        # Mask eclipse/transit samples
-        mask = (df["eclipse"] | df["lunar_transit"] | df["geocorona"])
-        df.loc[mask, "value"] = np.nan
-
-        # Pivot spectral lines
-        df = df.pivot_table(index="time_tag", columns="line", values="value")
+        # Parse, mask eclipse/transit samples and pivot spectral lines
+        # in one vectorized pass over the JSON records
+        df = read_euv_wide(filepath)
         df.columns = [f"euv_{col}" for col in df.columns]
 
         # Missingness flag BEFORE filling
-        df["euv_is_missing"] = df.isna().all(axis=1).astype(int)
-
-        # Forward/backward fill
-        pd.set_option('future.no_silent_downcasting', False)
+        df["euv_is_missing"] = df.isna().all(axis=1).astype(np.int8)
 
-        df = df.ffill().bfill().infer_objects(copy=False)
+        # Forward/backward fill, then store values as float32
+        df = compact_dtypes(df.ffill().bfill())
 
         df.index = pd.to_datetime(df.index, utc=True)
 
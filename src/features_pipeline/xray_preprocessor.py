@@ -1,51 +1,36 @@
-import pandas as pd
+import numpy as np
 import os
-import json
+
+from dataset_store import compact_dtypes
+
+from .noaa_json import read_xray_wide
 
 class Xray_preprocessor:
     """Preprocess the NOAA X-ray dataset."""
 
+    INPUT_FILE = "xrays-7-day.json"
+
     def __init__(self, conf):
         self.conf = conf
 
     def preprocess_xray(self):
-        filepath = os.path.join(self.conf.data_dir, "xrays-7-day.json")
-
-        with open(filepath, 'r') as f:
-            raw_data = json.load(f)
-
-        df = pd.DataFrame(raw_data)
-
-        # 1. Remove empty rows
-        df = df.dropna(how="any", subset=["time_tag", "energy"])
-
-        # 2. Convert time_tag
-        df["time_tag"] = pd.to_datetime(df["time_tag"], utc=True)
-
-        # 3. Normalize energy labels
-        df["energy"] = df["energy"].astype(str).str.strip()
-        df["energy"] = df["energy"].str.replace("–", "-", regex=False)
-        df["energy"] = df["energy"].str.replace(" ", "", regex=False)
+        filepath = os.path.join(self.conf.data_dir, self.INPUT_FILE)
 
-        # 4. Pivot
-        df = df.pivot_table(
-            index="time_tag",
-            columns="energy",
-            values="observed_flux"
-        )
+        # 1-4. Parse, drop empty rows, normalize energy labels and pivot,
+        # all in one vectorized pass over the JSON records
+        df = read_xray_wide(filepath)
 
-        # 5. Replace 0 only in X-ray flux columns
-        df = df.replace(0, pd.NA)
+        # 5. Replace 0 only in X-ray flux columns (NaN keeps them float, pd.NA made them object)
+        df = df.replace(0, np.nan)
 
         # 6. Resample to 1-minute grid
         df = df.resample("1min").asfreq()
 
         # 7. Missingness flag BEFORE filling
-        df["is_missing"] = df.isna().any(axis=1).astype(int)
+        df["is_missing"] = df.isna().any(axis=1).astype(np.int8)
 
-        # 8. Fill missing values
-        pd.set_option('future.no_silent_downcasting', False)
-        df = df.ffill().bfill().infer_objects(copy=False)
+        # 8. Fill missing values, then store flux as float32
+        df = compact_dtypes(df.ffill().bfill())
 
         # 9. Rename columns
         df.columns = [f"xray_{col}" for col in df.columns]
@@ -1,30 +1,48 @@
-import pandas as pd
+import os
+
+import numpy as np
+
+from .background_flux import BackgroundFluxOperator
+
 
 class Xraybg_preprocessor:
+    STATE_FILE = "xraybg_state.npz"
+    LONG_CHANNEL_COL = "xray_0.1-0.8nm"
+    FILLED_COL = "xray_is_missing"
+
     def __init__(self, conf):
         self.conf = conf
+        self.state_path = os.path.join(self.conf.data_dir, self.STATE_FILE)
+        self.pending_path = self.state_path + ".pending"
 
     def preprocess_xraybg(self, df_xray):
         """
         Compute background X-ray flux from minute-level X-ray data
         using NOAA-style rolling operations.
+
+        Rolling state is carried over from the previous run, so only minutes
+        that are newer than the last processed one, or that revise a minute
+        filled in earlier, are computed and the windows do not warm up again
+        at the start of each download. The advanced state is only written as pending; call
+        commit_state once the rows are stored.
         """
-        
+
         # Select long-channel column
-        long_channel_col = "xray_0.1-0.8nm"
-        
-        # Copy X-ray dataframes
-        xray7day = df_xray.copy()
-        
-        # Apply hourly median filter
-        hourly_median = xray7day[long_channel_col].rolling(window=60, center=False, min_periods=1).median()
-
-        # Compute 24-hour rolling minimum
-        background_flux = hourly_median.rolling(window=1440, center=False, min_periods=1).min()
-
-        # Smooth background series
-        xray7daybg = background_flux.rolling(window=180, center=False, min_periods=1).mean()
-        xray7daybg = xray7daybg.rename("x_ray_bg")
-        
+        long_channel_col = self.LONG_CHANNEL_COL
+
+        # Hourly median -> 24-hour minimum -> 3-hour mean, continued from saved state
+        if os.path.exists(self.pending_path):
+            os.remove(self.pending_path)
+        operator = BackgroundFluxOperator(self.state_path)
+        xray7daybg = operator.update(df_xray[long_channel_col], filled=df_xray[self.FILLED_COL])
+        operator.save(self.pending_path)
+
+        # Rolling state stays float64; the stored column is float32
+        xray7daybg = xray7daybg.astype(np.float32).rename("x_ray_bg")
 
         return xray7daybg
+
+    def commit_state(self):
+        """Make the pending rolling state current, once the dataset store holds its rows."""
+        if os.path.exists(self.pending_path):
+            os.replace(self.pending_path, self.state_path)
@@ -1,3 +1,18 @@
+import argparse
 from features_pipeline import PreprocesserManager
 
-preprocess_manager = PreprocesserManager()
\ No newline at end of file
+parser = argparse.ArgumentParser(description="Download and preprocess the NOAA feeds into the dataset.")
+parser.add_argument("--workers", type=int, default=1,
+                    help="Worker processes for preprocessing; >1 runs the X-ray and EUV branches in parallel")
+parser.add_argument("--no-cache", action="store_true",
+                    help="Reprocess every feed instead of reusing cached stage outputs")
+parser.add_argument("--backfill", metavar="ARCHIVE_DIR",
+                    help="Ingest archived xrays-*/euvs-* JSON or CSV files instead of the live 7-day feeds")
+parser.add_argument("--chunk-days", type=int, default=7,
+                    help="Days of history processed per backfill chunk (default: 7)")
+if __name__ == "__main__":
+    # Guarded: worker processes may be spawned and re-import this module
+    args = parser.parse_args()
+
+    preprocess_manager = PreprocesserManager(workers=args.workers, use_cache=not args.no_cache,
+                                             backfill_dir=args.backfill, chunk_days=args.chunk_days)
@@ -1,3 +1,9 @@
+import argparse
 from inference_pipeline import Inference_Manager
 
-inf_man = Inference_Manager()
\ No newline at end of file
+parser = argparse.ArgumentParser(description="Predict the next solar flare class.")
+parser.add_argument("--model", choices=["lstm", "student"], default=None,
+                    help="Trained LSTM or distilled student (default: SFP_INFERENCE_MODEL or lstm)")
+args = parser.parse_args()
+
+inf_man = Inference_Manager(model=args.model)
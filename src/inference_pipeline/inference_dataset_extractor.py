@@ -1,35 +1,32 @@
-import os
-import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+import pandas as pd
+
+from dataset_store import read_dataset_tail
 
 
 class InferenceDatasetExtractor:
-    """Extract the last 180 feature rows for inference."""
+    """Extract the last window_size feature rows for inference."""
 
-    def __init__(self, csv_path):
+    def __init__(self, csv_path, store_dir=None, window_size=180):
         self.csv_path = csv_path
+        self.store_dir = store_dir
+        self.window_size = window_size
         self.DROP_COLS = ["time_tag", "xray_0.1-0.8nm"]
         self.last_date = None
 
     def create_inference_set(self):
-        if not os.path.isfile(self.csv_path):
-            raise FileNotFoundError(f"CSV not found: {self.csv_path}")
-
-        df = pd.read_csv(self.csv_path)
+        # Tail read: cost does not grow with the dataset history
+        df = read_dataset_tail(self.store_dir, self.csv_path, self.window_size)
 
         # Convert time_tag to datetime
         self.last_date = pd.to_datetime(df["time_tag"].iloc[-1])
 
         feature_cols = [c for c in df.columns if c not in self.DROP_COLS]
-        X = df[feature_cols].values.astype(np.float32)
+        X = df[feature_cols].to_numpy(dtype=np.float32)
 
-        if len(X) < 180:
+        if len(X) < self.window_size:
             raise ValueError(
-                f"Dataset too small: requires at least 180 rows, found {len(X)}"
+                f"Dataset too small: requires at least {self.window_size} rows, found {len(X)}"
             )
 
-        return X[-180:]
-
-    def get_prediction_date_validity(self):
-        return self.last_date + timedelta(minutes=90)
+        return X[-self.window_size:]
@@ -0,0 +1,175 @@
+import json
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+from scaling_kernel import ScalingKernel
+from .solar_flare_predictor import SolarFlarePredictor
+from .inference_scaler import InferenceScaler
+from .inference_dataset_extractor import InferenceDatasetExtractor
+from .solar_flare_classifier import SolarFlareClassifier
+
+
+class ArtifactMismatchError(RuntimeError):
+    """The model, scalers and horizons on disk do not belong together (e.g. mid-training)."""
+
+
+class InferenceEngine:
+    """
+    Keep the model and scalers loaded between predictions.
+    Artifacts are reloaded when their files change on disk.
+    A multi-horizon model returns its whole forecast curve from one forward
+    pass; the horizon of each output is read from the horizons file written
+    at training time. model selects the trained LSTM ("lstm") or the
+    distilled student ("student"); both share the scalers and horizons.
+    """
+
+    HORIZON_MINUTES = 90
+
+    def __init__(self, conf, model=None):
+        """Initialize paths from configuration and load artifacts."""
+        self.conf = conf
+        self.model_path = conf.inference_model_path(model)
+        self.predictor = None
+        self.scaler = None
+        self.horizons = None
+        self.artifact_stamp = None
+        self.loaded_at = None
+        self.lock = threading.Lock()
+
+        self.reload()
+
+    # ---------------------------------------------------------
+    # Artifacts
+    # ---------------------------------------------------------
+    def _artifact_paths(self):
+        names = [
+            ScalingKernel.ARTIFACT_NAME,
+            ScalingKernel.LEGACY_X_NAME,
+            ScalingKernel.LEGACY_Y_NAME,
+            ScalingKernel.LEGACY_META_NAME,
+        ]
+        return [self.model_path, self.conf.horizons_path] + [os.path.join(self.conf.model_dir, n) for n in names]
+
+    def _stamp(self):
+        stamp = []
+        for path in self._artifact_paths():
+            if os.path.exists(path):
+                stat = os.stat(path)
+                stamp.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(stamp)
+
+    def _load_horizons(self, n_outputs):
+        # Models trained before multi-horizon support have no horizons file
+        if os.path.exists(self.conf.horizons_path):
+            with open(self.conf.horizons_path, "r") as f:
+                horizons = json.load(f)["horizons"]
+        else:
+            horizons = [self.HORIZON_MINUTES]
+
+        if len(horizons) != n_outputs:
+            raise ArtifactMismatchError(f"Model has {n_outputs} output(s) but {len(horizons)} horizon(s) are recorded "
+                             f"in {self.conf.horizons_path}")
+        return np.asarray(horizons)
+
+    def reload(self):
+        """Load model and scalers from disk."""
+        with self.lock:
+            stamp = self._stamp()
+
+            predictor = SolarFlarePredictor(model_save_folder=self.model_path)
+            predictor.load()
+
+            scaler = InferenceScaler()
+            scaler.load(self.conf.model_dir)
+
+            # Warm-up call so the first real request does not pay graph tracing
+            predictor.predict_weather(np.zeros((1, predictor.window_size, predictor.n_features), dtype=np.float32))
+
+            horizons = self._load_horizons(predictor.n_outputs)
+
+            self.predictor, self.scaler, self.horizons = predictor, scaler, horizons
+            self.artifact_stamp = stamp
+            self.loaded_at = pd.Timestamp.now(tz="UTC")
+
+    def reload_if_changed(self):
+        """
+        Reload artifacts if any of them changed since the last load. Returns True on reload.
+        While the files on disk do not match each other (a training run is
+        replacing them), the previously loaded set keeps serving and the
+        reload is retried on the next call.
+        """
+        if self._stamp() == self.artifact_stamp:
+            return False
+        print("Model artifacts changed; reloading")
+        try:
+            self.reload()
+        except ArtifactMismatchError as e:
+            if self.predictor is None:
+                raise
+            print(f"Keeping the loaded model: {e}")
+            return False
+        return True
+
+    # ---------------------------------------------------------
+    # Predictions
+    # ---------------------------------------------------------
+    def predict_latest(self):
+        """Predict from the newest window of the dataset."""
+        extractor = InferenceDatasetExtractor(
+            self.conf.dataset_path,
+            store_dir=self.conf.store_dir,
+            window_size=self.predictor.window_size,
+        )
+        x_input = extractor.create_inference_set()   # shape (window, n_features)
+        return self.predict_window(x_input, last_date=extractor.last_date)
+
+    def predict_window(self, x_input, last_date=None):
+        """Predict from a raw (window, n_features) feature window."""
+        x_input = np.asarray(x_input, dtype=np.float32)
+        expected = (self.predictor.window_size, self.predictor.n_features)
+        if x_input.shape != expected:
+            raise ValueError(f"Expected window of shape {expected}, got {x_input.shape}")
+
+        with self.lock:
+            # Scale and add batch dimension: (1, window, n_features)
+            x_scaled = self.scaler.scale_inference_features(x_input)[np.newaxis, ...]
+
+            # Predict and decode back to real flux
+            y_scaled_pred = self.predictor.predict_weather(x_scaled)
+            y_real = self.scaler.decode_prediction(
+                y_scaled_pred,
+                applied_log10=self.scaler.apply_log10_target,
+            )
+
+            horizons = self.horizons
+
+        # Whole curve decoded in one call: (1, n_horizons) -> (n_horizons,)
+        fluxes = y_real[0].astype(float)
+        valid_times = [None] * len(horizons)
+        if last_date is not None:
+            valid_times = (pd.Timestamp(last_date) + pd.to_timedelta(horizons, unit="min")).astype(str).tolist()
+
+        forecast = [
+            {
+                "horizon_minutes": int(h),
+                "flux": flux,
+                "flare_class": SolarFlareClassifier.get_flare_class(flux),
+                "valid_for": valid_for,
+            }
+            for h, flux, valid_for in zip(horizons, fluxes, valid_times)
+        ]
+
+        # Top-level fields keep describing the HORIZON_MINUTES forecast (the longest one otherwise)
+        primary = int(np.flatnonzero(horizons == self.HORIZON_MINUTES)[0]) if self.HORIZON_MINUTES in horizons else -1
+        flare_class = forecast[primary]["flare_class"]
+
+        return {
+            "flux": forecast[primary]["flux"],
+            "flare_class": flare_class,
+            "description": SolarFlareClassifier.get_alert_description(flare_class),
+            "last_time_tag": None if last_date is None else str(last_date),
+            "valid_for": forecast[primary]["valid_for"],
+            "forecast": forecast,
+        }
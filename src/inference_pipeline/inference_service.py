@@ -0,0 +1,103 @@
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from .inference_engine import InferenceEngine
+
+
+class InferenceService:
+    """
+    Long-lived local HTTP/JSON service around InferenceEngine.
+
+    Endpoints:
+    - GET  /health   service and artifact status
+    - GET  /predict  predict from the newest dataset window
+    - POST /predict  predict from {"window": [[...], ...], "last_time_tag": optional}
+    """
+
+    def __init__(self, conf, host="127.0.0.1", port=8765, model=None):
+        """Load artifacts once and bind the HTTP server."""
+        self.engine = InferenceEngine(conf, model=model)
+        self.started = time.time()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+
+    def serve_forever(self):
+        host, port = self.server.server_address[:2]
+        print(f"Inference service listening on http://{host}:{port}")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+
+    def shutdown(self):
+        self.server.shutdown()
+
+    def health(self):
+        return {
+            "status": "ok",
+            "uptime_s": round(time.time() - self.started, 1),
+            "model_path": self.engine.model_path,
+            "window_size": self.engine.predictor.window_size,
+            "n_features": self.engine.predictor.n_features,
+            "artifacts_loaded_at": str(self.engine.loaded_at),
+        }
+
+    def _handler_class(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = urlparse(self.path).path
+                if path == "/health":
+                    self._reply(200, service.health())
+                elif path == "/predict":
+                    self._run(lambda: service.engine.predict_latest())
+                else:
+                    self._reply(404, {"error": f"Unknown path: {path}"})
+
+            def do_POST(self):
+                path = urlparse(self.path).path
+                if path != "/predict":
+                    self._reply(404, {"error": f"Unknown path: {path}"})
+                    return
+
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                    if not isinstance(body, dict):
+                        raise ValueError(f"expected a JSON object, got {type(body).__name__}")
+                    window = body["window"]
+                except (ValueError, KeyError) as e:
+                    self._reply(400, {"error": f"Invalid request body: {e}"})
+                    return
+
+                self._run(lambda: service.engine.predict_window(window, last_date=body.get("last_time_tag")))
+
+            def _run(self, predict):
+                # Artifacts that fail to load are a server-side problem, never a bad request
+                try:
+                    service.engine.reload_if_changed()
+                except Exception as e:
+                    self._reply(503, {"error": f"Model artifacts unavailable: {type(e).__name__}: {e}"})
+                    return
+
+                try:
+                    self._reply(200, predict())
+                except ValueError as e:
+                    self._reply(400, {"error": str(e)})
+                except Exception as e:
+                    self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+
+            def _reply(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, fmt, *args):
+                print(f"[service] {self.address_string()} {fmt % args}")
+
+        return Handler
@@ -18,6 +18,7 @@ class SolarFlarePredictor:
         self.n_features = n_features
         self.learning_rate = learning_rate
         self.model_save_folder = model_save_folder
+        self.n_outputs = 1
         
         # Initialize model attribute
         self.model = None 
@@ -47,9 +48,10 @@ class SolarFlarePredictor:
             self.model = load_model(self.model_save_folder)
             print(f"Loaded model from {self.model_save_folder}")
             
-            # Update input dimensions
+            # Update input and output dimensions
             self.window_size = self.model.input_shape[1]
             self.n_features = self.model.input_shape[2]
+            self.n_outputs = self.model.output_shape[-1]
         else:
             raise FileNotFoundError(f"Error: The file {self.model_save_folder} does not exists.")
 
@@ -63,7 +65,8 @@ class SolarFlarePredictor:
         if self.model is None:
             raise ValueError("Error you must load a model before predicting.")
                     
-        scaled_prediction = self.model.predict(X_recent_window)
+        # Direct call avoids model.predict() per-call overhead on small batches
+        scaled_prediction = self.model(X_recent_window, training=False).numpy()
                 
                 
         return scaled_prediction
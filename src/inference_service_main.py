@@ -0,0 +1,15 @@
+import argparse
+from config import Config
+from inference_pipeline.inference_service import InferenceService
+
+conf = Config()
+
+parser = argparse.ArgumentParser(description="Run the long-lived local inference service.")
+parser.add_argument("--host", default=conf.inference_host)
+parser.add_argument("--port", type=int, default=conf.inference_port)
+parser.add_argument("--model", choices=["lstm", "student"], default=None,
+                    help="Trained LSTM or distilled student (default: SFP_INFERENCE_MODEL or lstm)")
+args = parser.parse_args()
+
+service = InferenceService(conf, host=args.host, port=args.port, model=args.model)
+service.serve_forever()
@@ -0,0 +1,210 @@
+import os
+import joblib
+import numpy as np
+
+
+class ScalingKernel:
+    """
+    Shared float32 min-max scaling with safe log10 target encoding.
+
+    Sanitize, log10 and scale run block by block on one float32 buffer
+    using the precomputed scale_/min_ vectors, so each block is touched
+    while it is still in cache and no float64 copy is ever made.
+    Parameters are persisted in a single .npz artifact; the legacy
+    joblib pickles are still accepted by load().
+    """
+
+    ARTIFACT_NAME = "solar_scaler.npz"
+    ARTIFACT_VERSION = 1
+    LEGACY_X_NAME = "solar_x_scaler.pkl"
+    LEGACY_Y_NAME = "solar_y_scaler.pkl"
+    LEGACY_META_NAME = "solar_scaler_meta.pkl"
+
+    BLOCK_ROWS = 16384
+    POSINF = 1e10
+    NEGINF = -1e10
+
+    def __init__(self, x_data_min, x_data_max, y_data_min, y_data_max,
+                 feature_range=(0, 1), eps=1e-10, apply_log10_target=True):
+        """Initialize from fitted data ranges and precompute scale/min vectors."""
+        self.x_data_min = np.asarray(x_data_min, dtype=np.float64).ravel()
+        self.x_data_max = np.asarray(x_data_max, dtype=np.float64).ravel()
+        self.y_data_min = np.asarray(y_data_min, dtype=np.float64).ravel()
+        self.y_data_max = np.asarray(y_data_max, dtype=np.float64).ravel()
+        self.feature_range = tuple(float(v) for v in feature_range)
+        self.eps = float(eps)
+        self.apply_log10_target = bool(apply_log10_target)
+
+        self.x_scale, self.x_min = self._scale_and_min(self.x_data_min, self.x_data_max)
+        self.y_scale, self.y_min = self._scale_and_min(self.y_data_min, self.y_data_max)
+
+    def _scale_and_min(self, data_min, data_max):
+        # Same formula as sklearn MinMaxScaler, zero ranges scale by 1
+        lo, hi = self.feature_range
+        data_range = data_max - data_min
+        data_range[data_range == 0.0] = 1.0
+        scale = (hi - lo) / data_range
+        min_ = lo - data_min * scale
+        return scale.astype(np.float32), min_.astype(np.float32)
+
+    @classmethod
+    def from_sklearn(cls, x_scaler, y_scaler, eps=1e-10, apply_log10_target=True):
+        """Build a kernel from fitted sklearn MinMaxScaler objects."""
+        return cls(
+            x_scaler.data_min_, x_scaler.data_max_,
+            y_scaler.data_min_, y_scaler.data_max_,
+            feature_range=x_scaler.feature_range,
+            eps=eps,
+            apply_log10_target=apply_log10_target,
+        )
+
+    @property
+    def n_features(self):
+        return len(self.x_scale)
+
+    # ---------------------------------------------------------
+    # Kernels
+    # ---------------------------------------------------------
+    def transform_features(self, X, out=None):
+        """
+        Sanitize and scale features of shape (..., n_features) to float32.
+        Pass out=X to scale a float32 C-contiguous array in place.
+        """
+        in_place = out is X
+        X = np.asarray(X)
+        if out is None:
+            out = np.empty(X.shape, dtype=np.float32)
+
+        src = X.reshape(-1, X.shape[-1])
+        dst = out.reshape(-1, X.shape[-1])
+
+        for start in range(0, len(dst), self.BLOCK_ROWS):
+            block = dst[start : start + self.BLOCK_ROWS]
+            if not in_place:
+                block[...] = src[start : start + self.BLOCK_ROWS]
+            np.nan_to_num(block, copy=False, nan=0.0, posinf=self.POSINF, neginf=self.NEGINF)
+            block *= self.x_scale
+            block += self.x_min
+
+        return out
+
+    def encode_targets(self, y, apply_log10=None, out=None):
+        """Sanitize, log10 and scale targets; returns float32 of shape (n, k)."""
+        if apply_log10 is None:
+            apply_log10 = self.apply_log10_target
+
+        in_place = out is y
+        y = np.asarray(y)
+        src = y.reshape(-1, 1) if y.ndim == 1 else y.reshape(len(y), -1)
+        if out is None:
+            out = np.empty(src.shape, dtype=np.float32)
+        dst = out.reshape(src.shape)
+
+        for start in range(0, len(dst), self.BLOCK_ROWS):
+            block = dst[start : start + self.BLOCK_ROWS]
+            if not in_place:
+                block[...] = src[start : start + self.BLOCK_ROWS]
+            np.nan_to_num(block, copy=False, nan=0.0, posinf=self.POSINF, neginf=self.NEGINF)
+            if apply_log10:
+                np.copyto(block, self.eps, where=block <= 0)
+                np.log10(block, out=block)
+            block *= self.y_scale
+            block += self.y_min
+
+        return out
+
+    def decode_targets(self, y_scaled, apply_log10=None):
+        """Undo scaling (and log10) of model output; returns float32."""
+        if apply_log10 is None:
+            apply_log10 = self.apply_log10_target
+
+        out = np.array(y_scaled, dtype=np.float32)
+        out -= self.y_min
+        out /= self.y_scale
+        if apply_log10:
+            np.power(np.float32(10.0), out, out=out)
+        return out
+
+    # ---------------------------------------------------------
+    # Save / load
+    # ---------------------------------------------------------
+    def save(self, folder_path):
+        """Write all parameters to a single .npz file, atomically."""
+        os.makedirs(folder_path, exist_ok=True)
+        path = os.path.join(folder_path, self.ARTIFACT_NAME)
+        tmp_path = path + ".tmp"
+
+        with open(tmp_path, "wb") as f:
+            np.savez(f, params=self._pack())
+        os.replace(tmp_path, path)
+        return path
+
+    def _pack(self):
+        # One flat float64 vector so loading reads a single archive member:
+        # [version, n_x, n_y, range_lo, range_hi, eps, log10, x_min, x_max, y_min, y_max]
+        header = [
+            self.ARTIFACT_VERSION,
+            len(self.x_data_min),
+            len(self.y_data_min),
+            *self.feature_range,
+            self.eps,
+            float(self.apply_log10_target),
+        ]
+        return np.concatenate([
+            np.asarray(header, dtype=np.float64),
+            self.x_data_min, self.x_data_max,
+            self.y_data_min, self.y_data_max,
+        ])
+
+    @classmethod
+    def _unpack(cls, params):
+        version, n_x, n_y, lo, hi, eps, log10 = params[:7]
+        if int(version) != cls.ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported scaler artifact version: {int(version)}")
+
+        n_x, n_y = int(n_x), int(n_y)
+        x_min, x_max, y_min, y_max = np.split(params[7:], np.cumsum([n_x, n_x, n_y]))
+        return cls(
+            x_min, x_max, y_min, y_max,
+            feature_range=(lo, hi),
+            eps=eps,
+            apply_log10_target=bool(log10),
+        )
+
+    @classmethod
+    def exists(cls, folder_path):
+        """Return True if a .npz or legacy pickle artifact is present."""
+        return os.path.exists(os.path.join(folder_path, cls.ARTIFACT_NAME)) or (
+            os.path.exists(os.path.join(folder_path, cls.LEGACY_X_NAME))
+            and os.path.exists(os.path.join(folder_path, cls.LEGACY_Y_NAME))
+        )
+
+    @classmethod
+    def load(cls, folder_path):
+        """Load the .npz artifact, falling back to the legacy joblib pickles."""
+        path = os.path.join(folder_path, cls.ARTIFACT_NAME)
+        if os.path.exists(path):
+            with np.load(path) as data:
+                return cls._unpack(data["params"])
+
+        return cls._load_legacy(folder_path)
+
+    @classmethod
+    def _load_legacy(cls, folder_path):
+        path_x = os.path.join(folder_path, cls.LEGACY_X_NAME)
+        path_y = os.path.join(folder_path, cls.LEGACY_Y_NAME)
+        meta_path = os.path.join(folder_path, cls.LEGACY_META_NAME)
+
+        if not os.path.exists(path_x) or not os.path.exists(path_y):
+            raise FileNotFoundError(
+                f"Scaler files not found. Expected: '{cls.ARTIFACT_NAME}' "
+                f"or '{cls.LEGACY_X_NAME}' and '{cls.LEGACY_Y_NAME}'."
+            )
+
+        metadata = joblib.load(meta_path) if os.path.exists(meta_path) else {}
+        return cls.from_sklearn(
+            joblib.load(path_x),
+            joblib.load(path_y),
+            eps=metadata.get("eps", 1e-10),
+            apply_log10_target=metadata.get("apply_log10_target", True),
+        )
@@ -0,0 +1,49 @@
+import argparse
+
+from config import Config
+from training_pipeline.train_set_creator import TrainSetCreator
+from training_pipeline.window_cache import WindowCache
+from training_pipeline.sweep import SweepRunner, DEFAULT_SPACE
+
+parser = argparse.ArgumentParser(description="Sweep window, horizon and LSTM hyperparameters in parallel.")
+parser.add_argument("--search", choices=["grid", "random"], default="grid",
+                    help="Full grid or a random sample of it")
+parser.add_argument("--trials", type=int, default=None,
+                    help="Maximum number of trials (random search samples this many)")
+parser.add_argument("--workers", type=int, default=1,
+                    help="Trials trained in parallel, each pinned to its own CPU cores")
+parser.add_argument("--epochs", type=int, default=10, help="Maximum epochs per trial")
+parser.add_argument("--window", type=int, nargs="+", default=DEFAULT_SPACE["window"],
+                    help="Window sizes to try")
+parser.add_argument("--horizon", type=int, nargs="+", default=DEFAULT_SPACE["horizon"],
+                    help="Forecast horizons to try")
+parser.add_argument("--units", nargs="+", default=["-".join(map(str, u)) for u in DEFAULT_SPACE["lstm_units"]],
+                    help="LSTM layer sizes to try, e.g. 64-32 128-64")
+parser.add_argument("--lr", type=float, nargs="+", default=DEFAULT_SPACE["learning_rate"],
+                    help="Learning rates to try")
+parser.add_argument("--max-missing-fraction", type=float, default=None,
+                    help="Skip windows whose span has more than this fraction of filled rows")
+parser.add_argument("--seed", type=int, default=0, help="Random search seed")
+
+if __name__ == "__main__":
+    # Guarded: worker processes are spawned and re-import this module
+    args = parser.parse_args()
+    conf = Config()
+
+    space = {
+        "window": args.window,
+        "horizon": args.horizon,
+        "lstm_units": [tuple(int(u) for u in units.split("-")) for units in args.units],
+        "learning_rate": args.lr,
+    }
+
+    # Base rows are loaded once; every trial maps the same memmap
+    tr_dataset_cr = TrainSetCreator(conf.dataset_path, cache_dir=conf.window_cache_dir, store_dir=conf.store_dir)
+    X, y = tr_dataset_cr.load_base_arrays()
+    cache = WindowCache(conf.window_cache_dir, tr_dataset_cr.window, tr_dataset_cr.horizon,
+                        TrainSetCreator.DROP_COLS, TrainSetCreator.TARGET_COL)
+
+    runner = SweepRunner(conf.sweep_dir, space=space, search=args.search, n_trials=args.trials,
+                         workers=args.workers, epochs=args.epochs, seed=args.seed)
+    runner.run(X, y, cache, feature_cols=tr_dataset_cr.feature_cols,
+               max_missing_fraction=args.max_missing_fraction, flag_cols=TrainSetCreator.MISSING_FLAG_COLS)
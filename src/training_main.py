@@ -1,3 +1,57 @@
+import argparse
 from training_pipeline import Training_Manager
+from training_pipeline.performance import PerformanceProfile, parse_cores
 
-t_m = Training_Manager()
+parser = argparse.ArgumentParser(description="Train the solar flare predictor.")
+parser.add_argument("--streaming", action="store_true",
+                    help="Cut windows on the fly from the memory-mapped cache with tf.data")
+parser.add_argument("--max-missing-fraction", type=float, default=None,
+                    help="Skip windows whose span has more than this fraction of filled rows (e.g. 0.2)")
+parser.add_argument("--walk-forward", type=int, default=None, metavar="FOLDS",
+                    help="Run walk-forward cross-validation with this many folds instead of training")
+parser.add_argument("--cv-workers", type=int, default=1,
+                    help="Folds trained in parallel, each pinned to its own CPU cores")
+parser.add_argument("--embargo", type=int, default=0,
+                    help="Extra rows dropped before each test block, on top of the window+horizon purge")
+parser.add_argument("--incremental", action="store_true",
+                    help="Fine-tune the saved model on rows added since the last training")
+parser.add_argument("--replay-ratio", type=float, default=1.0,
+                    help="Older windows replayed per new window when fine-tuning")
+parser.add_argument("--finetune-epochs", type=int, default=3,
+                    help="Epochs of incremental fine-tuning")
+parser.add_argument("--xla", action="store_true", help="Compile the train step with XLA")
+parser.add_argument("--threads", type=int, default=None, help="TensorFlow intra-op threads (default: one per core)")
+parser.add_argument("--inter-threads", type=int, default=None, help="TensorFlow inter-op threads")
+parser.add_argument("--cores", type=str, default=None, help="Pin training to these CPU cores, e.g. 0-15,32-47")
+parser.add_argument("--batch-size", type=int, default=64, help="Training batch size")
+parser.add_argument("--tune-batch", action="store_true",
+                    help="Measure candidate batch sizes before training and pick one")
+parser.add_argument("--target-sps", type=float, default=None,
+                    help="With --tune-batch: smallest batch size reaching this many samples/sec")
+parser.add_argument("--horizons", type=int, nargs="+", default=None,
+                    help="Train a multi-horizon head forecasting these minutes ahead, e.g. 15 30 60 90 120")
+parser.add_argument("--resume", action="store_true",
+                    help="Checkpoint the (streaming) run periodically and continue an interrupted one")
+parser.add_argument("--checkpoint-every", type=int, default=500,
+                    help="With --resume: train steps between checkpoints (epoch ends are always checkpointed)")
+parser.add_argument("--distill", choices=["conv", "gru"], default=None,
+                    help="Distill the trained model into a small dilated-conv or GRU student instead of training")
+parser.add_argument("--distill-alpha", type=float, default=0.5,
+                    help="Weight of the teacher's predictions versus ground truth in the student's targets")
+parser.add_argument("--distill-epochs", type=int, default=10, help="Student training epochs")
+
+if __name__ == "__main__":
+    # Guarded: worker processes are spawned and re-import this module
+    args = parser.parse_args()
+    profile = PerformanceProfile(jit_compile=args.xla, intra_op_threads=args.threads,
+                                 inter_op_threads=args.inter_threads,
+                                 cores=parse_cores(args.cores) if args.cores else None,
+                                 batch_size=args.batch_size, target_samples_per_sec=args.target_sps)
+
+    t_m = Training_Manager(streaming=args.streaming, max_missing_fraction=args.max_missing_fraction,
+                           cv_folds=args.walk_forward, cv_workers=args.cv_workers, cv_embargo=args.embargo,
+                           incremental=args.incremental, replay_ratio=args.replay_ratio,
+                           finetune_epochs=args.finetune_epochs, profile=profile, tune_batch=args.tune_batch,
+                           horizons=args.horizons, resumable=args.resume,
+                           save_every_steps=args.checkpoint_every, distill=args.distill,
+                           distill_alpha=args.distill_alpha, distill_epochs=args.distill_epochs)
@@ -0,0 +1,111 @@
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.models import Sequential, load_model
+from tensorflow.keras.layers import Conv1D, GRU, Dense, Input, GlobalAveragePooling1D
+from tensorflow.keras.optimizers import Adam
+from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
+
+
+STUDENT_KINDS = ("conv", "gru")
+
+
+def build_student(kind, window_size, n_features, n_outputs=1, learning_rate=0.001):
+    """
+    Build and compile a small student model.
+    - conv: stack of causal dilated 1D convolutions (receptive field 63 steps
+      with dilations 1..16) pooled over time; every step runs in parallel.
+    - gru: a single 16-unit GRU layer.
+    """
+    if kind == "conv":
+        layers = [Input(shape=(window_size, n_features))]
+        for dilation in (1, 2, 4, 8, 16):
+            layers.append(Conv1D(filters=16, kernel_size=3, dilation_rate=dilation,
+                                 padding="causal", activation="relu"))
+        layers += [GlobalAveragePooling1D(), Dense(units=16, activation="relu")]
+    elif kind == "gru":
+        layers = [Input(shape=(window_size, n_features)), GRU(units=16, activation="tanh")]
+    else:
+        raise ValueError(f"Unknown student kind '{kind}', expected one of {STUDENT_KINDS}")
+
+    model = Sequential(layers + [Dense(units=n_outputs, activation="linear")])
+    model.compile(optimizer=Adam(learning_rate=learning_rate), loss="mse", metrics=["mae"])
+    return model
+
+
+class Distiller:
+    """
+    Knowledge distillation of the LSTM teacher into a cheaper student.
+
+    The teacher is run once over the historical windows; the student is then
+    trained on soft targets alpha * teacher + (1 - alpha) * ground truth
+    (in scaled space), which for MSE is the alpha-weighted sum of the two
+    losses up to a constant. Windows are cut on the fly from the scaled base
+    rows, like the teacher's streaming training.
+    """
+
+    def __init__(self, teacher_path, student_path, kind="conv", alpha=0.5, epochs=10):
+        """Initialize model paths, student type and distillation weight."""
+        if not 0.0 <= alpha <= 1.0:
+            raise ValueError(f"alpha must be in [0, 1], got {alpha}")
+        self.teacher_path = teacher_path
+        self.student_path = student_path
+        self.kind = kind
+        self.alpha = alpha
+        self.epochs = epochs
+
+        self.teacher = load_model(teacher_path)
+        self.student = None
+        self.history = None
+
+    def teacher_targets(self, stream, starts):
+        """Teacher predictions for the given windows, shape (n, n_outputs)."""
+        inputs = stream.make(starts).map(lambda x, y: x)
+        return self.teacher.predict(inputs, verbose=0).astype(np.float32)
+
+    def soft_dataset(self, stream, starts, soft_targets):
+        """Batched dataset of (window, soft target) pairs."""
+        ds = tf.data.Dataset.from_tensor_slices((np.asarray(starts, dtype=np.int64), soft_targets))
+        ds = ds.batch(stream.batch_size)
+        ds = ds.map(lambda s, t: (stream.gather_inputs(s), t),
+                    num_parallel_calls=tf.data.AUTOTUNE, deterministic=True)
+        return ds.prefetch(stream.prefetch)
+
+    def run(self, stream, tr_starts, te_starts):
+        """Train the student and return validation metrics against teacher and ground truth."""
+        print(f"Distilling into a '{self.kind}' student: teacher pass over {len(tr_starts) + len(te_starts)} windows")
+        teacher_tr = self.teacher_targets(stream, tr_starts)
+        teacher_te = self.teacher_targets(stream, te_starts)
+        y_true_tr, y_true_te = stream.targets(tr_starts), stream.targets(te_starts)
+
+        soft_tr = self.alpha * teacher_tr + (1.0 - self.alpha) * y_true_tr
+        soft_te = self.alpha * teacher_te + (1.0 - self.alpha) * y_true_te
+
+        self.student = build_student(self.kind, self.teacher.input_shape[1], self.teacher.input_shape[2],
+                                     n_outputs=self.teacher.output_shape[-1])
+        self.student.summary()
+
+        callbacks = [
+            EarlyStopping(monitor="val_loss", patience=5, restore_best_weights=True),
+            ModelCheckpoint(filepath=self.student_path, monitor="val_loss", save_best_only=True, verbose=1),
+        ]
+        self.history = self.student.fit(
+            self.soft_dataset(stream, tr_starts, soft_tr),
+            validation_data=self.soft_dataset(stream, te_starts, soft_te),
+            epochs=self.epochs,
+            callbacks=callbacks,
+            shuffle=False,
+            verbose=1,
+        )
+
+        student_te = self.student.predict(stream.make(te_starts).map(lambda x, y: x), verbose=0)
+        metrics = {
+            "student": self.kind,
+            "teacher_params": int(self.teacher.count_params()),
+            "student_params": int(self.student.count_params()),
+            "student_vs_teacher_mse": float(np.mean((student_te - teacher_te) ** 2)),
+            "student_vs_truth_mse": float(np.mean((student_te - y_true_te) ** 2)),
+            "teacher_vs_truth_mse": float(np.mean((teacher_te - y_true_te) ** 2)),
+        }
+        for name, value in metrics.items():
+            print(f"{name}: {value}")
+        return metrics
@@ -0,0 +1,41 @@
+import numpy as np
+
+
+class GapIndex:
+    """
+    Prefix-sum index over the rows the preprocessors filled in.
+
+    prefix[i] is the number of filled rows before row i, so the filled count
+    of any row span [start, stop) is prefix[stop] - prefix[start]: constant
+    time per span and one vectorized expression for all windows at once.
+    """
+
+    def __init__(self, filled):
+        """Build the index from a boolean (rows,) array, True where a row was filled."""
+        filled = np.asarray(filled, dtype=bool)
+        dtype = np.int32 if len(filled) < np.iinfo(np.int32).max else np.int64
+
+        self.n_rows = len(filled)
+        self.prefix = np.zeros(len(filled) + 1, dtype=dtype)
+        np.cumsum(filled, dtype=dtype, out=self.prefix[1:])
+
+    @classmethod
+    def from_flags(cls, X, flag_idx):
+        """Build the index from the missingness flag columns of a feature matrix."""
+        filled = np.zeros(len(X), dtype=bool)
+        for idx in flag_idx:
+            filled |= np.asarray(X[:, idx]) != 0
+        return cls(filled)
+
+    def missing_count(self, starts, length):
+        """Filled rows in [start, start + length) for every start."""
+        starts = np.asarray(starts)
+        return self.prefix[starts + length] - self.prefix[starts]
+
+    def missing_fraction(self, starts, length):
+        """Fraction of filled rows in [start, start + length) for every start."""
+        return self.missing_count(starts, length) / length
+
+    def valid(self, starts, length, max_missing_fraction):
+        """Boolean mask of the spans with at most max_missing_fraction filled rows."""
+        return self.missing_fraction(starts, length) <= max_missing_fraction
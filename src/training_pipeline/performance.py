@@ -0,0 +1,147 @@
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.callbacks import Callback
+
+
+def parse_cores(spec):
+    """Parse a core list such as '0-7,16-23' into sorted core ids."""
+    cores = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = part.split("-")
+            cores.update(range(int(lo), int(hi) + 1))
+        else:
+            cores.add(int(part))
+    return sorted(cores)
+
+
+class ThroughputLogger(Callback):
+    """Log training samples/sec at the end of every epoch."""
+
+    def __init__(self, n_samples):
+        super().__init__()
+        self.n_samples = n_samples
+        self.samples_per_sec = []
+        self._t0 = None
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._t0 = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        # Epoch time includes validation, as seen by the caller
+        seconds = time.perf_counter() - self._t0
+        rate = self.n_samples / seconds if seconds > 0 else 0.0
+        self.samples_per_sec.append(rate)
+        if logs is not None:
+            logs["samples_per_sec"] = rate
+        print(f"[Epoch {epoch + 1}] {self.n_samples} samples in {seconds:.1f}s: {rate:,.0f} samples/sec")
+
+
+class PerformanceProfile:
+    """
+    CPU performance settings for training.
+
+    - jit_compile: compile the train step with XLA.
+    - intra_op_threads / inter_op_threads: TensorFlow thread pool sizes
+      (None keeps TensorFlow's default of one per core).
+    - cores: CPU cores the training process is pinned to.
+    - batch_size / prefetch: input pipeline batching and prefetch depth.
+    - target_samples_per_sec: with tune_batch_size(), the smallest candidate
+      batch size reaching this throughput is chosen; without a target the
+      fastest candidate wins.
+
+    apply() must run before TensorFlow executes its first op, because the
+    thread pools cannot be resized afterwards.
+    """
+
+    BATCH_CANDIDATES = (64, 128, 256, 512, 1024)
+    PROBE_STEPS = 8
+    WARMUP_STEPS = 2
+
+    def __init__(self, jit_compile=False, intra_op_threads=None, inter_op_threads=None, cores=None,
+                 batch_size=64, prefetch=tf.data.AUTOTUNE, target_samples_per_sec=None,
+                 batch_candidates=None):
+        """Initialize compilation, threading and batching settings."""
+        self.jit_compile = jit_compile
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.cores = list(cores) if cores is not None else None
+        self.batch_size = batch_size
+        self.prefetch = prefetch
+        self.target_samples_per_sec = target_samples_per_sec
+        self.batch_candidates = tuple(batch_candidates or self.BATCH_CANDIDATES)
+
+    def apply(self):
+        """Pin the process to the configured cores and size TensorFlow's thread pools."""
+        if self.cores is not None and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, self.cores)
+            os.environ["OMP_NUM_THREADS"] = str(self.intra_op_threads or len(self.cores))
+
+        intra = self.intra_op_threads
+        if intra is None and self.cores is not None:
+            intra = len(self.cores)
+
+        try:
+            if intra is not None:
+                tf.config.threading.set_intra_op_parallelism_threads(intra)
+            if self.inter_op_threads is not None:
+                tf.config.threading.set_inter_op_parallelism_threads(self.inter_op_threads)
+        except RuntimeError:
+            print("Warning: TensorFlow runtime already initialized; thread settings ignored")
+
+        print(f"Performance profile: xla={self.jit_compile}, "
+              f"intra_op={tf.config.threading.get_intra_op_parallelism_threads() or 'default'}, "
+              f"inter_op={tf.config.threading.get_inter_op_parallelism_threads() or 'default'}, "
+              f"cores={self.cores or 'all'}, batch_size={self.batch_size}")
+
+    def measure(self, model, dataset, steps=None):
+        """Train model on dataset for a few steps; returns samples/sec after warm-up."""
+        steps = steps or self.PROBE_STEPS
+        batches = list(dataset.take(self.WARMUP_STEPS + steps))
+        if len(batches) <= self.WARMUP_STEPS:
+            return 0.0
+
+        # Warm-up steps absorb tracing and XLA compilation
+        for x, y in batches[: self.WARMUP_STEPS]:
+            model.train_on_batch(x, y)
+
+        n_samples = 0
+        t0 = time.perf_counter()
+        for x, y in batches[self.WARMUP_STEPS :]:
+            model.train_on_batch(x, y)
+            n_samples += len(x)
+        return n_samples / (time.perf_counter() - t0)
+
+    def tune_batch_size(self, build_model, make_dataset):
+        """
+        Measure training throughput of each candidate batch size on a scratch
+        model and set self.batch_size to the chosen one.
+        build_model() returns a compiled model; make_dataset(batch_size)
+        returns a batched tf.data dataset.
+        """
+        rates = {}
+        for batch_size in self.batch_candidates:
+            rates[batch_size] = self.measure(build_model(), make_dataset(batch_size))
+            print(f"Batch size {batch_size}: {rates[batch_size]:,.0f} samples/sec")
+            tf.keras.backend.clear_session()
+
+        reaching = [b for b, rate in rates.items() if self.target_samples_per_sec is not None
+                    and rate >= self.target_samples_per_sec]
+        self.batch_size = min(reaching) if reaching else max(rates, key=rates.get)
+
+        if self.target_samples_per_sec is not None and not reaching:
+            print(f"No batch size reaches {self.target_samples_per_sec:,.0f} samples/sec")
+        print(f"Using batch size {self.batch_size} ({rates[self.batch_size]:,.0f} samples/sec)")
+        return self.batch_size
+
+    @staticmethod
+    def probe_dataset(x, y, batch_size, max_batches):
+        """Batched dataset over the first windows of in-memory arrays, for tuning."""
+        n = min(len(x), batch_size * max_batches)
+        return tf.data.Dataset.from_tensor_slices((np.asarray(x[:n]), np.asarray(y[:n]))).batch(batch_size)
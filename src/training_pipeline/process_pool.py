@@ -0,0 +1,112 @@
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+def available_cores():
+    """CPU cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def core_groups(n_workers):
+    """Split the available cores into at most n_workers disjoint, contiguous groups."""
+    cores = available_cores()
+    n_groups = max(1, min(n_workers, len(cores)))
+    return [group.tolist() for group in np.array_split(np.asarray(cores), n_groups)]
+
+
+def _pin_worker(groups):
+    # Each worker takes one core group. TensorFlow is already imported by now
+    # (spawn re-imports the parent's main module, and unpickling this function
+    # imports the training_pipeline package), so the thread variables only reach
+    # libraries initialized later; tasks size TensorFlow's own thread pools with
+    # walk_forward.limit_tf_threads() before running any op
+    cores = groups.get()
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+
+    os.environ["OMP_NUM_THREADS"] = str(len(cores))
+    os.environ["TF_NUM_INTRAOP_THREADS"] = str(len(cores))
+    os.environ["TF_NUM_INTEROP_THREADS"] = "1"
+
+
+def pinned_pool(n_workers):
+    """
+    Return a spawn-based ProcessPoolExecutor whose workers each pin themselves
+    to a disjoint subset of the CPU cores, so parallel TensorFlow trainings do
+    not oversubscribe the machine. Tasks must still call limit_tf_threads()
+    first, since TensorFlow is imported before the pinning runs.
+    """
+    ctx = mp.get_context("spawn")
+    groups = core_groups(n_workers)
+
+    queue = ctx.Queue()
+    for group in groups:
+        queue.put(group)
+
+    return ProcessPoolExecutor(max_workers=len(groups), mp_context=ctx,
+                               initializer=_pin_worker, initargs=(queue,))
+
+
+def memmap_spec(arr):
+    """Describe a np.memmap so worker processes can map the same file instead of receiving a copy."""
+    if not isinstance(arr, np.memmap) or arr.filename is None:
+        raise ValueError("Expected a file-backed np.memmap")
+    return {"path": arr.filename, "dtype": arr.dtype.str, "shape": arr.shape, "offset": arr.offset}
+
+
+def open_memmap(spec):
+    """Map a memmap_spec read-only."""
+    return np.memmap(spec["path"], dtype=np.dtype(spec["dtype"]), mode="r",
+                     shape=tuple(spec["shape"]), offset=spec["offset"])
+
+
+def scratch_memmap(path, shape):
+    """Writable float32 memmap at path, for a worker's own scaled copy of shared rows."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    return np.memmap(path, dtype=np.float32, mode="w+", shape=shape)
+
+
+def scaled_scratch(training_scaler, X, y, folder):
+    """
+    Scale base rows into scratch memmaps in folder instead of RAM, so parallel
+    workers keep sharing pages instead of each holding a private copy.
+    Returns the scaled (X, y) memmaps and their paths (to remove when done).
+    """
+    paths = [os.path.join(folder, "scaled_features.dat"), os.path.join(folder, "scaled_targets.dat")]
+    X_scaled, y_scaled = training_scaler.scale_rows(
+        X, y,
+        out_x=scratch_memmap(paths[0], X.shape),
+        out_y=scratch_memmap(paths[1], (len(y), 1)),
+    )
+    X_scaled.flush()
+    y_scaled.flush()
+    return X_scaled, y_scaled, paths
+
+
+def remove_scratch(paths):
+    """Delete scratch memmap files (mapped views stay valid until released)."""
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def shared_base_arrays(X, y, cache):
+    """
+    Return memmap specs of the base rows and targets.
+    Arrays that are not already memory-mapped are written once to scratch
+    memmaps next to the window cache.
+    """
+    specs = []
+    for name, arr in (("shared_features", X), ("shared_targets", y)):
+        if not isinstance(arr, np.memmap):
+            out = cache.scratch_memmap(name, arr.shape)
+            out[...] = arr
+            out.flush()
+            arr = out
+        specs.append(memmap_spec(arr))
+    return specs
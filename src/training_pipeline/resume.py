@@ -0,0 +1,203 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.callbacks import Callback
+from tensorflow.keras.models import load_model
+
+
+def run_key(n_rows, tr_starts, te_starts, window, horizons):
+    """Fingerprint of a training run's data order; a checkpoint only resumes the same run."""
+    hasher = hashlib.sha256()
+    hasher.update(json.dumps([int(n_rows), int(window), [int(h) for h in horizons]]).encode())
+    hasher.update(np.ascontiguousarray(tr_starts, dtype=np.int64).tobytes())
+    hasher.update(np.ascontiguousarray(te_starts, dtype=np.int64).tobytes())
+    return hasher.hexdigest()
+
+
+def rows_digest(*arrays, n=16):
+    """Digest of the first and last n rows of each array (cheap check that scaled memmaps are intact)."""
+    hasher = hashlib.sha256()
+    for arr in arrays:
+        hasher.update(np.ascontiguousarray(arr[:n]).tobytes())
+        hasher.update(np.ascontiguousarray(arr[-n:]).tobytes())
+    return hasher.hexdigest()
+
+
+def cursor_variable(value=0):
+    """Data cursor (windows to skip) read by StreamingWindowDataset.make(skip=...)."""
+    return tf.Variable(int(value), dtype=tf.int64, trainable=False)
+
+
+class TrainingCheckpoint:
+    """
+    Atomic on-disk checkpoints of a training run.
+
+    Each checkpoint is written to its own ckpt-<n> folder: the full model
+    (weights and optimizer state), the early-stopping best weights and a
+    state.json with epoch, step, callback state and data cursor. The
+    LATEST file is switched to the new folder with an atomic rename only
+    once it is complete, so a run killed mid-write resumes from the
+    previous checkpoint. Older folders beyond keep are removed.
+    """
+
+    LATEST_FILE = "LATEST"
+    STATE_FILE = "state.json"
+    MODEL_FILE = "model.keras"
+    BEST_WEIGHTS_FILE = "best_weights.npz"
+
+    def __init__(self, resume_dir, keep=2):
+        """Initialize checkpoint folder and how many checkpoints to keep."""
+        self.resume_dir = resume_dir
+        self.keep = keep
+        self.latest_path = os.path.join(resume_dir, self.LATEST_FILE)
+
+    def latest(self):
+        """Return (state, checkpoint folder) of the newest complete checkpoint, or None."""
+        if not os.path.exists(self.latest_path):
+            return None
+        with open(self.latest_path, "r") as f:
+            ckpt_dir = os.path.join(self.resume_dir, f.read().strip())
+
+        state_path = os.path.join(ckpt_dir, self.STATE_FILE)
+        if not os.path.exists(state_path):
+            return None
+        with open(state_path, "r") as f:
+            return json.load(f), ckpt_dir
+
+    def save(self, model, state, best_weights=None):
+        """Write a new checkpoint and make it the latest."""
+        os.makedirs(self.resume_dir, exist_ok=True)
+        name = f"ckpt-{state['epoch']:04d}-{state['step']:08d}"
+        ckpt_dir = os.path.join(self.resume_dir, name)
+        tmp_dir = ckpt_dir + ".tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        model.save(os.path.join(tmp_dir, self.MODEL_FILE))
+        if best_weights is not None:
+            np.savez(os.path.join(tmp_dir, self.BEST_WEIGHTS_FILE), *best_weights)
+        with open(os.path.join(tmp_dir, self.STATE_FILE), "w") as f:
+            json.dump(state, f, indent=2)
+
+        shutil.rmtree(ckpt_dir, ignore_errors=True)
+        os.replace(tmp_dir, ckpt_dir)
+
+        tmp_latest = self.latest_path + ".tmp"
+        with open(tmp_latest, "w") as f:
+            f.write(name)
+        os.replace(tmp_latest, self.latest_path)
+
+        self._prune(name)
+
+    def _prune(self, current):
+        ckpts = sorted(d for d in os.listdir(self.resume_dir) if d.startswith("ckpt-") and not d.endswith(".tmp"))
+        for name in ckpts[: -self.keep] if self.keep > 0 else ckpts:
+            if name != current:
+                shutil.rmtree(os.path.join(self.resume_dir, name), ignore_errors=True)
+
+    def load_model(self, ckpt_dir):
+        """Load the checkpointed model, compiled with its optimizer state."""
+        return load_model(os.path.join(ckpt_dir, self.MODEL_FILE))
+
+    def load_best_weights(self, ckpt_dir):
+        """Return the early-stopping best weights of a checkpoint, or None."""
+        path = os.path.join(ckpt_dir, self.BEST_WEIGHTS_FILE)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return [data[f"arr_{i}"] for i in range(len(data.files))]
+
+    def clear(self):
+        """Remove all checkpoints (e.g. once the run completed)."""
+        shutil.rmtree(self.resume_dir, ignore_errors=True)
+
+
+class ResumeCallback(Callback):
+    """
+    Save a TrainingCheckpoint every save_every_steps train steps and at every
+    epoch end, and restore the early-stopping / best-checkpoint state when a
+    run is resumed.
+
+    The data cursor is the number of windows of the current epoch already
+    trained on; the training dataset skips that many windows while skip_var
+    is non-zero, and the variable is reset once the resumed epoch ends.
+    Place it after the predictor's own callbacks so their state is up to
+    date when it is saved, and so it restores their state after their own
+    on_train_begin resets it.
+    """
+
+    def __init__(self, checkpoint, predictor, key, batch_size, save_every_steps=500,
+                 skip_var=None, restored=None, best_weights=None, extra_state=None):
+        """Initialize checkpoint target, run fingerprint, cursor and restored state."""
+        super().__init__()
+        self.checkpoint = checkpoint
+        self.predictor = predictor
+        self.key = key
+        self.batch_size = batch_size
+        self.save_every_steps = save_every_steps
+        self.skip_var = skip_var
+        self.restored = restored
+        self.best_weights = best_weights
+        self.extra_state = dict(extra_state or {})
+
+        self._epoch = restored["epoch"] if restored else 0
+        self._step_offset = restored["step"] if restored else 0
+
+    def callback_state(self):
+        """Early-stopping and best-checkpoint state worth carrying across a restart."""
+        state = {}
+        early_stop = self.predictor.early_stop
+        for attr in ("wait", "best", "stopped_epoch", "best_epoch"):
+            if getattr(early_stop, attr, None) is not None:
+                state[f"early_stop_{attr}"] = float(getattr(early_stop, attr))
+        if getattr(self.predictor.checkpoint, "best", None) is not None:
+            state["checkpoint_best"] = float(self.predictor.checkpoint.best)
+        return state
+
+    def on_train_begin(self, logs=None):
+        if not self.restored:
+            return
+
+        early_stop = self.predictor.early_stop
+        for attr in ("wait", "stopped_epoch", "best_epoch"):
+            if f"early_stop_{attr}" in self.restored:
+                setattr(early_stop, attr, int(self.restored[f"early_stop_{attr}"]))
+        if "early_stop_best" in self.restored:
+            early_stop.best = self.restored["early_stop_best"]
+        if self.best_weights is not None:
+            early_stop.best_weights = self.best_weights
+        if "checkpoint_best" in self.restored:
+            self.predictor.checkpoint.best = self.restored["checkpoint_best"]
+
+        print(f"Resumed at epoch {self._epoch + 1}, step {self._step_offset}")
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch = epoch
+
+    def on_train_batch_end(self, batch, logs=None):
+        step = self._step_offset + batch + 1
+        if self.save_every_steps and step % self.save_every_steps == 0:
+            self.save(self._epoch, step)
+
+    def on_epoch_end(self, epoch, logs=None):
+        # The resumed partial epoch is over; following epochs read every window
+        self._step_offset = 0
+        if self.skip_var is not None:
+            self.skip_var.assign(0)
+        self.save(epoch + 1, 0)
+
+    def save(self, epoch, step):
+        state = {
+            "key": self.key,
+            "epoch": epoch,
+            "step": step,
+            "batch_size": self.batch_size,
+            "cursor_windows": step * self.batch_size,
+            **self.extra_state,
+            **self.callback_state(),
+        }
+        self.checkpoint.save(self.model, state, best_weights=self.predictor.early_stop.best_weights)
@@ -1,10 +1,13 @@
 from tensorflow.keras.models import Sequential, load_model
 from tensorflow.keras.layers import LSTM, Dense, Dropout, Input
 from tensorflow.keras.optimizers import Adam
-from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
+from tensorflow.keras.callbacks import EarlyStopping
 import matplotlib.pyplot as plt
 import os
 
+from .performance import ThroughputLogger
+from .training_report import TimedModelCheckpoint, TrainingMonitor
+
 
 class SolarFlarePredictor:
     """
@@ -12,18 +15,31 @@ class SolarFlarePredictor:
     Handle model build, train, save, load, and prediction steps.
     """
 
-    def __init__(self, window_size=180, n_features=12, learning_rate=0.001, model_save_folder=None):
+    def __init__(self, window_size=180, n_features=12, learning_rate=0.001, model_save_folder=None,
+                 lstm_units=(64, 32), jit_compile=False, report_path=None, n_outputs=1):
         """
         Initialize model settings.
+        jit_compile compiles the train step with XLA; with report_path, training
+        performance is recorded there as JSON lines. n_outputs > 1 builds a
+        multi-horizon head with one output per forecast horizon.
         """
         self.window_size = window_size
         self.n_features = n_features
         self.learning_rate = learning_rate
+        self.lstm_units = tuple(lstm_units)
+        self.jit_compile = jit_compile
+        self.report_path = report_path
+        self.n_outputs = n_outputs
         self.model_save_folder = model_save_folder
 
         # Initialize model attribute
         self.model = None
         self.history = None
+        self.early_stop = None
+        self.checkpoint = None
+        self.report_append = False
+        # val_loss a checkpoint has to beat before the saved model is overwritten
+        self.checkpoint_threshold = None
         self.build_model()
 
     def build_model(self):
@@ -32,16 +48,16 @@ class SolarFlarePredictor:
 
         self.model = Sequential([
             Input(shape=(self.window_size, self.n_features)),
-            LSTM(units=64, return_sequences=True, activation='tanh'),
+            LSTM(units=self.lstm_units[0], return_sequences=True, activation='tanh'),
             Dropout(0.2),
-            LSTM(units=32, return_sequences=False, activation='tanh'),
+            LSTM(units=self.lstm_units[1], return_sequences=False, activation='tanh'),
             Dropout(0.2),
             Dense(units=16, activation='relu'),
-            Dense(units=1, activation='linear')
+            Dense(units=self.n_outputs, activation='linear')
         ])
 
         optimizer = Adam(learning_rate=self.learning_rate)
-        self.model.compile(optimizer=optimizer, loss='mse', metrics=['mae'])
+        self.model.compile(optimizer=optimizer, loss='mse', metrics=['mae'], jit_compile=self.jit_compile)
         print("Model compilation complete")
 
     def train(self, X_train, y_train, X_test, y_test, epochs=10, batch_size=64):
@@ -49,15 +65,12 @@ class SolarFlarePredictor:
 
         print("\n=== TRAINING START ===")
 
-        early_stop = EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True)
-        checkpoint = ModelCheckpoint(filepath=self.model_save_folder, monitor='val_loss', save_best_only=True, verbose=1)
-
         history = self.model.fit(
             X_train, y_train,
             validation_data=(X_test, y_test),
             epochs=epochs,
             batch_size=batch_size,
-            callbacks=[early_stop, checkpoint],
+            callbacks=self._callbacks() + self._throughput(len(X_train)),
             shuffle=False,  # Preserve time order
             verbose=1
         )
@@ -68,8 +81,54 @@ class SolarFlarePredictor:
         print("=== TRAINING COMPLETE ===")
         return history
 
-    def plot_training_history(self, save_path=None):
-        """Plot train and validation loss curves after training."""
+    def train_stream(self, train_ds, val_ds, epochs=10, callbacks=None, n_samples=None, initial_epoch=0):
+        """
+        Train the model on batched tf.data pipelines and save the best checkpoint.
+        n_samples (training windows per epoch) enables the samples/sec log;
+        initial_epoch continues a resumed run.
+        """
+
+        print("\n=== STREAMING TRAINING START ===")
+
+        monitors = self._throughput(n_samples)
+        for monitor in monitors:
+            if isinstance(monitor, TrainingMonitor):
+                train_ds = monitor.watch(train_ds)
+
+        # Datasets are already batched and ordered
+        history = self.model.fit(
+            train_ds,
+            validation_data=val_ds,
+            epochs=epochs,
+            initial_epoch=initial_epoch,
+            callbacks=self._callbacks() + monitors + list(callbacks or []),
+            shuffle=False,
+            verbose=1
+        )
+
+        self.history = history
+
+        print("=== TRAINING COMPLETE ===")
+        return history
+
+    def _callbacks(self):
+        self.early_stop = EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True)
+        self.checkpoint = TimedModelCheckpoint(filepath=self.model_save_folder, monitor='val_loss',
+                                               save_best_only=True, verbose=1,
+                                               initial_value_threshold=self.checkpoint_threshold)
+        return [self.early_stop, self.checkpoint]
+
+    def _throughput(self, n_samples):
+        # Runs after the checkpoint so the epoch's save time is already known
+        if not n_samples:
+            return []
+        if self.report_path is not None:
+            return [TrainingMonitor(self.report_path, n_samples, checkpoint=self.checkpoint,
+                                    append=self.report_append)]
+        return [ThroughputLogger(n_samples)]
+
+    def plot_training_history(self, save_path=None, show=False):
+        """Plot train and validation loss curves after training; only opens a window with show=True."""
         if self.history is None:
             raise ValueError("Nessuna history disponibile. Esegui train() prima.")
 
@@ -90,7 +149,9 @@ class SolarFlarePredictor:
             plt.savefig(save_path, dpi=150)
             print(f"Plot salvato in: {save_path}")
 
-        plt.show()
+        if show:
+            plt.show()
+        plt.close(fig)
 
     def save(self):
         """Save the model to disk."""
@@ -104,11 +165,14 @@ class SolarFlarePredictor:
         """Load a trained model from disk."""
         if os.path.exists(self.model_save_folder):
             self.model = load_model(self.model_save_folder)
+            if self.jit_compile:
+                self.model.jit_compile = True
             print(f"Loaded model from {self.model_save_folder}")
 
-            # Update input dimensions
+            # Update input and output dimensions
             self.window_size = self.model.input_shape[1]
             self.n_features = self.model.input_shape[2]
+            self.n_outputs = self.model.output_shape[-1]
         else:
             raise FileNotFoundError(f"Error: the file {self.model_save_folder} does not exists.")
 
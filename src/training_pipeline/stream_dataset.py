@@ -0,0 +1,74 @@
+import numpy as np
+import tensorflow as tf
+
+
+class StreamingWindowDataset:
+    """
+    Cut training windows on the fly from (memory-mapped) scaled base rows.
+    Only the batches in flight are ever materialized, so memory stays flat
+    regardless of how many rows the dataset holds.
+    """
+
+    def __init__(self, X_scaled, y_scaled, engine, batch_size=64, prefetch=tf.data.AUTOTUNE):
+        """Initialize with scaled base rows, (rows, 1) scaled targets, the window engine and prefetch depth."""
+        self.X = X_scaled
+        self.y = y_scaled
+        self.engine = engine
+        self.batch_size = batch_size
+        self.prefetch = prefetch
+        self.n_features = X_scaled.shape[-1]
+
+        # Row offsets of a window and of its target(s) relative to its start
+        self.offsets = np.arange(engine.window)
+        self.target_offsets = engine.target_offsets
+        self.n_outputs = engine.n_outputs
+
+    def make(self, starts, skip=None):
+        """
+        Return a batched, prefetched, ordered dataset over the given window starts.
+        skip (an int64 tf.Variable) drops that many leading windows each time the
+        dataset is iterated, so a resumed epoch continues at its data cursor.
+        """
+        ds = tf.data.Dataset.from_tensor_slices(np.asarray(starts, dtype=np.int64))
+        if skip is not None:
+            # The variable is read per element, so resetting it takes effect on the next epoch
+            ds = ds.enumerate().filter(lambda i, start: i >= skip).map(lambda i, start: start)
+
+        # Batch indices first so each map call gathers a whole batch
+        ds = ds.batch(self.batch_size)
+        ds = ds.map(self._tf_gather, num_parallel_calls=tf.data.AUTOTUNE, deterministic=True)
+
+        return ds.prefetch(self.prefetch)
+
+    def gather_inputs(self, starts):
+        """
+        Graph-mode gather of a batch of window starts into their
+        (batch, window, n_features) inputs, for datasets pairing the windows
+        with other targets.
+        """
+        x = tf.numpy_function(self._inputs, [starts], tf.float32)
+        x.set_shape([None, self.engine.window, self.n_features])
+        return x
+
+    def _inputs(self, starts):
+        # (batch, window) row indices into the base matrix
+        rows = starts[:, None] + self.offsets
+
+        x = np.asarray(self.X[rows.reshape(-1)], dtype=np.float32)
+        return x.reshape(len(starts), self.engine.window, self.n_features)
+
+    def _gather(self, starts):
+        return self._inputs(starts), self.targets(starts)
+
+    def targets(self, starts):
+        """(n, n_outputs) scaled targets of the given windows, without gathering their inputs."""
+        starts = np.asarray(starts, dtype=np.int64)
+        # Gathered from the (rows, 1) scaled column
+        y = np.asarray(self.y[starts[:, None] + self.target_offsets], dtype=np.float32)
+        return y.reshape(len(starts), self.n_outputs)
+
+    def _tf_gather(self, starts):
+        x, y = tf.numpy_function(self._gather, [starts], (tf.float32, tf.float32))
+        x.set_shape([None, self.engine.window, self.n_features])
+        y.set_shape([None, self.n_outputs])
+        return x, y
@@ -0,0 +1,251 @@
+import itertools
+import json
+import os
+import random
+import shutil
+
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+from tensorflow.keras.callbacks import Callback
+
+from scaling_kernel import ScalingKernel
+from .process_pool import pinned_pool, shared_base_arrays, open_memmap, scaled_scratch, remove_scratch
+from .walk_forward import limit_tf_threads
+from .gap_index import GapIndex
+from .train_test_spilt import Train_Test_Split
+from .training_scaler import TrainingScaler
+from .window_engine import WindowEngine
+from .stream_dataset import StreamingWindowDataset
+from .solar_flare_predictor import SolarFlarePredictor
+
+
+DEFAULT_SPACE = {
+    "window": [120, 180, 240],
+    "horizon": [90],
+    "lstm_units": [(32, 16), (64, 32), (128, 64)],
+    "learning_rate": [0.001, 0.0005],
+}
+
+
+def trial_group(window, horizon):
+    """
+    Trials are only comparable within a (window, horizon) group: the two set
+    the targets, the validation windows and the target scaler, so scaled
+    val_loss values of different groups measure different tasks.
+    """
+    return f"w{int(window)}_h{int(horizon)}"
+
+
+class MedianPruner(Callback):
+    """
+    Stop a trial whose best val_loss so far is worse than the median of the
+    best val_loss at the same epoch of the other trials in its group.
+
+    Trials run in separate processes, so each one publishes its group and
+    per-epoch val_loss to a small JSON file in prune_dir and reads the
+    others' files.
+    """
+
+    def __init__(self, prune_dir, trial, group, warmup_epochs=2, min_trials=3):
+        super().__init__()
+        self.prune_dir = prune_dir
+        self.trial = trial
+        self.group = group
+        self.warmup_epochs = warmup_epochs
+        self.min_trials = min_trials
+        self.val_losses = []
+        self.pruned = False
+
+    def _publish(self):
+        path = os.path.join(self.prune_dir, f"trial_{self.trial}.json")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"group": self.group, "val_losses": self.val_losses}, f)
+        os.replace(tmp_path, path)
+
+    def _others(self):
+        histories = []
+        for name in os.listdir(self.prune_dir):
+            if name.endswith(".json") and name != f"trial_{self.trial}.json":
+                with open(os.path.join(self.prune_dir, name), "r") as f:
+                    record = json.load(f)
+                if record["group"] == self.group:
+                    histories.append(record["val_losses"])
+        return histories
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.val_losses.append(float(logs["val_loss"]))
+        self._publish()
+
+        if epoch + 1 < self.warmup_epochs:
+            return
+
+        # Only trials of the same group that already reached this epoch are comparable
+        others = [min(h[: epoch + 1]) for h in self._others() if len(h) > epoch]
+        if len(others) < self.min_trials:
+            return
+
+        median = float(np.median(others))
+        if min(self.val_losses) > median:
+            print(f"[Trial {self.trial}] pruned at epoch {epoch + 1}: "
+                  f"best val_loss {min(self.val_losses):.6f} > median {median:.6f}")
+            self.pruned = True
+            self.model.stop_training = True
+
+
+def _run_trial(trial, params, x_spec, y_spec, flag_idx, max_missing_fraction,
+               out_dir, epochs, batch_size, warmup_epochs, min_trials):
+    """Train one sweep trial on the shared base matrix (worker process)."""
+    limit_tf_threads()
+    X, y = open_memmap(x_spec), open_memmap(y_spec)
+    engine = WindowEngine(params["window"], params["horizon"])
+    span = engine.window + engine.horizon + 1
+
+    starts = engine.window_starts(len(X))
+    if max_missing_fraction is not None and flag_idx:
+        starts = starts[GapIndex.from_flags(X, flag_idx).valid(starts, span, max_missing_fraction)]
+
+    group = trial_group(engine.window, engine.horizon)
+    result = {
+        "trial": trial,
+        "group": group,
+        "window": engine.window,
+        "horizon": engine.horizon,
+        "lstm_units": "-".join(str(u) for u in params["lstm_units"]),
+        "learning_rate": params["learning_rate"],
+    }
+
+    # Ordered split; training windows overlapping the first test window are purged
+    tr_starts, te_starts, _, _ = Train_Test_Split.split_training(starts, starts)
+    if len(te_starts):
+        tr_starts = tr_starts[tr_starts <= te_starts[0] - span]
+    if len(tr_starts) == 0 or len(te_starts) == 0:
+        # Recorded instead of raised, so one window/horizon too large for the data does not stop the sweep
+        print(f"[Trial {trial}] skipped: {len(starts)} usable window(s) for window={engine.window}, "
+              f"horizon={engine.horizon}")
+        return {**result, "epochs": 0, "best_val_loss": np.nan, "pruned": False,
+                "skipped": f"{len(tr_starts)} train / {len(te_starts)} test windows"}
+
+    training_scaler = TrainingScaler()
+    training_scaler.fit_rows(X[: tr_starts[-1] + engine.window], y[tr_starts + engine.window + engine.horizon])
+
+    trial_dir = os.path.join(out_dir, f"trial_{trial}")
+    os.makedirs(trial_dir, exist_ok=True)
+    training_scaler.save(trial_dir)
+
+    # Only the rows up to the last test window are scaled, into this trial's scratch memmaps
+    n_rows = te_starts[-1] + span
+    X_scaled, y_scaled, scratch = scaled_scratch(training_scaler, X[:n_rows], y[:n_rows], trial_dir)
+    stream = StreamingWindowDataset(X_scaled, y_scaled, engine, batch_size=batch_size)
+
+    sFP = SolarFlarePredictor(window_size=engine.window, n_features=X.shape[1],
+                              learning_rate=params["learning_rate"], lstm_units=params["lstm_units"],
+                              model_save_folder=os.path.join(trial_dir, "sfp_lstm.keras"))
+    pruner = MedianPruner(os.path.join(out_dir, "pruning"), trial, group, warmup_epochs, min_trials)
+    history = sFP.train_stream(stream.make(tr_starts), stream.make(te_starts), epochs=epochs, callbacks=[pruner])
+
+    val_losses = history.history["val_loss"]
+    tf.keras.backend.clear_session()
+    remove_scratch(scratch)
+
+    return {
+        **result,
+        "epochs": len(val_losses),
+        "best_val_loss": float(min(val_losses)),
+        "pruned": pruner.pruned,
+        "skipped": "",
+    }
+
+
+class SweepRunner:
+    """
+    Grid or random search over window, horizon, LSTM units and learning rate.
+
+    Trials are scheduled on a pool of processes pinned to disjoint CPU cores
+    and all map the same memory-mapped base feature matrix. Each trial
+    fits its own scalers (the horizon changes the targets). Scaled val_loss
+    is only comparable between trials with the same window and horizon, so
+    pruning and ranking happen within each (window, horizon) group: trials
+    falling behind their group's median are pruned early, and the results
+    table and each group's best model, scaler and parameters are written
+    to out_dir.
+    """
+
+    RESULTS_CSV = "sweep_results.csv"
+    BEST_DIR = "best"
+
+    def __init__(self, out_dir, space=None, search="grid", n_trials=None, workers=1,
+                 epochs=10, batch_size=64, warmup_epochs=2, min_trials=3, seed=0):
+        """Initialize search space, scheduling and pruning settings."""
+        if search not in ("grid", "random"):
+            raise ValueError(f"Unknown search '{search}', expected 'grid' or 'random'")
+        self.out_dir = out_dir
+        self.space = dict(space or DEFAULT_SPACE)
+        self.search = search
+        self.n_trials = n_trials
+        self.workers = workers
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.warmup_epochs = warmup_epochs
+        self.min_trials = min_trials
+        self.seed = seed
+
+    def trials(self):
+        """Return the list of parameter dicts to run."""
+        keys = list(self.space)
+        grid = [dict(zip(keys, values)) for values in itertools.product(*(self.space[k] for k in keys))]
+
+        if self.search == "random":
+            rng = random.Random(self.seed)
+            n = len(grid) if self.n_trials is None else min(self.n_trials, len(grid))
+            return rng.sample(grid, n)
+
+        return grid if self.n_trials is None else grid[: self.n_trials]
+
+    def run(self, X, y, cache, feature_cols=None, max_missing_fraction=None, flag_cols=()):
+        """Run the sweep over the base rows; returns the results DataFrame ranked within each group."""
+        prune_dir = os.path.join(self.out_dir, "pruning")
+        shutil.rmtree(prune_dir, ignore_errors=True)
+        os.makedirs(prune_dir)
+
+        x_spec, y_spec = shared_base_arrays(X, y, cache)
+        flag_idx = [feature_cols.index(c) for c in flag_cols if feature_cols and c in feature_cols]
+
+        trials = self.trials()
+        print(f"Sweep: {len(trials)} {self.search} trial(s) on {self.workers} worker(s)")
+
+        with pinned_pool(self.workers) as pool:
+            futures = [
+                pool.submit(_run_trial, k, params, x_spec, y_spec, flag_idx, max_missing_fraction,
+                            self.out_dir, self.epochs, self.batch_size, self.warmup_epochs, self.min_trials)
+                for k, params in enumerate(trials)
+            ]
+            results = [future.result() for future in futures]
+
+        # Skipped trials (NaN loss) sort last and get no rank
+        table = pd.DataFrame(results).sort_values(["horizon", "window", "best_val_loss"]).reset_index(drop=True)
+        table["rank_in_group"] = table.groupby("group").cumcount() + 1
+        table.loc[table["best_val_loss"].isna(), "rank_in_group"] = np.nan
+        table.to_csv(os.path.join(self.out_dir, self.RESULTS_CSV), index=False)
+        print(table.to_string(index=False))
+
+        for _, best in table[table["rank_in_group"] == 1].iterrows():
+            self.save_best(best)
+        return table
+
+    def save_best(self, best):
+        """Copy the best trial of a group's model and scaler next to its parameters."""
+        trial_dir = os.path.join(self.out_dir, f"trial_{best['trial']}")
+        best_dir = os.path.join(self.out_dir, self.BEST_DIR, best["group"])
+        shutil.rmtree(best_dir, ignore_errors=True)
+        os.makedirs(best_dir)
+
+        for name in ("sfp_lstm.keras", ScalingKernel.ARTIFACT_NAME):
+            if os.path.exists(os.path.join(trial_dir, name)):
+                shutil.copy2(os.path.join(trial_dir, name), os.path.join(best_dir, name))
+
+        with open(os.path.join(best_dir, "best_params.json"), "w") as f:
+            json.dump({k: (v.item() if hasattr(v, "item") else v) for k, v in best.items()}, f, indent=2)
+
+        print(f"Best trial of {best['group']}: {best['trial']} (val_loss {best['best_val_loss']:.6f}) saved to {best_dir}")
@@ -1,7 +1,10 @@
-import os
-import pandas as pd
 import numpy as np
 
+from dataset_store import DatasetStore, read_dataset
+from .window_engine import WindowEngine
+from .window_cache import WindowCache
+from .gap_index import GapIndex
+
 
 class TrainSetCreator:
     """Create training windows and future targets from the dataset."""
@@ -10,13 +13,38 @@ class TrainSetCreator:
     DROP_COLS  = ["time_tag", "xray_0.1-0.8nm"]
     TARGET_COL = "xray_0.1-0.8nm"
 
-    # Window and horizon sizes
+    # Flags set by the preprocessors on rows they forward/back-filled
+    MISSING_FLAG_COLS = ["xray_is_missing", "euv_is_missing"]
+
+    # Window, horizon and stride sizes
     WINDOW  = 180
     HORIZON = 90
+    STRIDE  = 1
 
-    def __init__(self, csv_path: str = None):
-        """Initialize creator with dataset path."""
+    def __init__(self, csv_path: str = None, window: int = None, horizon: int = None, stride: int = None,
+                 cache_dir: str = None, store_dir: str = None, start=None, end=None,
+                 max_missing_fraction: float = None, horizons=None):
+        """
+        Initialize creator with dataset location, window settings and optional cache folder.
+        The dataset store is preferred over the CSV when it exists; start/end restrict
+        the time range read from it. With max_missing_fraction, windows whose
+        [start, start + window + horizon] span has a larger fraction of filled
+        rows are skipped. With horizons (minutes ahead, e.g. (15, 30, 60, 90, 120))
+        each window gets one target per horizon and horizon is the longest one.
+        """
         self.csv_path = csv_path
+        self.cache_dir = cache_dir
+        self.store_dir = store_dir
+        self.start = start
+        self.end = end
+        self.window = window if window is not None else self.WINDOW
+        self.horizon = horizon if horizon is not None else self.HORIZON
+        self.stride = stride if stride is not None else self.STRIDE
+        self.max_missing_fraction = max_missing_fraction
+        self.engine = WindowEngine(self.window, self.horizon, self.stride, horizons=horizons)
+        self.horizon = self.engine.horizon
+        self.horizons = self.engine.horizons
+        self.feature_cols = None
         self.x: list[np.ndarray] = []
         self.y: list[np.ndarray] = []
 
@@ -29,32 +57,62 @@ class TrainSetCreator:
         print(f"Shape x: {self.x.shape}")
         print(f"Shape y: {self.y.shape}")
 
-    def create_train_set(self):
-        """Build sliding windows and targets for training."""
-        if not os.path.isfile(self.csv_path):
-            raise FileNotFoundError(f"CSV not found: {self.csv_path}")
+    def load_base_arrays(self):
+        """Read the dataset and return the (rows, n_features) matrix and target column."""
+        store = DatasetStore(self.store_dir) if self.store_dir is not None else None
+        use_store = store is not None and store.exists()
 
-        df = pd.read_csv(self.csv_path)
+        # The cache covers the full history; time-range reads bypass it
+        if self.cache_dir is not None and self.start is None and self.end is None:
+            cache = WindowCache(self.cache_dir, self.window, self.horizon, self.DROP_COLS, self.TARGET_COL)
+            X, y = cache.load_store(store) if use_store else cache.load(self.csv_path)
+            self.feature_cols = cache.feature_cols()
+            return X, y
+
+        df = read_dataset(self.store_dir, self.csv_path, start=self.start, end=self.end)
 
         # Select feature columns
         feature_cols = [c for c in df.columns if c not in self.DROP_COLS]
-        X = df[feature_cols].values.astype(np.float32)     # (N, n_features)
-        y = df[self.TARGET_COL].values.astype(np.float32)  # (N,)
+        # Straight to float32, without an intermediate float64 matrix
+        X = df[feature_cols].to_numpy(dtype=np.float32)     # (N, n_features)
+        y = df[self.TARGET_COL].to_numpy(dtype=np.float32)  # (N,)
+        self.feature_cols = feature_cols
+
+        return X, y
 
-        # Number of valid samples
-        n_samples = len(df) - self.WINDOW - self.HORIZON
+    def window_starts(self, X):
+        """
+        Return the start row of every usable window.
+        Validity of each window span is one prefix-sum lookup in a GapIndex
+        over the missingness flags, so no window is scanned.
+        """
+        starts = self.engine.window_starts(len(X))
+        if self.max_missing_fraction is None or len(starts) == 0:
+            return starts
 
-        # Build windows
-        for i in range(n_samples):
-            x_window = X[i : i + self.WINDOW]               # Input window
-            target_idx = i + self.WINDOW + self.HORIZON     # Future target index
-            y_val = y[target_idx]                           # Target value
+        flag_idx = [self.feature_cols.index(c) for c in self.MISSING_FLAG_COLS if c in self.feature_cols]
+        gap_index = GapIndex.from_flags(X, flag_idx)
+
+        # The span covers the input window, the horizon and the target row
+        span = self.engine.window + self.engine.horizon + 1
+        keep = gap_index.valid(starts, span, self.max_missing_fraction)
+
+        print(f"Skipping {len(starts) - int(keep.sum())} of {len(starts)} windows "
+              f"with more than {self.max_missing_fraction:.0%} filled rows")
+        return starts[keep]
+
+    def create_train_set(self):
+        """Build sliding windows and targets for training as strided views."""
+        X, y = self.load_base_arrays()
 
-            self.x.append(x_window)
-            self.y.append(np.array(y_val))
+        # Windows are views over X; nothing is copied here unless windows are skipped
+        starts = self.window_starts(X) if self.max_missing_fraction is not None else None
+        self.x, self.y = self.engine.build(X, y, starts=starts)
 
-        # Convert to arrays
-        self.x = np.array(self.x)
-        self.y = np.array(self.y)
+        return self.x, self.y
 
-        return self.x, self.y
\ No newline at end of file
+    def iter_train_batches(self, batch_size=4096):
+        """Yield materialized (x, y) batches with bounded memory."""
+        X, y = self.load_base_arrays()
+        starts = self.window_starts(X) if self.max_missing_fraction is not None else None
+        yield from self.engine.iter_batches(X, y, batch_size=batch_size, starts=starts)
@@ -1,3 +1,4 @@
+import math
 import numpy as np
 from sklearn.model_selection import train_test_split
 
@@ -7,6 +8,12 @@ class Train_Test_Split:
     @staticmethod
     def split_training(x_train, y_train, test_size=0.2, random_state=42, shuffle=False):
         """Split input arrays into train and test subsets."""
+        if not shuffle:
+            # Ordered split by slicing, so strided window views stay views
+            n_test = math.ceil(test_size * len(x_train))
+            n_train = len(x_train) - n_test
+            return x_train[:n_train], x_train[n_train:], y_train[:n_train], y_train[n_train:]
+
         # Perform sklearn train/test split
         x_tr, x_te, y_tr, y_te = train_test_split(
             x_train, y_train,
@@ -1,50 +1,455 @@
+import json
+import os
+
+import numpy as np
+
 from config import Config
+from scaling_kernel import ScalingKernel
 from .train_set_creator import TrainSetCreator
 from .train_test_spilt import Train_Test_Split
 from .solar_flare_predictor import SolarFlarePredictor
 from .training_scaler import TrainingScaler
+from .stream_dataset import StreamingWindowDataset
+from .window_cache import WindowCache
+from .walk_forward import WalkForwardSplitter, WalkForwardCV
+from .watermark import TrainingWatermark
+from .performance import PerformanceProfile
+from .training_report import plot_report, SaveWithCheckpoint
+from .distillation import Distiller
+from .resume import TrainingCheckpoint, ResumeCallback, run_key, rows_digest, cursor_variable
 
 
 class Training_Manager:
 
-    def __init__(self):
+    # Fine-tuning needs at least this many new training windows
+    MIN_NEW_WINDOWS = 64
+
+    def __init__(self, streaming=False, max_missing_fraction=None, cv_folds=None, cv_workers=1, cv_embargo=0,
+                 incremental=False, replay_ratio=1.0, finetune_epochs=3, profile=None, tune_batch=False,
+                 horizons=None, resumable=False, save_every_steps=500,
+                 distill=None, distill_alpha=0.5, distill_epochs=10):
         # Load configuration
         conf = Config()
 
         # Resolve training paths
-        model_dir = conf.model_dir
-        model_path = conf.model_path
-        train_png_path = conf.train_png
-        dataset_path = conf.dataset_path
-
-        # Build training dataset
-        tr_dataset_cr = TrainSetCreator(dataset_path)
-        x, y = tr_dataset_cr.create_train_set()
-        tr_dataset_cr.print_shapes()
+        self.model_dir = conf.model_dir
+        self.model_path = conf.model_path
+        self.train_png_path = conf.train_png
+        self.report_path = conf.train_report
+        self.report_png_path = conf.train_report_png
+        self.dataset_path = conf.dataset_path
+        self.window_cache_dir = conf.window_cache_dir
+        self.store_dir = conf.store_dir
+        self.cv_dir = conf.cv_dir
+        self.horizons_path = conf.horizons_path
+        self.resume_dir = conf.resume_dir
+        self.student_model_path = conf.student_model_path
+        self.student_metrics_path = conf.student_metrics_path
+        self.watermark = TrainingWatermark(conf.training_state_path)
+
+        # Skip windows dominated by rows the preprocessors filled in
+        self.max_missing_fraction = max_missing_fraction
+
+        # Forecast horizons (minutes) of a multi-horizon head; None keeps the single HORIZON target
+        self.horizons = horizons
+
+        # Checkpoint the streaming run every save_every_steps steps and resume it if interrupted
+        self.resumable = resumable
+        self.save_every_steps = save_every_steps
+
+        # CPU threading / XLA / batching; applied before TensorFlow runs any op
+        self.profile = profile if profile is not None else PerformanceProfile()
+        self.tune_batch = tune_batch
+        self.profile.apply()
+
+        if cv_folds is not None:
+            self.cross_validate(cv_folds, workers=cv_workers, embargo=cv_embargo)
+        elif distill is not None:
+            self.distill(distill, alpha=distill_alpha, epochs=distill_epochs)
+        elif incremental:
+            self.train_incremental(replay_ratio=replay_ratio, epochs=finetune_epochs)
+        elif streaming or resumable:
+            self.train_streaming()
+        else:
+            self.train_in_memory()
+
+    def new_predictor(self, **kwargs):
+        """SolarFlarePredictor compiled with the performance profile's settings."""
+        return SolarFlarePredictor(jit_compile=self.profile.jit_compile, **kwargs)
+
+    @staticmethod
+    def horizon_list(engine):
+        """Forecast horizons in minutes, one per model output."""
+        return [int(h) for h in engine.target_offsets - engine.window]
+
+    def save_horizons(self, engine):
+        """
+        Record which horizon each model output forecasts, for inference.
+        Written atomically before training starts, like the scaler, so the
+        first checkpoint of a new head never meets a stale horizons file.
+        """
+        tmp_path = self.horizons_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"horizons": self.horizon_list(engine)}, f)
+        os.replace(tmp_path, self.horizons_path)
+
+    def save_plots(self, sFP):
+        """Write the loss curves and the performance report plot, without opening windows."""
+        sFP.plot_training_history(save_path=self.train_png_path)
+        plot_report(self.report_path, self.report_png_path)
+
+    def tune_batch_size(self, engine, n_features, make_dataset):
+        """Pick the batch size with the performance profile, on scratch models."""
+        n_batches = self.profile.WARMUP_STEPS + self.profile.PROBE_STEPS
+        return self.profile.tune_batch_size(
+            lambda: self.new_predictor(window_size=engine.window, n_features=n_features,
+                                       n_outputs=engine.n_outputs).model,
+            lambda batch_size: make_dataset(batch_size, n_batches),
+        )
 
-        # Split train and test sets
-        x_tr, x_te, y_tr, y_te = Train_Test_Split.split_training(x,y)
+    def split_starts(self, X, tr_dataset_cr):
+        """Ordered train/test split of the usable window starts."""
+        starts = tr_dataset_cr.window_starts(X)
+        tr_starts, te_starts, _, _ = Train_Test_Split.split_training(starts, starts)
+        return tr_starts, te_starts
+
+    def fit_scaler(self, X, y, tr_dataset_cr, split=None):
+        """Split window starts (unless split is given), then fit scalers on the rows and targets of training windows."""
+        engine = tr_dataset_cr.engine
+        tr_starts, te_starts = split if split is not None else self.split_starts(X, tr_dataset_cr)
+
+        if len(tr_starts) == 0 or len(te_starts) == 0:
+            span = engine.window + engine.horizon + 1
+            raise ValueError(
+                f"Only {len(tr_starts) + len(te_starts)} usable window(s) ({len(tr_starts)} train, "
+                f"{len(te_starts)} test) from {len(X)} rows with window={engine.window}, "
+                f"horizon={engine.horizon} (span {span} rows) and "
+                f"max_missing_fraction={self.max_missing_fraction}; need at least one of each. "
+                f"Add data or relax --max-missing-fraction."
+            )
+
+        tr_rows = X[: tr_starts[-1] + engine.window]
+        tr_targets = y[engine.target_rows(tr_starts)].ravel()
 
-        # Scale train and test data
         training_scaler = TrainingScaler()
-        x_trainig_scaled, y_training_scaled = training_scaler.fit_and_scale_train(x_tr, y_tr)
-        x_test_fitted, y_test_fitted = training_scaler.scale_test_or_live(x_te, y_te)  
-        training_scaler.save(model_dir)    
+        training_scaler.fit_rows(tr_rows, tr_targets)
+        training_scaler.save(self.model_dir)
+
+        return training_scaler, tr_starts, te_starts
+
+    def train_in_memory(self):
+        # Load base rows
+        tr_dataset_cr = TrainSetCreator(self.dataset_path, cache_dir=self.window_cache_dir,
+                                        store_dir=self.store_dir,
+                                        max_missing_fraction=self.max_missing_fraction, horizons=self.horizons)
+        X, y = tr_dataset_cr.load_base_arrays()
+        engine = tr_dataset_cr.engine
+
+        # Fit and scale base rows once, before windowing
+        training_scaler, tr_starts, te_starts = self.fit_scaler(X, y, tr_dataset_cr)
+        X_scaled, y_scaled = training_scaler.scale_rows(X, y)
+
+        # Build windows over the scaled rows and split train and test sets
+        starts = None if self.max_missing_fraction is None else np.concatenate([tr_starts, te_starts])
+        x, y_win = engine.build(X_scaled, y_scaled, starts=starts)
+        tr_dataset_cr.x, tr_dataset_cr.y = x, y_win
+        tr_dataset_cr.print_shapes()
+
+        n_train = len(tr_starts)
+        x_tr, x_te, y_tr, y_te = x[:n_train], x[n_train:], y_win[:n_train], y_win[n_train:]
+
+        if self.tune_batch:
+            self.tune_batch_size(engine, X.shape[1],
+                                 lambda bs, n: PerformanceProfile.probe_dataset(x_tr, y_tr, bs, n))
 
         # Train prediction model
-        sFP = SolarFlarePredictor(model_save_folder=model_path)
-        sFP.train(x_trainig_scaled, y_training_scaled,x_test_fitted, y_test_fitted)
-        sFP.plot_training_history(save_path=train_png_path)
+        sFP = self.new_predictor(window_size=engine.window, n_features=X.shape[1],
+                                 model_save_folder=self.model_path, report_path=self.report_path,
+                                 n_outputs=engine.n_outputs)
+        self.save_horizons(engine)
+        sFP.train(x_tr, y_tr, x_te, y_te, batch_size=self.profile.batch_size)
+        self.watermark.save(X, y, tr_dataset_cr.feature_cols, engine.window, self.horizon_list(engine))
+        self.save_plots(sFP)
+
+    def train_streaming(self, batch_size=None):
+        # Load memory-mapped base rows; windows are cut on the fly
+        tr_dataset_cr = TrainSetCreator(self.dataset_path, cache_dir=self.window_cache_dir,
+                                        store_dir=self.store_dir,
+                                        max_missing_fraction=self.max_missing_fraction, horizons=self.horizons)
+        X, y = tr_dataset_cr.load_base_arrays()
+        engine = tr_dataset_cr.engine
+        cache = WindowCache(self.window_cache_dir, engine.window, engine.horizon,
+                            TrainSetCreator.DROP_COLS, TrainSetCreator.TARGET_COL)
+
+        tr_starts, te_starts = self.split_starts(X, tr_dataset_cr)
+        key = run_key(len(X), tr_starts, te_starts, engine.window, self.horizon_list(engine))
+        checkpoint = TrainingCheckpoint(self.resume_dir) if self.resumable else None
+        resume = self.find_resume(checkpoint, key) if checkpoint is not None else None
+        print(f"Streaming {len(tr_starts)} train and {len(te_starts)} test windows from {len(X)} rows")
+
+        X_scaled = y_scaled = None
+        if resume is not None:
+            # Reuse the interrupted run's scalers, batch size and (if intact) scaled rows
+            state, ckpt_dir = resume
+            if state.get("early_stop_stopped_epoch", 0) > 0:
+                print("Interrupted run had already stopped early; its best model is saved")
+                checkpoint.clear()
+                return None
+            batch_size = state["batch_size"]
+            training_scaler = TrainingScaler()
+            training_scaler.load(self.resume_dir)
+            X_scaled = cache.open_scratch("scaled_features", X.shape)
+            y_scaled = cache.open_scratch("scaled_targets", (len(y), 1))
+            if X_scaled is None or y_scaled is None or rows_digest(X_scaled, y_scaled) != state["scaled_digest"]:
+                X_scaled = y_scaled = None
+        else:
+            training_scaler, _, _ = self.fit_scaler(X, y, tr_dataset_cr, split=(tr_starts, te_starts))
+            if checkpoint is not None:
+                # A checkpoint of another run can not be resumed any more
+                checkpoint.clear()
+                training_scaler.save(self.resume_dir)
 
+        # Scale base rows once into memmaps next to the cache
+        if X_scaled is None:
+            X_scaled, y_scaled = training_scaler.scale_rows(
+                X, y,
+                out_x=cache.scratch_memmap("scaled_features", X.shape),
+                out_y=cache.scratch_memmap("scaled_targets", (len(y), 1)),
+            )
+            X_scaled.flush()
+            y_scaled.flush()
 
+        if self.tune_batch and resume is None:
+            self.tune_batch_size(engine, X.shape[1], lambda bs, n: StreamingWindowDataset(
+                X_scaled, y_scaled, engine, batch_size=bs).make(tr_starts[: bs * n]))
+        batch_size = batch_size or self.profile.batch_size
 
-        
+        # Build ordered tf.data pipelines; a resumed epoch skips the windows already trained on
+        stream = StreamingWindowDataset(X_scaled, y_scaled, engine, batch_size=batch_size,
+                                        prefetch=self.profile.prefetch)
+        skip = cursor_variable(resume[0]["cursor_windows"] if resume else 0) if checkpoint is not None else None
+        train_ds = stream.make(tr_starts, skip=skip)
+        val_ds = stream.make(te_starts)
 
-        
+        # Train prediction model
+        sFP = self.new_predictor(window_size=engine.window, n_features=X.shape[1],
+                                 model_save_folder=self.model_path, report_path=self.report_path,
+                                 n_outputs=engine.n_outputs)
+
+        callbacks, initial_epoch = [], 0
+        if checkpoint is not None:
+            best_weights = None
+            if resume is not None:
+                # Weights and optimizer state of the checkpoint
+                sFP.model = checkpoint.load_model(ckpt_dir)
+                best_weights = checkpoint.load_best_weights(ckpt_dir)
+                initial_epoch = state["epoch"]
+                sFP.report_append = True
+            callbacks.append(ResumeCallback(
+                checkpoint, sFP, key, batch_size, save_every_steps=self.save_every_steps, skip_var=skip,
+                restored=resume[0] if resume else None, best_weights=best_weights,
+                extra_state={"scaled_digest": rows_digest(X_scaled, y_scaled)},
+            ))
+
+        self.save_horizons(engine)
+        sFP.train_stream(train_ds, val_ds, n_samples=len(tr_starts), callbacks=callbacks, initial_epoch=initial_epoch)
+        if checkpoint is not None:
+            checkpoint.clear()
+
+        self.watermark.save(X, y, tr_dataset_cr.feature_cols, engine.window, self.horizon_list(engine))
+        self.save_plots(sFP)
+
+    def find_resume(self, checkpoint, key):
+        """Return (state, checkpoint folder) when the latest checkpoint belongs to this run, else None."""
+        latest = checkpoint.latest()
+        if latest is None:
+            return None
+        if latest[0]["key"] != key:
+            print("Checkpoint belongs to a different dataset or split; starting a new run")
+            return None
+        return latest
+
+    def train_incremental(self, replay_ratio=1.0, epochs=3, batch_size=None, seed=0):
+        """
+        Warm-start fine-tuning on the windows added since the last training watermark.
+        The saved model is loaded with its optimizer state and trained on the new
+        windows mixed with a random replay sample of older ones (replay_ratio old
+        windows per new one). The saved model is only replaced by a checkpoint
+        that beats its own val_loss on the new validation windows; scalers
+        (if the new rows extend their ranges) and the watermark are only
+        written when it was. Falls back to a full streaming training when
+        there is no usable model, scaler or watermark.
+        """
+        tr_dataset_cr = TrainSetCreator(self.dataset_path, cache_dir=self.window_cache_dir,
+                                        store_dir=self.store_dir,
+                                        max_missing_fraction=self.max_missing_fraction, horizons=self.horizons)
+        X, y = tr_dataset_cr.load_base_arrays()
+        engine = tr_dataset_cr.engine
+        span = engine.window + engine.horizon + 1
+
+        n_seen = self.watermark.trained_rows(X, y, tr_dataset_cr.feature_cols, engine.window,
+                                             self.horizon_list(engine))
+        if n_seen is None or not os.path.exists(self.model_path) or not ScalingKernel.exists(self.model_dir):
+            print("No usable model/watermark for incremental training; running a full training")
+            return self.train_streaming(batch_size=batch_size)
+        if n_seen == len(X):
+            print(f"No new rows since the last training ({n_seen} rows)")
+            return None
+
+        # Loading the full .keras file restores the weights and the optimizer state
+        sFP = self.new_predictor(model_save_folder=self.model_path, report_path=self.report_path)
+        sFP.load()
+        if (sFP.window_size, sFP.n_features, sFP.n_outputs) != (engine.window, X.shape[1], engine.n_outputs):
+            print("Saved model does not match the dataset layout; running a full training")
+            return self.train_streaming(batch_size=batch_size)
+
+        # New windows have their target row past the watermark
+        starts = tr_dataset_cr.window_starts(X)
+        new_starts = starts[starts + span - 1 >= n_seen]
+        old_starts = starts[starts + span - 1 < n_seen]
+
+        # Newest windows validate; purge training windows that share rows with them
+        if len(new_starts) >= 2:
+            tr_new, te_starts, _, _ = Train_Test_Split.split_training(new_starts, new_starts)
+            cutoff = te_starts[0] - span
+            tr_new = tr_new[tr_new <= cutoff]
+        if len(new_starts) < 2 or len(tr_new) < self.MIN_NEW_WINDOWS:
+            print(f"Only {len(new_starts)} new window(s); waiting for more data before fine-tuning")
+            return None
+        old_starts = old_starts[old_starts <= cutoff]
+
+        rng = np.random.default_rng(seed)
+        n_replay = min(len(old_starts), int(replay_ratio * len(tr_new)))
+        replay = rng.choice(old_starts, size=n_replay, replace=False) if n_replay else old_starts[:0]
+        tr_starts = np.sort(np.concatenate([replay, tr_new]))
+        print(f"Fine-tuning on {len(tr_new)} new + {n_replay} replayed windows, "
+              f"validating on {len(te_starts)} new windows ({len(X) - n_seen} new rows)")
+
+        # Keep the saved scale unless the new training rows fall outside it; a widened
+        # scale is only written once the fine-tuned model matching it is checkpointed
+        training_scaler = TrainingScaler()
+        training_scaler.load(self.model_dir)
+        deployed_kernel = training_scaler.kernel
+        extended = training_scaler.extend_rows(X[n_seen : tr_new[-1] + engine.window],
+                                               y[engine.target_rows(tr_new)].ravel())
+        if extended:
+            print("New rows extend the scaler ranges; updated scalers are saved with the first checkpoint")
+
+        cache = WindowCache(self.window_cache_dir, engine.window, engine.horizon,
+                            TrainSetCreator.DROP_COLS, TrainSetCreator.TARGET_COL)
+        X_scaled, y_scaled = training_scaler.scale_rows(
+            X, y,
+            out_x=cache.scratch_memmap("scaled_features", X.shape),
+            out_y=cache.scratch_memmap("scaled_targets", (len(y), 1)),
+        )
+
+        stream = StreamingWindowDataset(X_scaled, y_scaled, engine, batch_size=batch_size or self.profile.batch_size,
+                                        prefetch=self.profile.prefetch)
+        train_ds = stream.make(tr_starts)
+        val_ds = stream.make(te_starts)
+
+        # The deployed model is the baseline every fine-tune checkpoint has to beat
+        baseline = self.deployed_val_loss(sFP, X, y, engine, te_starts, deployed_kernel,
+                                          training_scaler.kernel, val_ds)
+        sFP.checkpoint_threshold = baseline
+        print(f"Deployed model val_loss on the new windows: {baseline:.6f}")
+
+        callbacks = []
+        if extended:
+            callbacks.append(SaveWithCheckpoint(sFP, lambda: training_scaler.save(self.model_dir)))
+
+        self.save_horizons(engine)
+        sFP.train_stream(train_ds, val_ds, epochs=epochs, n_samples=len(tr_starts), callbacks=callbacks)
+        self.save_plots(sFP)
+
+        if not sFP.checkpoint.best < baseline:
+            print("Fine-tuning did not improve on the deployed model; model, scalers and watermark are unchanged")
+            return None
+        self.watermark.save(X, y, tr_dataset_cr.feature_cols, engine.window, self.horizon_list(engine))
+        return sFP
+
+    def deployed_val_loss(self, sFP, X, y, engine, te_starts, deployed_kernel, kernel, val_ds):
+        """
+        val_loss of the loaded model on the validation windows, in the target
+        scale of kernel. With widened scalers the model is evaluated on its own
+        (deployed) scale instead; targets are min-max scaled, so its MSE
+        converts by the squared ratio of the two target scales.
+        """
+        if kernel is deployed_kernel:
+            return float(sFP.model.evaluate(val_ds, verbose=0, return_dict=True)["loss"])
+
+        # Only the rows under the validation windows are scaled with the deployed kernel
+        lo, hi = int(te_starts[0]), int(te_starts[-1]) + engine.window + engine.horizon + 1
+        deployed_scaler = TrainingScaler()
+        deployed_scaler.kernel, deployed_scaler.is_fitted = deployed_kernel, True
+        X_old, y_old = deployed_scaler.scale_rows(X[lo:hi], y[lo:hi])
+        old_ds = StreamingWindowDataset(X_old, y_old, engine, batch_size=self.profile.batch_size).make(te_starts - lo)
+
+        loss = float(sFP.model.evaluate(old_ds, verbose=0, return_dict=True)["loss"])
+        return loss * float(kernel.y_scale[0] / deployed_kernel.y_scale[0]) ** 2
+
+    def distill(self, kind="conv", alpha=0.5, epochs=10):
+        """Distill the trained LSTM into a small student saved next to it, with the same scalers and horizons."""
+        if not os.path.exists(self.model_path) or not ScalingKernel.exists(self.model_dir):
+            raise FileNotFoundError(f"Distillation needs a trained model and scaler in {self.model_dir}")
+
+        # Student windows and targets follow the teacher's horizons
+        horizons = None
+        if os.path.exists(self.horizons_path):
+            with open(self.horizons_path, "r") as f:
+                horizons = json.load(f)["horizons"]
+        tr_dataset_cr = TrainSetCreator(self.dataset_path, cache_dir=self.window_cache_dir,
+                                        store_dir=self.store_dir,
+                                        max_missing_fraction=self.max_missing_fraction,
+                                        horizon=horizons[0] if horizons and len(horizons) == 1 else None,
+                                        horizons=horizons if horizons and len(horizons) > 1 else None)
+        X, y = tr_dataset_cr.load_base_arrays()
+        engine = tr_dataset_cr.engine
+        tr_starts, te_starts = self.split_starts(X, tr_dataset_cr)
+
+        # Same scaling the teacher was trained with
+        training_scaler = TrainingScaler()
+        training_scaler.load(self.model_dir)
+        cache = WindowCache(self.window_cache_dir, engine.window, engine.horizon,
+                            TrainSetCreator.DROP_COLS, TrainSetCreator.TARGET_COL)
+        X_scaled, y_scaled = training_scaler.scale_rows(
+            X, y,
+            out_x=cache.scratch_memmap("scaled_features", X.shape),
+            out_y=cache.scratch_memmap("scaled_targets", (len(y), 1)),
+        )
+        stream = StreamingWindowDataset(X_scaled, y_scaled, engine, batch_size=self.profile.batch_size,
+                                        prefetch=self.profile.prefetch)
 
-        
+        distiller = Distiller(self.model_path, self.student_model_path, kind=kind, alpha=alpha, epochs=epochs)
+        metrics = distiller.run(stream, tr_starts, te_starts)
+        with open(self.student_metrics_path, "w") as f:
+            json.dump(metrics, f, indent=2)
+        print(f"Student model saved to {self.student_model_path}")
+        return metrics
 
-        
+    def cross_validate(self, n_folds, workers=1, embargo=0):
+        """Walk-forward CV with purged fold boundaries, per-fold scalers and parallel folds."""
+        tr_dataset_cr = TrainSetCreator(self.dataset_path, cache_dir=self.window_cache_dir,
+                                        store_dir=self.store_dir,
+                                        max_missing_fraction=self.max_missing_fraction, horizons=self.horizons)
+        X, y = tr_dataset_cr.load_base_arrays()
+        engine = tr_dataset_cr.engine
+        starts = tr_dataset_cr.window_starts(X)
 
+        cache = WindowCache(self.window_cache_dir, engine.window, engine.horizon,
+                            TrainSetCreator.DROP_COLS, TrainSetCreator.TARGET_COL)
+        if self.tune_batch:
+            # Probe on the first windows only, with a throwaway scaler fitted to their rows
+            n_probe = max(self.profile.batch_candidates) * (self.profile.WARMUP_STEPS + self.profile.PROBE_STEPS)
+            probe = starts[:n_probe]
+            n_rows = probe[-1] + engine.window + engine.horizon + 1
+            probe_scaler = TrainingScaler()
+            probe_scaler.fit_rows(X[:n_rows], y[engine.target_rows(probe)].ravel())
+            X_probe, y_probe = probe_scaler.scale_rows(X[:n_rows], y[:n_rows])
+            self.tune_batch_size(engine, X.shape[1], lambda bs, n: StreamingWindowDataset(
+                X_probe, y_probe, engine, batch_size=bs).make(probe[: bs * n]))
 
-        
+        splitter = WalkForwardSplitter(n_folds, engine.window, engine.horizon, embargo=embargo)
+        cv = WalkForwardCV(splitter, self.cv_dir, workers=workers, batch_size=self.profile.batch_size,
+                           prefetch=self.profile.prefetch, jit_compile=self.profile.jit_compile)
+        return cv.run(X, y, starts, engine, cache)
@@ -0,0 +1,223 @@
+import json
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+import matplotlib
+matplotlib.use("Agg")  # Headless: unattended runs must never block on a window
+import matplotlib.pyplot as plt
+from tensorflow.keras.callbacks import Callback, ModelCheckpoint
+
+from .performance import ThroughputLogger
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where unavailable."""
+    if resource is None:
+        return None
+    # ru_maxrss is reported in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class TimedModelCheckpoint(ModelCheckpoint):
+    """ModelCheckpoint that records how long each epoch-end save took."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.last_seconds = 0.0
+        self.last_saved = False
+
+    def on_epoch_end(self, epoch, logs=None):
+        mtime = os.path.getmtime(self.filepath) if os.path.exists(self.filepath) else None
+        t0 = time.perf_counter()
+        super().on_epoch_end(epoch, logs)
+        self.last_seconds = time.perf_counter() - t0
+
+        new_mtime = os.path.getmtime(self.filepath) if os.path.exists(self.filepath) else None
+        self.last_saved = new_mtime is not None and new_mtime != mtime
+
+
+class SaveWithCheckpoint(Callback):
+    """
+    Call save() once, right after the predictor's timed checkpoint first writes
+    a new model, so artifacts that must match the model never land on disk
+    before it. Add it after the predictor's own callbacks.
+    """
+
+    def __init__(self, predictor, save):
+        super().__init__()
+        self.predictor = predictor
+        self.save = save
+        self.saved = False
+
+    def on_epoch_end(self, epoch, logs=None):
+        if not self.saved and self.predictor.checkpoint.last_saved:
+            self.save()
+            self.saved = True
+
+
+class TrainingMonitor(ThroughputLogger):
+    """
+    Record training performance as JSON lines.
+
+    Per step: wall time of the train step and its input-pipeline stall (time
+    from the start of the step until its batch left the tf.data pipeline).
+    Per epoch: wall time, samples/sec, step time percentiles, total stall,
+    peak RSS, checkpoint write time and the Keras logs. Stall is only
+    measured on a dataset passed through watch(); otherwise it is None. Step lines are written every step_every steps; epoch
+    lines always. Add it after the checkpoint callback so the checkpoint
+    write of the epoch is already timed when the epoch line is written.
+    With append, a resumed run continues the existing report.
+    """
+
+    def __init__(self, log_path, n_samples, checkpoint=None, step_every=10, append=False):
+        """Initialize output path, samples per epoch and the timed checkpoint to read."""
+        super().__init__(n_samples)
+        self.log_path = log_path
+        self.append = append
+        self.checkpoint = checkpoint
+        self.step_every = max(1, step_every)
+
+        self._file = None
+        self._epoch = 0
+        self._step_t0 = None
+        self._last_step_end = None
+        self._step_seconds = []
+        self._stall_seconds = []
+        self._watched = False
+        self._pending_stall = None
+
+    def watch(self, dataset):
+        """
+        Return dataset with the input wait of every batch recorded; batches are unchanged.
+        The stamp runs in a synchronous map after the pipeline's prefetch, so it fires
+        as soon as the train step's next() got its batch.
+        """
+        self._watched = True
+
+        def stamp(x, y):
+            ready = tf.py_function(self._batch_ready, [], tf.float64)
+            with tf.control_dependencies([ready]):
+                return tf.identity(x), y
+
+        return dataset.map(stamp)
+
+    def _batch_ready(self):
+        t0 = self._step_t0 if self._step_t0 is not None else time.perf_counter()
+        self._pending_stall = time.perf_counter() - t0
+        return self._pending_stall
+
+    def _write(self, record):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def on_train_begin(self, logs=None):
+        os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+        self._file = open(self.log_path, "a" if self.append else "w")
+        self._write({"type": "run", "time": time.time(), "n_samples": self.n_samples})
+
+    def on_train_end(self, logs=None):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def on_epoch_begin(self, epoch, logs=None):
+        super().on_epoch_begin(epoch, logs)
+        self._epoch = epoch
+        self._step_seconds = []
+        self._stall_seconds = []
+        self._last_step_end = self._t0
+
+    def on_train_batch_begin(self, batch, logs=None):
+        self._pending_stall = None
+        self._step_t0 = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._last_step_end = time.perf_counter()
+        self._step_seconds.append(self._last_step_end - self._step_t0)
+        if self._pending_stall is not None:
+            self._stall_seconds.append(self._pending_stall)
+
+        if batch % self.step_every == 0:
+            self._write({
+                "type": "step",
+                "epoch": self._epoch,
+                "step": batch,
+                "step_seconds": self._step_seconds[-1],
+                "stall_seconds": self._pending_stall,
+            })
+
+    def on_epoch_end(self, epoch, logs=None):
+        # Train time ends with the last step; the rest is validation and callbacks
+        train_seconds = (self._last_step_end or self._t0) - self._t0
+        super().on_epoch_end(epoch, logs)
+        steps = np.asarray(self._step_seconds) if self._step_seconds else np.zeros(1)
+        stall = float(np.sum(self._stall_seconds)) if self._watched else None
+
+        record = {
+            "type": "epoch",
+            "epoch": epoch,
+            "seconds": time.perf_counter() - self._t0,
+            "train_seconds": train_seconds,
+            "samples_per_sec": self.samples_per_sec[-1],
+            "steps": len(self._step_seconds),
+            "step_seconds_mean": float(steps.mean()),
+            "step_seconds_p50": float(np.percentile(steps, 50)),
+            "step_seconds_p95": float(np.percentile(steps, 95)),
+            "step_seconds_max": float(steps.max()),
+            "stall_seconds": stall,
+            "stall_fraction": stall / train_seconds if stall is not None and train_seconds > 0 else None,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        if self.checkpoint is not None:
+            record["checkpoint_seconds"] = self.checkpoint.last_seconds
+            record["checkpoint_saved"] = self.checkpoint.last_saved
+        record.update({k: float(v) for k, v in (logs or {}).items() if np.isscalar(v)})
+        self._write(record)
+
+
+def read_report(log_path):
+    """Return the epoch records of a training report."""
+    with open(log_path, "r") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return [r for r in records if r["type"] == "epoch"]
+
+
+def plot_report(log_path, save_path):
+    """Render samples/sec, stall fraction, peak RSS and checkpoint time per epoch to a PNG."""
+    if not os.path.exists(log_path):
+        print(f"No training report at {log_path}")
+        return None
+
+    epochs = read_report(log_path)
+    if not epochs:
+        print(f"No epochs recorded in {log_path}")
+        return None
+
+    x = [r["epoch"] + 1 for r in epochs]
+    panels = [
+        ("samples_per_sec", "Samples/sec"),
+        ("stall_fraction", "Input stall fraction"),
+        ("peak_rss_mb", "Peak RSS (MB)"),
+        ("checkpoint_seconds", "Checkpoint write (s)"),
+    ]
+
+    fig, axes = plt.subplots(2, 2, figsize=(12, 7))
+    for ax, (key, title) in zip(axes.ravel(), panels):
+        values = [r.get(key) if r.get(key) is not None else np.nan for r in epochs]
+        ax.plot(x, values, marker="o", color="steelblue", linewidth=2)
+        ax.set_title(title)
+        ax.set_xlabel("Epoch")
+        ax.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    fig.savefig(save_path, dpi=150)
+    plt.close(fig)
+    print(f"Training report plot saved to: {save_path}")
+    return save_path
@@ -1,8 +1,8 @@
 import numpy as np
-import joblib
-import os
 from sklearn.preprocessing import MinMaxScaler
 
+from scaling_kernel import ScalingKernel
+
 
 class TrainingScaler:
     """
@@ -11,6 +11,8 @@ class TrainingScaler:
     - sanitization of NaN / Inf / extreme values
     - safe log10 transform with epsilon
     - shape‑safe operations for 2D/3D inputs
+    Fitting uses sklearn MinMaxScaler; transforms run through the shared
+    float32 ScalingKernel, which is also what gets saved.
     """
 
     def __init__(self, feature_range=(0, 1), eps=1e-10):
@@ -19,35 +21,40 @@ class TrainingScaler:
         self.eps = eps
         self.apply_log10_target = True
         self.is_fitted = False
+        self.kernel = None
 
     # ---------------------------------------------------------
     # Sanitization
     # ---------------------------------------------------------
-    def _sanitize(self, arr):
-        arr = np.asarray(arr, dtype=np.float64)
-        return np.nan_to_num(arr, nan=0.0, posinf=1e10, neginf=-1e10)
+    def _sanitize(self, arr, out=None):
+        # Float32 copy with NaN/Inf replaced, written into out (a reusable buffer) if given
+        arr = np.asarray(arr)
+        if out is None:
+            out = np.empty(arr.shape, dtype=np.float32)
+        np.copyto(out, arr, casting="same_kind")
+        return np.nan_to_num(out, copy=False, nan=0.0, posinf=1e10, neginf=-1e10)
 
     # ---------------------------------------------------------
     # Safe log10
     # ---------------------------------------------------------
-    def _safe_log10(self, arr):
-        arr = np.asarray(arr, dtype=np.float64)
-        arr = np.where(arr <= 0, self.eps, arr)
-        return np.log10(arr)
-
-    # ---------------------------------------------------------
-    # Shape utilities
-    # ---------------------------------------------------------
-    def _flatten_if_3d(self, X):
-        orig_shape = X.shape
-        if len(orig_shape) == 3:
-            return X.reshape(-1, orig_shape[-1]), orig_shape
-        return X, orig_shape
-
-    def _restore_shape(self, X_flat, orig_shape):
-        if len(orig_shape) == 3:
-            return X_flat.reshape(orig_shape)
-        return X_flat
+    def _safe_log10(self, arr, out=None):
+        # Pass out=arr to transform a float32 array in place
+        arr = np.asarray(arr, dtype=np.float32)
+        if out is None:
+            out = arr.copy()
+        elif out is not arr:
+            np.copyto(out, arr)
+        np.copyto(out, np.float32(self.eps), where=out <= 0)
+        return np.log10(out, out=out)
+
+    def _build_kernel(self):
+        self.kernel = ScalingKernel.from_sklearn(
+            self.x_scaler,
+            self.y_scaler,
+            eps=self.eps,
+            apply_log10_target=self.apply_log10_target,
+        )
+        self.is_fitted = True
 
     # ---------------------------------------------------------
     # Training scaling
@@ -57,7 +64,6 @@ class TrainingScaler:
         self.apply_log10_target = apply_log10_target
 
         # Sanitize
-        X_train = self._sanitize(X_train)
         y_train = self._sanitize(y_train)
 
         # Log10
@@ -69,19 +75,102 @@ class TrainingScaler:
         # Ensure 2D
         y_2d = y_proc.reshape(-1, 1) if y_proc.ndim == 1 else y_proc
 
-        # Flatten X if needed
-        X_flat, orig_shape = self._flatten_if_3d(X_train)
+        # Fit scalers on flattened windows
+        X_train = np.asarray(X_train)
+        self.x_scaler.fit(self._sanitize(X_train.reshape(-1, X_train.shape[-1])))
+        self.y_scaler.fit(y_2d)
+        self._build_kernel()
 
-        # Fit scalers
-        X_scaled_flat = self.x_scaler.fit_transform(X_flat)
-        y_scaled = self.y_scaler.fit_transform(y_2d)
+        return self.transform_features(X_train), self.transform_targets(y_train, apply_log10_target)
 
-        self.is_fitted = True
+    def fit_rows(self, X_rows, y_targets, apply_log10_target=True, chunk_rows=1_000_000):
+        """
+        Fit scalers on base feature rows in chunks instead of on flattened windows.
+        Gives the same min/max as fitting on every window that covers X_rows.
+        """
+        print("[Train] Fitting scalers on base rows")
+        self.apply_log10_target = apply_log10_target
+
+        # Chunked partial fit keeps memory bounded on memory-mapped input;
+        # every chunk is sanitized into the same float32 buffer
+        buffer = np.empty((min(chunk_rows, len(X_rows)),) + X_rows.shape[1:], dtype=np.float32)
+        for start in range(0, len(X_rows), chunk_rows):
+            chunk = X_rows[start : start + chunk_rows]
+            self.x_scaler.partial_fit(self._sanitize(chunk, out=buffer[: len(chunk)]))
+
+        # Sanitize and log10 targets (one float32 copy, transformed in place)
+        y_proc = self._sanitize(y_targets)
+        if apply_log10_target:
+            y_proc = self._safe_log10(y_proc, out=y_proc)
+
+        y_2d = y_proc.reshape(-1, 1) if y_proc.ndim == 1 else y_proc
+        self.y_scaler.fit(y_2d)
+
+        self._build_kernel()
 
-        # Restore shape
-        X_scaled = self._restore_shape(X_scaled_flat, orig_shape)
+    def extend_rows(self, X_rows, y_targets, chunk_rows=1_000_000):
+        """
+        Widen the fitted ranges to also cover new base rows and targets.
+        Ranges are never narrowed, so already-seen data keeps its scale unless
+        the new data falls outside it. Returns True if any range grew.
+        """
+        if not self.is_fitted:
+            raise ValueError("Scalers have not been fitted yet. Call fit_rows() or load() first.")
+        if len(X_rows) == 0:
+            return False
+
+        kernel = self.kernel
+        x_min, x_max = kernel.x_data_min.copy(), kernel.x_data_max.copy()
+
+        buffer = np.empty((min(chunk_rows, len(X_rows)),) + X_rows.shape[1:], dtype=np.float32)
+        for start in range(0, len(X_rows), chunk_rows):
+            chunk = X_rows[start : start + chunk_rows]
+            chunk = self._sanitize(chunk, out=buffer[: len(chunk)])
+            np.minimum(x_min, chunk.min(axis=0), out=x_min)
+            np.maximum(x_max, chunk.max(axis=0), out=x_max)
+
+        y_min, y_max = kernel.y_data_min.copy(), kernel.y_data_max.copy()
+        if len(y_targets):
+            y_proc = self._sanitize(y_targets)
+            if self.apply_log10_target:
+                y_proc = self._safe_log10(y_proc, out=y_proc)
+            y_min = np.minimum(y_min, y_proc.min())
+            y_max = np.maximum(y_max, y_proc.max())
+
+        extended = bool(
+            (x_min < kernel.x_data_min).any() or (x_max > kernel.x_data_max).any()
+            or (y_min < kernel.y_data_min).any() or (y_max > kernel.y_data_max).any()
+        )
+        if extended:
+            self.kernel = ScalingKernel(x_min, x_max, y_min, y_max,
+                                        feature_range=kernel.feature_range, eps=kernel.eps,
+                                        apply_log10_target=kernel.apply_log10_target)
+        return extended
+
+    def scale_rows(self, X_rows, y_rows, out_x=None, out_y=None, chunk_rows=1_000_000):
+        """
+        Scale base feature rows and the target column once, before windowing.
+        Windows cut from the result equal scaled windows, at 1/WINDOW of the cost.
+        Results are float32 and written into out_x / out_y (e.g. memmaps) if given.
+        """
+        if not self.is_fitted:
+            raise ValueError("Scalers have not been fitted yet. Call fit_rows() first.")
+
+        print("[Train] Scaling base rows")
+        n_rows = len(X_rows)
 
-        return X_scaled, y_scaled
+        if out_x is None:
+            out_x = np.empty(X_rows.shape, dtype=np.float32)
+        if out_y is None:
+            out_y = np.empty((n_rows, 1), dtype=np.float32)
+
+        # Chunked so memory-mapped input is streamed through the kernel
+        for start in range(0, n_rows, chunk_rows):
+            stop = start + chunk_rows
+            self.kernel.transform_features(X_rows[start:stop], out=out_x[start:stop])
+            self.kernel.encode_targets(y_rows[start:stop], out=out_y[start:stop])
+
+        return out_x, out_y
 
     # ---------------------------------------------------------
     # Test / live scaling
@@ -89,69 +178,35 @@ class TrainingScaler:
     def scale_test_or_live(self, X_data, y_data=None, apply_log10_target=True):
         print("[Test/Live] Applying scaling")
 
-        # Sanitize
-        X_data = self._sanitize(X_data)
-
-        # Flatten X
-        X_flat, orig_shape = self._flatten_if_3d(X_data)
-        X_scaled_flat = self.x_scaler.transform(X_flat)
-        X_scaled = self._restore_shape(X_scaled_flat, orig_shape)
+        X_scaled = self.transform_features(X_data)
 
         if y_data is None:
             return X_scaled
 
-        # Sanitize y
-        y_data = self._sanitize(y_data)
+        return X_scaled, self.transform_targets(y_data, apply_log10_target)
 
-        # Log10
-        if apply_log10_target:
-            y_proc = self._safe_log10(y_data)
-        else:
-            y_proc = y_data
+    def transform_features(self, X_data):
+        """Scale 2D/3D features with the fitted kernel."""
+        return self.kernel.transform_features(X_data)
 
-        y_2d = y_proc.reshape(-1, 1) if y_proc.ndim == 1 else y_proc
-        y_scaled = self.y_scaler.transform(y_2d)
-
-        return X_scaled, y_scaled
+    def transform_targets(self, y_data, apply_log10_target=True):
+        """Scale targets with the fitted kernel; returns a 2D column."""
+        return self.kernel.encode_targets(y_data, apply_log10=apply_log10_target)
 
     # ---------------------------------------------------------
     # Save / load
     # ---------------------------------------------------------
     def save(self, folder_path):
         if not self.is_fitted:
-            print("Warning: saving scalers before fitting")
-
-        os.makedirs(folder_path, exist_ok=True)
-        joblib.dump(self.x_scaler, os.path.join(folder_path, "solar_x_scaler.pkl"))
-        joblib.dump(self.y_scaler, os.path.join(folder_path, "solar_y_scaler.pkl"))
-        joblib.dump(
-            {
-                "eps": self.eps,
-                "apply_log10_target": self.apply_log10_target,
-            },
-            os.path.join(folder_path, "solar_scaler_meta.pkl"),
-        )
-        print(f"Saved scaler files to: {folder_path}")
+            print("Warning: scalers are not fitted; nothing to save")
+            return
+
+        path = self.kernel.save(folder_path)
+        print(f"Saved scaler file to: {path}")
 
     def load(self, folder_path):
-        x_path = os.path.join(folder_path, "solar_x_scaler.pkl")
-        y_path = os.path.join(folder_path, "solar_y_scaler.pkl")
-        meta_path = os.path.join(folder_path, "solar_scaler_meta.pkl")
-
-        if not os.path.exists(x_path) or not os.path.exists(y_path):
-            raise FileNotFoundError(
-                "Scaler files not found. Expected: "
-                "'solar_x_scaler.pkl' and 'solar_y_scaler.pkl'."
-            )
-
-        self.x_scaler = joblib.load(x_path)
-        self.y_scaler = joblib.load(y_path)
-        if os.path.exists(meta_path):
-            metadata = joblib.load(meta_path)
-            self.eps = metadata.get("eps", self.eps)
-            self.apply_log10_target = metadata.get(
-                "apply_log10_target",
-                self.apply_log10_target,
-            )
+        self.kernel = ScalingKernel.load(folder_path)
+        self.eps = self.kernel.eps
+        self.apply_log10_target = self.kernel.apply_log10_target
         self.is_fitted = True
         print(f"Loaded scalers from: {folder_path}")
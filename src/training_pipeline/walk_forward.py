@@ -0,0 +1,168 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+
+from .process_pool import pinned_pool, shared_base_arrays, open_memmap, available_cores, scaled_scratch, remove_scratch
+from .training_scaler import TrainingScaler
+from .window_engine import WindowEngine
+from .stream_dataset import StreamingWindowDataset
+from .solar_flare_predictor import SolarFlarePredictor
+
+
+class WalkForwardSplitter:
+    """
+    Expanding-window walk-forward splits over window start rows.
+
+    The starts are cut into n_folds + 1 consecutive blocks; fold k tests on
+    block k + 1 and trains on everything before it. A window spans
+    window + horizon + 1 rows, so training windows closer than that to the
+    first test start would share rows with test windows: they are purged,
+    and embargo drops a further number of rows before the test block.
+    With max_train_windows the training set slides instead of expanding.
+    """
+
+    def __init__(self, n_folds=5, window=180, horizon=90, embargo=0, max_train_windows=None):
+        """Initialize fold count, window geometry and boundary gaps."""
+        if n_folds < 1:
+            raise ValueError(f"n_folds must be at least 1, got {n_folds}")
+        self.n_folds = n_folds
+        self.purge = window + horizon + 1
+        self.embargo = embargo
+        self.max_train_windows = max_train_windows
+
+    def split(self, starts):
+        """Yield (train_starts, test_starts) per fold."""
+        starts = np.asarray(starts)
+        blocks = np.array_split(starts, self.n_folds + 1)
+
+        for test_starts in blocks[1:]:
+            if len(test_starts) == 0:
+                continue
+
+            # Train windows must end (target row included) before the first test row
+            cutoff = test_starts[0] - self.purge - self.embargo
+            train_starts = starts[starts <= cutoff]
+            if self.max_train_windows is not None:
+                train_starts = train_starts[-self.max_train_windows:]
+
+            if len(train_starts) == 0:
+                continue
+            yield train_starts, test_starts
+
+
+def limit_tf_threads():
+    """Size TensorFlow's thread pools to the cores this worker is pinned to."""
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(len(available_cores()))
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+    except RuntimeError:
+        # Runtime already initialized by an earlier task in this worker
+        pass
+
+
+def _run_fold(fold, x_spec, y_spec, window, horizon, horizons, train_starts, test_starts, out_dir, epochs,
+              batch_size, prefetch, jit_compile):
+    """Fit scalers and train one fold (worker process)."""
+    limit_tf_threads()
+    X, y = open_memmap(x_spec), open_memmap(y_spec)
+    engine = WindowEngine(window, horizon, horizons=horizons)
+    print(f"[Fold {fold}] {len(train_starts)} train / {len(test_starts)} test windows "
+          f"on cores {available_cores()}")
+
+    # Scalers see only this fold's training rows and targets
+    training_scaler = TrainingScaler()
+    training_scaler.fit_rows(X[: train_starts[-1] + window], y[engine.target_rows(train_starts)].ravel())
+
+    # Rows up to the last test window are scaled into this fold's scratch memmaps, not RAM
+    n_rows = test_starts[-1] + engine.window + engine.horizon + 1
+    X_scaled, y_scaled, scratch = scaled_scratch(training_scaler, X[:n_rows], y[:n_rows],
+                                                 os.path.join(out_dir, f"fold_{fold}_scratch"))
+
+    stream = StreamingWindowDataset(X_scaled, y_scaled, engine, batch_size=batch_size, prefetch=prefetch)
+    train_ds, val_ds = stream.make(train_starts), stream.make(test_starts)
+
+    sFP = SolarFlarePredictor(window_size=window, n_features=X.shape[1], n_outputs=engine.n_outputs,
+                              jit_compile=jit_compile, model_save_folder=os.path.join(out_dir, f"fold_{fold}.keras"))
+    history = sFP.train_stream(train_ds, val_ds, epochs=epochs)
+
+    # Best weights are restored by early stopping
+    val_mse, val_mae = sFP.model.evaluate(val_ds, verbose=0)
+    tf.keras.backend.clear_session()
+    remove_scratch(scratch)
+    os.rmdir(os.path.dirname(scratch[0]))
+
+    return {
+        "fold": fold,
+        "train_windows": len(train_starts),
+        "test_windows": len(test_starts),
+        "test_first_row": int(test_starts[0]),
+        "epochs": len(history.history["loss"]),
+        "val_mse": float(val_mse),
+        "val_mae": float(val_mae),
+    }
+
+
+class WalkForwardCV:
+    """
+    Walk-forward cross-validation of the LSTM predictor.
+
+    Every fold fits its own scalers on its training rows and trains in a
+    separate process pinned to its own subset of CPU cores. The folds share
+    the memory-mapped base matrix instead of each receiving a copy. Results
+    are aggregated into a per-fold table plus mean/std in out_dir.
+    """
+
+    RESULTS_CSV = "cv_results.csv"
+    SUMMARY_JSON = "cv_summary.json"
+
+    def __init__(self, splitter, out_dir, workers=1, epochs=10, batch_size=64, prefetch=tf.data.AUTOTUNE,
+                 jit_compile=False):
+        """Initialize splitter, output folder, parallelism and the training profile's batching / XLA settings."""
+        self.splitter = splitter
+        self.out_dir = out_dir
+        self.workers = workers
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.prefetch = prefetch
+        self.jit_compile = jit_compile
+
+    def run(self, X, y, starts, engine, cache):
+        """Run all folds over the base rows; returns (per-fold DataFrame, summary dict)."""
+        os.makedirs(self.out_dir, exist_ok=True)
+        x_spec, y_spec = shared_base_arrays(X, y, cache)
+
+        folds = list(self.splitter.split(starts))
+        if not folds:
+            raise ValueError(f"Not enough windows ({len(starts)}) for {self.splitter.n_folds} walk-forward folds")
+        print(f"Walk-forward CV: {len(folds)} fold(s), {self.workers} worker(s)")
+
+        with pinned_pool(self.workers) as pool:
+            futures = [
+                pool.submit(_run_fold, k, x_spec, y_spec, engine.window, engine.horizon, engine.horizons,
+                            tr_starts, te_starts, self.out_dir, self.epochs, self.batch_size,
+                            self.prefetch, self.jit_compile)
+                for k, (tr_starts, te_starts) in enumerate(folds)
+            ]
+            results = [future.result() for future in futures]
+
+        table = pd.DataFrame(results)
+        summary = {
+            "folds": len(results),
+            "purge_rows": self.splitter.purge,
+            "embargo_rows": self.splitter.embargo,
+        }
+        for metric in ("val_mse", "val_mae"):
+            summary[f"{metric}_mean"] = float(table[metric].mean())
+            summary[f"{metric}_std"] = float(table[metric].std(ddof=0))
+
+        table.to_csv(os.path.join(self.out_dir, self.RESULTS_CSV), index=False)
+        with open(os.path.join(self.out_dir, self.SUMMARY_JSON), "w") as f:
+            json.dump(summary, f, indent=2)
+
+        print(table.to_string(index=False))
+        print(f"val_mse {summary['val_mse_mean']:.6f} ± {summary['val_mse_std']:.6f}, "
+              f"val_mae {summary['val_mae_mean']:.6f} ± {summary['val_mae_std']:.6f}")
+        return table, summary
@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+
+class TrainingWatermark:
+    """
+    Record of how many base rows the saved model was trained on.
+
+    The base matrix only grows by appending, so rows before the watermark are
+    what the model has already seen. A digest of the last DIGEST_ROWS rows
+    before the watermark detects a rewritten history (e.g. a backfill), in
+    which case the watermark no longer applies and a full training is needed.
+    """
+
+    DIGEST_ROWS = 16
+
+    def __init__(self, path):
+        """Initialize with the JSON state file path."""
+        self.path = path
+
+    def _digest(self, X, y, n_rows):
+        hasher = hashlib.sha256()
+        lo = max(0, n_rows - self.DIGEST_ROWS)
+        hasher.update(np.ascontiguousarray(X[lo:n_rows]).tobytes())
+        hasher.update(np.ascontiguousarray(y[lo:n_rows]).tobytes())
+        return hasher.hexdigest()
+
+    def load(self):
+        """Return the saved state dict, or None."""
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "r") as f:
+            return json.load(f)
+
+    def save(self, X, y, feature_cols, window, horizon):
+        """Mark all current rows as trained on."""
+        state = {
+            "rows": len(X),
+            "digest": self._digest(X, y, len(X)),
+            "feature_cols": list(feature_cols) if feature_cols is not None else None,
+            "window": window,
+            "horizon": horizon,
+        }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def trained_rows(self, X, y, feature_cols, window, horizon):
+        """
+        Return the number of leading rows already trained on, or None when the
+        watermark is missing or does not match the current base matrix.
+        """
+        state = self.load()
+        if state is None:
+            return None
+
+        feature_cols = list(feature_cols) if feature_cols is not None else None
+        if (state["window"], state["horizon"], state["feature_cols"]) != (window, horizon, feature_cols):
+            return None
+
+        n_rows = state["rows"]
+        if n_rows > len(X) or self._digest(X, y, n_rows) != state["digest"]:
+            return None
+        return n_rows
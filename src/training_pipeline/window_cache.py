@@ -0,0 +1,321 @@
+import csv
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+
+
+class WindowCache:
+    """
+    On-disk, memory-mapped cache of the base feature matrix and targets.
+
+    Training windows are strided views over the (rows, n_features) matrix,
+    so caching the base rows is enough to skip both parsing and windowing.
+    A CSV source is fingerprinted with a chain of SHA-256 checkpoints taken
+    every CHECKPOINT_ROWS rows; a DatasetStore source is fingerprinted per
+    day partition. When rows are appended (or only the most recent rows are
+    rewritten) the cache keeps the longest unchanged prefix and only reads
+    the remaining tail.
+    """
+
+    CHECKPOINT_ROWS = 4096
+    READ_CHUNK = 1 << 22
+    PARSE_CHUNK_ROWS = 200_000
+
+    META_FILE = "cache_meta.json"
+    X_FILE = "features.dat"
+    Y_FILE = "targets.dat"
+    DTYPE = np.float32
+
+    def __init__(self, cache_dir, window, horizon, drop_cols, target_col):
+        """Initialize cache location; the target and feature columns key it."""
+        self.cache_dir = cache_dir
+        self.window = window
+        self.horizon = horizon
+        self.drop_cols = list(drop_cols)
+        self.target_col = target_col
+
+        self.meta_path = os.path.join(cache_dir, self.META_FILE)
+        self.x_path = os.path.join(cache_dir, self.X_FILE)
+        self.y_path = os.path.join(cache_dir, self.Y_FILE)
+
+    # ---------------------------------------------------------
+    # Public API
+    # ---------------------------------------------------------
+    def load(self, csv_path):
+        """Return memory-mapped (X, y) for csv_path, updating the cache if needed."""
+        if not os.path.isfile(csv_path):
+            raise FileNotFoundError(f"CSV not found: {csv_path}")
+
+        header, header_len = self._read_header(csv_path)
+        feature_cols = [c for c in header if c not in self.drop_cols]
+        params_key = self._params_key(feature_cols)
+        file_size = os.path.getsize(csv_path)
+
+        meta = self._read_meta()
+        if meta is not None and meta.get("source") == "csv" and meta["params_key"] == params_key \
+                and meta["header"] == header:
+            kept, hasher = self._valid_checkpoints(csv_path, meta["checkpoints"])
+        else:
+            kept, hasher = [], None
+
+        if kept:
+            n_rows, offset = kept[-1]["rows"], kept[-1]["offset"]
+        else:
+            n_rows, offset = 0, header_len
+            hasher = self._hash_prefix(csv_path, header_len)
+
+        if meta is not None and offset == file_size and n_rows == meta["n_rows"]:
+            print(f"Window cache hit ({n_rows} rows)")
+            return self._open(n_rows, len(feature_cols))
+
+        print(f"Window cache update: reusing {n_rows} rows, parsing from byte {offset}")
+
+        # Invalidate first so a crash mid-update forces a clean rebuild
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if os.path.exists(self.meta_path):
+            os.remove(self.meta_path)
+
+        new_checkpoints, n_tail = self._checkpoint_tail(csv_path, offset, n_rows, hasher)
+        with open(csv_path, "rb") as f:
+            f.seek(offset)
+            reader = pd.read_csv(f, header=None, names=header, chunksize=self.PARSE_CHUNK_ROWS)
+            self._append_frames(reader, feature_cols, n_rows)
+        n_rows += n_tail
+
+        self._write_meta({
+            "source": "csv",
+            "params_key": params_key,
+            "cache_key": self._cache_key(params_key, kept + new_checkpoints),
+            "header": header,
+            "feature_cols": feature_cols,
+            "window": self.window,
+            "horizon": self.horizon,
+            "n_rows": n_rows,
+            "checkpoints": kept + new_checkpoints,
+        })
+
+        return self._open(n_rows, len(feature_cols))
+
+    def load_store(self, store):
+        """Return memory-mapped (X, y) for a DatasetStore, re-reading only changed partitions."""
+        header = store.columns()
+        feature_cols = [c for c in header if c not in self.drop_cols]
+        params_key = self._params_key(feature_cols)
+        days = store.partitions()
+
+        # Keep the longest prefix of unchanged day partitions
+        meta = self._read_meta()
+        kept = []
+        if meta is not None and meta.get("source") == "store" and meta["params_key"] == params_key:
+            for cached, day in zip(meta["partitions"], days):
+                if cached["day"] != day or not self._partition_unchanged(store, cached):
+                    break
+                kept.append(cached)
+        n_rows = sum(p["rows"] for p in kept)
+
+        if meta is not None and len(kept) == len(days) == len(meta.get("partitions", ())):
+            print(f"Window cache hit ({n_rows} rows)")
+            return self._open(n_rows, len(feature_cols))
+
+        remaining = days[len(kept):]
+        print(f"Window cache update: reusing {len(kept)} partition(s), reading {len(remaining)}")
+
+        # Invalidate first so a crash mid-update forces a clean rebuild
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if os.path.exists(self.meta_path):
+            os.remove(self.meta_path)
+
+        new_parts = []
+
+        def frames():
+            for day in remaining:
+                df = store.read(days=[day], columns=feature_cols + [self.target_col])
+                new_parts.append(dict(self._partition_fingerprint(store, day), rows=len(df)))
+                yield df
+
+        self._append_frames(frames(), feature_cols, n_rows)
+        partitions = kept + new_parts
+
+        self._write_meta({
+            "source": "store",
+            "params_key": params_key,
+            "cache_key": hashlib.sha256(
+                (params_key + "".join(p["sha256"] for p in partitions)).encode()
+            ).hexdigest(),
+            "header": header,
+            "feature_cols": feature_cols,
+            "window": self.window,
+            "horizon": self.horizon,
+            "n_rows": sum(p["rows"] for p in partitions),
+            "partitions": partitions,
+        })
+
+        return self._open(sum(p["rows"] for p in partitions), len(feature_cols))
+
+    def feature_cols(self):
+        """Return the feature column names of the cached matrix, or None if there is no cache."""
+        meta = self._read_meta()
+        return meta["feature_cols"] if meta is not None else None
+
+    def scratch_memmap(self, name, shape):
+        """Return a writable float32 memmap stored next to the cache files."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, f"{name}.dat")
+        return np.memmap(path, dtype=self.DTYPE, mode="w+", shape=shape)
+
+    def open_scratch(self, name, shape):
+        """Reopen an existing scratch memmap of the given shape, or return None."""
+        path = os.path.join(self.cache_dir, f"{name}.dat")
+        if not os.path.exists(path) or os.path.getsize(path) != int(np.prod(shape)) * np.dtype(self.DTYPE).itemsize:
+            return None
+        return np.memmap(path, dtype=self.DTYPE, mode="r+", shape=shape)
+
+    def clear(self):
+        """Remove all cache files."""
+        for path in (self.meta_path, self.x_path, self.y_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    # ---------------------------------------------------------
+    # Keys and metadata
+    # ---------------------------------------------------------
+    def _params_key(self, feature_cols):
+        # Only base rows are cached, so window and horizon do not change the contents
+        payload = json.dumps([self.target_col, feature_cols])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _cache_key(self, params_key, checkpoints):
+        content_hash = checkpoints[-1]["sha256"] if checkpoints else ""
+        return hashlib.sha256(f"{params_key}:{content_hash}".encode()).hexdigest()
+
+    def _read_meta(self):
+        if not os.path.exists(self.meta_path):
+            return None
+        with open(self.meta_path, "r") as f:
+            return json.load(f)
+
+    def _write_meta(self, meta):
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+    # ---------------------------------------------------------
+    # Fingerprinting
+    # ---------------------------------------------------------
+    def _read_header(self, csv_path):
+        with open(csv_path, "rb") as f:
+            header_line = f.readline()
+        header = next(csv.reader([header_line.decode()]))
+        return header, len(header_line)
+
+    def _hash_prefix(self, csv_path, n_bytes):
+        hasher = hashlib.sha256()
+        with open(csv_path, "rb") as f:
+            hasher.update(f.read(n_bytes))
+        return hasher
+
+    def _valid_checkpoints(self, csv_path, checkpoints):
+        """Return the checkpoints whose prefix hash still matches, plus the hasher state."""
+        kept = []
+        hasher = hashlib.sha256()
+        good_hasher = None
+        pos = 0
+
+        with open(csv_path, "rb") as f:
+            for cp in checkpoints:
+                remaining = cp["offset"] - pos
+                while remaining > 0:
+                    chunk = f.read(min(remaining, self.READ_CHUNK))
+                    if not chunk:
+                        return kept, good_hasher
+                    hasher.update(chunk)
+                    pos += len(chunk)
+                    remaining -= len(chunk)
+
+                if hasher.hexdigest() != cp["sha256"]:
+                    break
+                kept.append(cp)
+                good_hasher = hasher.copy()
+
+        return kept, good_hasher
+
+    def _partition_fingerprint(self, store, day):
+        path = store.partition_path(day)
+        stat = os.stat(path)
+        with open(path, "rb") as f:
+            sha = hashlib.sha256(f.read()).hexdigest()
+        return {"day": day, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha}
+
+    def _partition_unchanged(self, store, cached):
+        stat = os.stat(store.partition_path(cached["day"]))
+        if stat.st_size == cached["size"] and stat.st_mtime_ns == cached["mtime_ns"]:
+            return True
+
+        # Touched but maybe identical: fall back to the content hash
+        return self._partition_fingerprint(store, cached["day"])["sha256"] == cached["sha256"]
+
+    def _checkpoint_tail(self, csv_path, offset, n_rows, hasher):
+        """Hash the tail from offset and record a checkpoint every CHECKPOINT_ROWS rows."""
+        checkpoints = []
+        rows = n_rows
+        pos = offset
+        last_end = offset
+
+        with open(csv_path, "rb") as f:
+            f.seek(offset)
+            while True:
+                chunk = f.read(self.READ_CHUNK)
+                if not chunk:
+                    break
+
+                line_ends = np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == ord("\n")) + 1
+                start = 0
+                for end in line_ends:
+                    rows += 1
+                    if rows % self.CHECKPOINT_ROWS == 0:
+                        hasher.update(chunk[start:end])
+                        start = end
+                        checkpoints.append({"rows": rows, "offset": pos + int(end), "sha256": hasher.hexdigest()})
+                hasher.update(chunk[start:])
+                pos += len(chunk)
+                if len(line_ends):
+                    last_end = pos - len(chunk) + int(line_ends[-1])
+
+        # Final checkpoint, only at a complete line so a later append cannot extend it
+        if last_end == pos and (not checkpoints or checkpoints[-1]["offset"] != pos) and rows > n_rows:
+            checkpoints.append({"rows": rows, "offset": pos, "sha256": hasher.hexdigest()})
+
+        # An unterminated last line is still a row
+        if pos > last_end:
+            rows += 1
+
+        return checkpoints, rows - n_rows
+
+    # ---------------------------------------------------------
+    # Storage
+    # ---------------------------------------------------------
+    def _append_frames(self, frames, feature_cols, n_rows):
+        """Truncate the data files to n_rows and append the rows of each frame."""
+        itemsize = np.dtype(self.DTYPE).itemsize
+        n_features = len(feature_cols)
+
+        with open(self.x_path, "ab") as fx, open(self.y_path, "ab") as fy:
+            fx.truncate(n_rows * n_features * itemsize)
+            fy.truncate(n_rows * itemsize)
+
+            for df in frames:
+                fx.write(df[feature_cols].to_numpy(dtype=self.DTYPE).tobytes())
+                fy.write(df[self.target_col].to_numpy(dtype=self.DTYPE).tobytes())
+
+    def _open(self, n_rows, n_features):
+        if n_rows == 0:
+            return (
+                np.empty((0, n_features), dtype=self.DTYPE),
+                np.empty((0,), dtype=self.DTYPE),
+            )
+        X = np.memmap(self.x_path, dtype=self.DTYPE, mode="r", shape=(n_rows, n_features))
+        y = np.memmap(self.y_path, dtype=self.DTYPE, mode="r", shape=(n_rows,))
+        return X, y
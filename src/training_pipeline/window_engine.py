@@ -0,0 +1,125 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class WindowEngine:
+    """
+    Build sliding input windows and future targets as strided views.
+    No window is copied: x[i] is a read-only view over the source rows.
+    """
+
+    def __init__(self, window=180, horizon=90, stride=1, horizons=None):
+        """
+        Initialize window, horizon and stride sizes.
+        With horizons (e.g. (15, 30, 60, 90, 120)) every window gets a vector
+        of targets, one per horizon, and horizon becomes the longest of them.
+        """
+        if horizons is not None:
+            horizons = tuple(sorted(set(int(h) for h in horizons)))
+            horizon = horizons[-1] if horizons else -1
+        if window <= 0 or horizon < 0 or stride <= 0 or (horizons is not None and horizons[0] < 0):
+            raise ValueError(
+                f"Invalid window settings: window={window}, "
+                f"horizon={horizon}, stride={stride}, horizons={horizons}"
+            )
+        self.window = window
+        self.horizon = horizon
+        self.stride = stride
+        self.horizons = horizons
+
+        # Target row offsets from a window start
+        self.target_offsets = np.asarray(horizons if horizons is not None else (horizon,)) + window
+
+    @property
+    def multi_horizon(self):
+        """True when windows have a vector of targets."""
+        return self.horizons is not None
+
+    @property
+    def n_outputs(self):
+        """Number of targets per window."""
+        return len(self.target_offsets)
+
+    def n_windows(self, n_rows):
+        """Return the number of (x, y) pairs available for n_rows rows."""
+        n_samples = n_rows - self.window - self.horizon
+        if n_samples <= 0:
+            return 0
+        return (n_samples + self.stride - 1) // self.stride
+
+    def window_starts(self, n_rows):
+        """Return the first row index of every window."""
+        return np.arange(self.n_windows(n_rows)) * self.stride
+
+    def target_indices(self, n_rows):
+        """Return the row index of the target of every window."""
+        return self.target_rows(self.window_starts(n_rows))
+
+    def target_rows(self, starts):
+        """Row indices of the targets of the given windows: (n,) or (n, n_horizons)."""
+        starts = np.asarray(starts)
+        if self.multi_horizon:
+            return starts[:, None] + self.target_offsets
+        return starts + self.window + self.horizon
+
+    def build(self, X, y, starts=None):
+        """
+        Return (x, y) views for all windows.
+        x has shape (n, window, n_features), y has shape (n,), or
+        (n, n_horizons) with multiple horizons. With starts (a subset of
+        window_starts) only those windows are returned; selecting them
+        gathers a copy instead of a view.
+        """
+        X = np.asarray(X)
+        y = np.asarray(y)
+        if self.multi_horizon and y.ndim == 2:
+            # (rows, 1) target column
+            y = y[:, 0]
+        n = self.n_windows(len(X))
+
+        if n == 0 or (starts is not None and len(starts) == 0):
+            return (
+                np.empty((0, self.window, X.shape[-1]), dtype=X.dtype),
+                np.empty((0, self.n_outputs) if self.multi_horizon else (0,), dtype=y.dtype),
+            )
+
+        # (rows - window + 1, n_features, window) -> (.., window, n_features)
+        x_view = sliding_window_view(X, self.window, axis=0).swapaxes(1, 2)
+        offset = self.window + self.horizon
+
+        if starts is not None:
+            starts = np.asarray(starts)
+            return x_view[starts], y[self.target_rows(starts)]
+
+        x_view = x_view[: n * self.stride : self.stride]
+
+        if self.multi_horizon:
+            # Strided view of each window's target span, then one gather of the horizon columns
+            first = self.target_offsets[0]
+            span_view = sliding_window_view(y[first:], self.target_offsets[-1] - first + 1)
+            return x_view, span_view[: n * self.stride : self.stride][:, self.target_offsets - first]
+
+        # Targets sit window + horizon rows after each window start
+        y_view = y[offset : offset + n * self.stride : self.stride]
+
+        return x_view, y_view
+
+    def iter_batches(self, X, y, batch_size=4096, starts=None):
+        """
+        Yield contiguous (x, y) batches of at most batch_size windows.
+        Only one batch is materialized at a time.
+        """
+        if starts is not None:
+            # Gather one batch of selected windows at a time
+            for start in range(0, len(starts), batch_size):
+                yield self.build(X, y, starts=starts[start:start + batch_size])
+            return
+
+        x_view, y_view = self.build(X, y)
+
+        for start in range(0, len(x_view), batch_size):
+            stop = start + batch_size
+            yield (
+                np.ascontiguousarray(x_view[start:stop]),
+                np.ascontiguousarray(y_view[start:stop]),
+            )